@@ -52,6 +52,10 @@ variable db_host {
     type = "string"
 }
 
+variable cache_location {
+    type = "string"
+}
+
 variable mail_domain {
     type = "string"
 }
@@ -83,6 +83,14 @@ resource "kubernetes_deployment" "app" {
             name = "DB_NAME"
             value = "${var.app_name}"
           }
+          env {
+            name = "CACHE_BACKEND"
+            value = "django.core.cache.backends.memcached.MemcachedCache"
+          }
+          env {
+            name = "CACHE_LOCATION"
+            value = "${var.cache_location}"
+          }
           env {
             name = "MAIL_DOMAIN"
             value = "${var.mail_domain}"
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.serializers import Serializer
+
+from posts import fastpath
+from posts import serializers
+from posts.models import Post
+
+# Each cached serializer gets its own key namespace. Bump VERSION when a payload's shape changes.
+NAMESPACES = {
+    serializers.PostSerializer: 'post',
+    serializers.PostSummarySerializer: 'post-summary',
+}
+VERSION = 2
+
+
+def _cache():
+    return caches[settings.POST_CACHE_ALIAS]
+
+
+def _key(namespace: str, post_id: int, last_modified: datetime) -> str:
+    return f'{namespace}:{post_id}:{last_modified.isoformat()}'
+
+
+def serialize_posts(
+    posts: List[Post], serializer_class: Type[Serializer], context: Optional[dict] = None
+) -> List[dict]:
+    """
+    `serializer_class(posts, many=True).data`, read through the cache.
+
+    Payloads are keyed on the post's id and `last_modified`, so edits never see a stale entry.
+    A page costs one `get_many`, and whatever is missing is serialized together and stored with one `set_many`.
+    Misses go through the serializer's fast-path plan where it has one.
+    """
+    # Expanded payloads vary with the request, so they aren't cached
+    request = (context or {}).get('request')
+    if request is not None and request.query_params.get('expand'):
+        return serializer_class(posts, many=True, context=context).data
+
+    namespace = NAMESPACES[serializer_class]
+    keys = [_key(namespace, post.pk, post.last_modified) for post in posts]
+
+    cache = _cache()
+    payloads = cache.get_many(keys, version=VERSION)
+    missing = [(key, post) for key, post in zip(keys, posts) if key not in payloads]
+    if missing:
+        plan = fastpath.plan_for(serializer_class)
+        if plan is not None:
+            data = plan.build_objects(post for _, post in missing)
+        else:
+            data = serializer_class([post for _, post in missing], many=True, context=context).data
+        fresh = {key: payload for (key, _), payload in zip(missing, data)}
+        cache.set_many(fresh, timeout=settings.POST_CACHE_TIMEOUT, version=VERSION)
+        payloads.update(fresh)
+
+    return [payloads[key] for key in keys]
+
+
+def serialize_post(post: Post, serializer_class: Type[Serializer], context: Optional[dict] = None) -> dict:
+    return serialize_posts([post], serializer_class, context)[0]
+
+
+def invalidate(versions: Iterable[tuple]):
+    """
+    Drops the cached payloads for `(post_id, last_modified)` pairs.
+    """
+    keys = [_key(namespace, post_id, last_modified)
+            for post_id, last_modified in versions
+            for namespace in NAMESPACES.values()]
+    if keys:
+        _cache().delete_many(keys, version=VERSION)
@@ -0,0 +1,90 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from posts.models import PostDayCount
+
+
+def _day(created_at: datetime.datetime) -> datetime.date:
+    return timezone.localdate(created_at)
+
+
+def add(author_id: int, created_at: datetime.datetime, public: bool):
+    """
+    Counts a post on its day with a single upsert, so concurrent posts on the same day can't race.
+    """
+    add_many([(author_id, created_at, public)])
+
+
+def add_many(posts: Iterable[Tuple[int, datetime.datetime, bool]]):
+    """
+    Counts `(author_id, created_at, public)` posts with a single upsert. They are totalled per author
+    and day first, since one statement can't update the same row twice.
+    """
+    totals: Dict[Tuple[int, datetime.date], List[int]] = defaultdict(lambda: [0, 0])
+    for author_id, created_at, public in posts:
+        total = totals[(author_id, _day(created_at))]
+        total[0] += 1
+        total[1] += int(public)
+    if not totals:
+        return
+
+    now = timezone.now()
+    table = connection.ops.quote_name(PostDayCount._meta.db_table)
+    rows = ', '.join(['(%s, %s, %s, %s, %s)'] * len(totals))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (author_id, day, count, public_count, last_modified) '
+            f'VALUES {rows} '
+            f'ON CONFLICT (author_id, day) DO UPDATE SET '
+            f'count = {table}.count + EXCLUDED.count, '
+            f'public_count = {table}.public_count + EXCLUDED.public_count, '
+            f'last_modified = EXCLUDED.last_modified',
+            [
+                value
+                for (author_id, day), (count, public_count) in totals.items()
+                for value in (author_id, day, count, public_count, now)
+            ]
+        )
+
+
+def remove(author_id: int, created_at: datetime.datetime, public: bool):
+    """
+    Only updates and deletes, so it is safe to run in the middle of a cascade deleting the author.
+    """
+    day = _day(created_at)
+    counts = PostDayCount.objects.filter(author_id=author_id, day=day)
+    counts.filter(count__gt=0).update(
+        count=F('count') - 1,
+        public_count=Greatest(F('public_count') - int(public), 0),
+        last_modified=timezone.now()
+    )
+    counts.filter(count=0).delete()
+
+
+def calendar(author_id: int, year: int, public_only: bool) -> Dict[str, object]:
+    """
+    Post counts for each day and month of `year`, plus every year with posts, from the rollup.
+    Someone other than the author only gets public posts counted.
+    """
+    field = 'public_count' if public_only else 'count'
+    counts = PostDayCount.objects.filter(author_id=author_id, **{f'{field}__gt': 0})
+
+    days: Dict[str, int] = {}
+    months: List[int] = [0] * 12
+    for day, count in counts.filter(day__year=year).order_by('day').values_list('day', field):
+        days[day.isoformat()] = count
+        months[day.month - 1] += count
+
+    return {
+        'year': year,
+        'years': [date.year for date in counts.dates('day', 'year')],
+        'total': sum(months),
+        'months': months,
+        'days': days,
+    }
@@ -57,6 +57,18 @@ class InvalidUsernameError(ResponseError):
         super().__init__('unknown-username', [f"There is no user named '{name}'"])
 
 
+class StaleVersionError(ResponseError):
+
+    def __init__(self, current: str):
+        super().__init__('stale-version', [
+            {
+                'message': "The record has changed since the version in 'base'",
+                'name': 'base',
+                'current': current
+            }
+        ])
+
+
 class ResponseException(Exception):
 
     def __init__(self, error: ResponseError, status_code: int):
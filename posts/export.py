@@ -0,0 +1,78 @@
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework.fields import DateTimeField
+
+from posts.models import Post
+from posts.utils import fastjson
+
+_datetime = DateTimeField()
+
+
+def entries(author: User) -> Iterator[dict]:
+    """
+    All of `author`'s posts, oldest first, as plain dicts.
+
+    Rows are read through a server-side cursor `POST_EXPORT_CHUNK_SIZE` at a time and never
+    become model instances. Compressed bodies come along in the same query and are inflated here.
+    """
+    rows = Post.objects.filter(author=author).order_by('created_at', 'id').values_list(
+        'id', 'created_at', 'last_modified', 'title', 'inline_body', 'body_compressed', 'stored_body__data',
+        'visibility_type'
+    ).iterator(chunk_size=settings.POST_EXPORT_CHUNK_SIZE)
+
+    for pk, created_at, last_modified, title, inline_body, compressed, data, visibility_type in rows:
+        yield {
+            'id': pk,
+            'created_at': _datetime.to_representation(created_at),
+            'last_modified': _datetime.to_representation(last_modified),
+            'title': title,
+            'body': zlib.decompress(data).decode('utf-8') if compressed else inline_body,
+            'visibility_type': visibility_type
+        }
+
+
+def _dumps(entry: dict) -> bytes:
+    return fastjson.dumps(entry)
+
+
+def ndjson(entries: Iterable[dict]) -> Iterator[bytes]:
+    for entry in entries:
+        yield _dumps(entry) + b'\n'
+
+
+class _ChunkBuffer:
+    """
+    Write-only file for `zipfile` that hands back whatever was written since it was last drained.
+    Having no `tell` makes `zipfile` write the archive front to back without seeking.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_archive(entries: Iterable[dict]) -> Iterator[bytes]:
+    """
+    A zip archive with one `entries/<id>.json` file per entry, yielded as each file is compressed.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for entry in entries:
+            archive.writestr(f"entries/{entry['id']}.json", _dumps(entry))
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,184 @@
+import zlib
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import ISO_8601, fields, relations
+from rest_framework.settings import api_settings
+from rest_framework.serializers import BaseSerializer, ListSerializer, Serializer
+
+from posts import serializers
+
+# Fields whose representation of a value straight from the database is the value itself
+IDENTITY_FIELDS = (fields.CharField, fields.IntegerField, fields.BooleanField, fields.ReadOnlyField)
+
+
+def ISO_DATETIME(value, tz):
+    """
+    `DateTimeField.to_representation` for ISO 8601 output, with the current timezone
+    looked up once per call instead of once per value.
+    """
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _is_iso_datetime(field) -> bool:
+    return (
+        isinstance(field, fields.DateTimeField)
+        and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601
+        and not hasattr(field, 'timezone')
+        and settings.USE_TZ
+    )
+
+
+def _combined(get: Callable[[dict], tuple], combine: Callable[..., Any]) -> Callable[[dict], Any]:
+    return lambda row: combine(*get(row))
+
+
+class _Step(NamedTuple):
+    name: str
+    # Reads the field's value from a model instance
+    attribute: Callable[[Any], Any]
+    # Reads the field's value from a `.values()` row
+    item: Callable[[dict], Any]
+    convert: Optional[Callable[[Any], Any]]
+    nested: Optional[List['_Step']]
+
+
+class Plan:
+    """
+    Read-only stand-in for a serializer class that produces the same output without
+    instantiating serializers or walking their fields for each object.
+
+    The serializer's fields are inspected once, on first use, into a flat list of steps that
+    read values from model instances (`build_objects`) or from `.values()` rows (`serialize`).
+    `values_sources` supplies `.values()` lookups for attributes that aren't database
+    columns, as `{attribute: (lookups, combine)}`.
+
+    Only plain and nested serializer fields are supported, and serializer context is not,
+    so expanded fields still need the real serializer.
+    """
+
+    def __init__(
+        self, serializer_class: Type[Serializer],
+        values_sources: Optional[Dict[str, Tuple[Sequence[str], Callable[..., Any]]]] = None
+    ):
+        self.serializer_class = serializer_class
+        self.values_sources = values_sources or {}
+        self._steps: Optional[List[_Step]] = None
+        self._lookups: List[str] = []
+
+    @property
+    def steps(self) -> List[_Step]:
+        self._compile_once()
+        return self._steps
+
+    @property
+    def lookups(self) -> List[str]:
+        self._compile_once()
+        return self._lookups
+
+    def _compile_once(self):
+        # Deferred so that plans can be declared before apps are ready
+        if self._steps is None:
+            self._lookups = []
+            self._steps = self._compile(self.serializer_class(), ())
+
+    def _compile(self, serializer: Serializer, prefix: Tuple[str, ...]) -> List[_Step]:
+        steps = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, ListSerializer) or not field.source_attrs:
+                raise TypeError(f"{type(serializer).__name__}.{name} can't be planned")
+
+            path = prefix + tuple(field.source_attrs)
+            lookup = '__'.join(path)
+            if lookup in self.values_sources:
+                lookups, combine = self.values_sources[lookup]
+                self._lookups.extend(lookups)
+                item = _combined(itemgetter(*lookups), combine)
+            else:
+                # For a relation this is its primary key, which tells a missing object apart
+                self._lookups.append(lookup)
+                item = itemgetter(lookup)
+
+            attribute = attrgetter('.'.join(field.source_attrs))
+            if isinstance(field, relations.PrimaryKeyRelatedField) and field.pk_field is None:
+                # The primary key is already on the instance, so there's no need to load the related object
+                *parents, last = field.source_attrs
+                steps.append(_Step(name, attrgetter('.'.join(parents + [f'{last}_id'])), item, None, None))
+            elif isinstance(field, BaseSerializer):
+                steps.append(_Step(name, attribute, item, None, self._compile(field, path)))
+            else:
+                if isinstance(field, IDENTITY_FIELDS):
+                    convert = None
+                elif _is_iso_datetime(field):
+                    convert = ISO_DATETIME
+                else:
+                    convert = field.to_representation
+                steps.append(_Step(name, attribute, item, convert, None))
+        return steps
+
+    def _build_object(self, steps: List[_Step], instance, tz) -> dict:
+        data = {}
+        for name, attribute, _, convert, nested in steps:
+            value = attribute(instance)
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                data[name] = self._build_object(nested, value, tz)
+            elif convert is None:
+                data[name] = value
+            elif convert is ISO_DATETIME:
+                data[name] = ISO_DATETIME(value, tz)
+            else:
+                data[name] = convert(value)
+        return data
+
+    def build_objects(self, instances: Iterable) -> List[dict]:
+        steps, tz = self.steps, timezone.get_current_timezone()
+        return [self._build_object(steps, instance, tz) for instance in instances]
+
+    def _build_row(self, steps: List[_Step], row: dict, tz) -> dict:
+        data = {}
+        for name, _, item, convert, nested in steps:
+            value = item(row)
+            if value is None:
+                data[name] = None
+            elif nested is not None:
+                data[name] = self._build_row(nested, row, tz)
+            elif convert is None:
+                data[name] = value
+            elif convert is ISO_DATETIME:
+                data[name] = ISO_DATETIME(value, tz)
+            else:
+                data[name] = convert(value)
+        return data
+
+    def serialize(self, queryset: QuerySet) -> List[dict]:
+        """
+        Serializes `queryset` from a single `.values()` query, without creating model instances.
+        """
+        steps, tz = self.steps, timezone.get_current_timezone()
+        return [self._build_row(steps, row, tz) for row in queryset.values(*self.lookups)]
+
+
+def _post_body(inline_body: str, compressed: bool, data) -> str:
+    return zlib.decompress(data).decode('utf-8') if compressed else inline_body
+
+
+PLANS = {
+    serializers.PostSerializer: Plan(serializers.PostSerializer, {
+        'body': (('inline_body', 'body_compressed', 'stored_body__data'), _post_body)
+    }),
+    serializers.PostSummarySerializer: Plan(serializers.PostSummarySerializer),
+    serializers.UserSerializer: Plan(serializers.UserSerializer),
+    serializers.RelatedUserSerializer: Plan(serializers.RelatedUserSerializer),
+}
+
+
+def plan_for(serializer_class: type) -> Optional[Plan]:
+    return PLANS.get(serializer_class)
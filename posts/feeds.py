@@ -0,0 +1,217 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+
+from posts.models import FeedEntry, Follow, FriendGroupMember, Post, PostPermission, UserProfile
+from posts.pagination import Position, seek
+
+
+def is_pulled(author_id: int) -> bool:
+    return UserProfile.objects.filter(user_id=author_id, feed_pulled=True).exists()
+
+
+def set_pulled(author_id: int, pulled: bool):
+    """
+    Switches `author_id` between being pushed into follower feeds and being pulled at read time,
+    dropping or backfilling their feed entries to match.
+    """
+    with transaction.atomic():
+        if not UserProfile.objects.filter(user_id=author_id).exclude(feed_pulled=pulled).update(feed_pulled=pulled):
+            return
+
+        if pulled:
+            FeedEntry.objects.filter(author_id=author_id).delete()
+        else:
+            for reader_id in Follow.objects.filter(followee_id=author_id).values_list('follower_id', flat=True):
+                backfill(reader_id, author_id)
+
+
+def update_pull_statuses() -> int:
+    """
+    Pulls the pushed authors with more than `FEED_PULL_FOLLOWER_THRESHOLD` followers and pushes the
+    pulled ones with fewer than `FEED_PUSH_FOLLOWER_THRESHOLD`, returning how many were switched.
+
+    Switching back to push backfills every follower's feed, so this runs periodically rather than
+    when someone follows or unfollows.
+    """
+    switching = UserProfile.objects.filter(
+        Q(feed_pulled=False, follower_count__gt=settings.FEED_PULL_FOLLOWER_THRESHOLD)
+        | Q(feed_pulled=True, follower_count__lt=settings.FEED_PUSH_FOLLOWER_THRESHOLD)
+    ).values_list('user_id', 'feed_pulled')
+
+    switched = 0
+    for author_id, pulled in list(switching):
+        set_pulled(author_id, not pulled)
+        switched += 1
+    return switched
+
+
+def readers_of(post: Post) -> Iterable[int]:
+    """
+    IDs of the followers of `post`'s author who may see it.
+    Mirrors `PostQuerySet.visible_to`, but from the post's side.
+    """
+    followers = Follow.objects.filter(followee_id=post.author_id)
+
+    if post.visibility_type != 'public':
+        audience = Q(follower_id=post.author_id) | Q(
+            follower__in=PostPermission.objects.filter(post=post).values('user')
+        )
+        if post.visibility_type == 'all_friends':
+            audience |= Q(follower__in=Follow.objects.filter(follower_id=post.author_id).values('followee'))
+        elif post.visibility_type == 'friend_group':
+            audience |= Q(follower__in=FriendGroupMember.objects.filter(group_id=post.access_group_id).values('member'))
+        followers = followers.filter(audience)
+
+    return followers.values_list('follower_id', flat=True).distinct().iterator()
+
+
+def _write_entries(entries: Iterable[FeedEntry]):
+    batch: List[FeedEntry] = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= settings.FEED_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post: Post):
+    """
+    Writes `post` into the feed of every follower allowed to see it, replacing whatever
+    entries an earlier version of the post had.
+    """
+    with transaction.atomic():
+        FeedEntry.objects.filter(post=post).delete()
+        if is_pulled(post.author_id):
+            return
+        _write_entries(
+            FeedEntry(owner_id=reader_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at)
+            for reader_id in readers_of(post)
+        )
+
+
+def fan_out_created(posts: List[Post]):
+    """
+    Writes newly created `posts` into their readers' feeds in one pass. New posts have no
+    entries to replace and no permissions yet, so posts sharing an author and audience share readers.
+    """
+    pulled = set(UserProfile.objects.filter(
+        user_id__in={post.author_id for post in posts}, feed_pulled=True
+    ).values_list('user_id', flat=True))
+    readers: Dict[Tuple[int, str, Optional[int]], List[int]] = {}
+
+    def entries():
+        for post in posts:
+            if post.author_id in pulled:
+                continue
+            audience = (post.author_id, post.visibility_type, post.access_group_id)
+            if audience not in readers:
+                readers[audience] = list(readers_of(post))
+            for reader_id in readers[audience]:
+                yield FeedEntry(
+                    owner_id=reader_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at
+                )
+
+    _write_entries(entries())
+
+
+def backfill(reader_id: int, author_id: int):
+    """
+    Rebuilds the part of `reader_id`'s feed that comes from `author_id`. Called whenever
+    something may have let the reader see more of the author's posts.
+
+    Only the most recent `FEED_BACKFILL_LIMIT` posts are written back, and nothing is
+    written for pulled authors.
+    """
+    with transaction.atomic():
+        FeedEntry.objects.filter(owner_id=reader_id, author_id=author_id).delete()
+
+        if not Follow.objects.filter(follower_id=reader_id, followee_id=author_id).exists():
+            return
+        if is_pulled(author_id):
+            return
+
+        posts = seek(
+            Post.objects.filter(author_id=author_id).visible_to(reader_id), None, ('created_at', 'id')
+        ).values_list('id', 'created_at')[:settings.FEED_BACKFILL_LIMIT]
+
+        _write_entries(
+            FeedEntry(owner_id=reader_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, created_at in posts
+        )
+
+
+def prune(reader_id: int, author_id: int):
+    """
+    Removes the entries from `author_id` that `reader_id` may no longer see. Called whenever
+    something may have hidden some of the author's posts from the reader.
+
+    This only ever deletes, so it is safe to run from `post_delete` handlers in the middle of a cascade.
+    """
+    entries = FeedEntry.objects.filter(owner_id=reader_id, author_id=author_id)
+
+    if Follow.objects.filter(follower_id=reader_id, followee_id=author_id).exists():
+        entries = entries.exclude(
+            post__in=Post.objects.filter(author_id=author_id).visible_to(reader_id).values('pk')
+        )
+    entries.delete()
+
+
+def rebuild(reader: User):
+    """
+    Rebuilds `reader`'s whole feed from scratch.
+    """
+    with transaction.atomic():
+        FeedEntry.objects.filter(owner=reader).delete()
+        for author_id in Follow.objects.filter(follower=reader).values_list('followee_id', flat=True).distinct():
+            backfill(reader.pk, author_id)
+
+
+def _pushed(reader: User, position: Optional[Position], limit: int, lookups: Dict[str, Any]) -> List[Post]:
+    entries = seek(
+        FeedEntry.objects.filter(owner=reader, **{f'post__{lookup}': value for lookup, value in lookups.items()}),
+        position, ('created_at', 'post_id')
+    ).select_related('post__author').defer('post__inline_body')[:limit]
+    return [entry.post for entry in entries]
+
+
+def _pulled(reader: User, position: Optional[Position], limit: int, lookups: Dict[str, Any]) -> List[Post]:
+    authors = Follow.objects.filter(follower=reader, followee__profile__feed_pulled=True).values('followee')
+    posts = seek(
+        Post.objects.filter(author__in=authors, **lookups).visible_to(reader), position, ('created_at', 'id')
+    ).select_related('author').defer('inline_body')[:limit]
+    return list(posts)
+
+
+def read(
+    reader: User, position: Optional[Position], limit: int, lookups: Optional[Dict[str, Any]] = None
+) -> List[Post]:
+    """
+    One page of `reader`'s feed, newest first, starting after `position`, narrowed down by
+    `lookups` on the posts' fields.
+
+    Posts from pushed authors come from the reader's feed entries and posts from pulled
+    authors are queried directly. Both streams are already ordered on `(created_at, id)`,
+    so they are merged lazily and only until the page is full.
+    """
+    lookups = lookups or {}
+    streams = [_pushed(reader, position, limit, lookups), _pulled(reader, position, limit, lookups)]
+    merged = heapq.merge(*streams, key=lambda post: (post.created_at, post.pk), reverse=True)
+
+    page: List[Post] = []
+    seen = set()
+    for post in merged:
+        # An author switching between pushed and pulled can briefly show up in both streams
+        if post.pk in seen:
+            continue
+        seen.add(post.pk)
+        page.append(post)
+        if len(page) == limit:
+            break
+    return page
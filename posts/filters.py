@@ -1,3 +1,5 @@
+from typing import Any, Dict
+
 import django_filters.rest_framework
 from posts.models import Post
 
@@ -19,3 +21,12 @@ class PostFilterSet(django_filters.rest_framework.FilterSet):
             'created_at': ['lt', 'gt'],
             'last_modified': ['lt', 'gt'],
         }
+
+    def lookups(self) -> Dict[str, Any]:
+        """
+        The validated filters as field lookups, for querying something other than `queryset` by them.
+        """
+        return {
+            f'{self.filters[name].field_name}__{self.filters[name].lookup_expr}': value
+            for name, value in self.form.cleaned_data.items() if value is not None
+        }
@@ -0,0 +1,48 @@
+from typing import Iterable, Optional
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from posts.models import Follow, UserProfile
+
+
+def count_follow(follower_id: int, followee_id: int, delta: int):
+    """
+    Moves both sides' counters by `delta` in place, so concurrent follows can't lose updates.
+    Only ever updates, so it is safe to run in the middle of a cascade deleting either user.
+    """
+    now = timezone.now()
+    UserProfile.objects.filter(user_id=follower_id).update(
+        following_count=Greatest(F('following_count') + delta, 0), last_modified=now
+    )
+    UserProfile.objects.filter(user_id=followee_id).update(
+        follower_count=Greatest(F('follower_count') + delta, 0), last_modified=now
+    )
+
+
+def _count(field: str):
+    follows = Follow.objects.filter(**{field: OuterRef('user')}).order_by().values(field).annotate(count=Count('pk'))
+    return Coalesce(Subquery(follows.values('count')), 0)
+
+
+def reconcile(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recounts follows for the profiles whose counters have drifted. Returns how many were corrected.
+    """
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+
+    drifted = (profiles
+               .annotate(followers=_count('followee'), following=_count('follower'))
+               .exclude(follower_count=F('followers'), following_count=F('following'))
+               .values_list('pk', 'followers', 'following'))
+
+    corrected = 0
+    for pk, followers, following in drifted.iterator():
+        UserProfile.objects.filter(pk=pk).update(
+            follower_count=followers, following_count=following, last_modified=timezone.now()
+        )
+        corrected += 1
+    return corrected
@@ -0,0 +1,144 @@
+import threading
+import uuid
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import Q
+
+from posts.models import Follow
+
+
+class IdSet:
+    """
+    A read-only set of user IDs kept as a sorted array, which takes about a sixth of the memory of a `set`.
+    """
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids: Iterable[int]):
+        self._ids = array('q', sorted(set(ids)))
+
+    def __contains__(self, user_id: int) -> bool:
+        index = bisect_left(self._ids, user_id)
+        return index < len(self._ids) and self._ids[index] == user_id
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+# Per process, by user ID: the shared version an entry was loaded at and the user's (following, followers).
+# Least recently used first.
+_entries: 'OrderedDict[int, Tuple[str, IdSet, IdSet]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def _shared():
+    return caches[settings.FOLLOW_GRAPH_CACHE_ALIAS]
+
+
+def _key(user_id: int) -> str:
+    return f'follow-graph:{user_id}'
+
+
+def _load(user_ids: Iterable[int]) -> Dict[int, Tuple[IdSet, IdSet]]:
+    user_ids = list(user_ids)
+    following = defaultdict(list)
+    followers = defaultdict(list)
+    pairs = Follow.objects.filter(Q(follower__in=user_ids) | Q(followee__in=user_ids)).order_by()
+    for follower_id, followee_id in pairs.values_list('follower_id', 'followee_id').iterator():
+        following[follower_id].append(followee_id)
+        followers[followee_id].append(follower_id)
+    return {user_id: (IdSet(following[user_id]), IdSet(followers[user_id])) for user_id in user_ids}
+
+
+def neighbours(user_ids: Iterable[int]) -> Dict[int, Tuple[IdSet, IdSet]]:
+    """
+    Who each of `user_ids` follows and is followed by, as `(following, followers)`.
+
+    Entries are kept in this process and checked against a version per user in the shared cache,
+    which `Follow` signals change once their transaction commits, so a read costs one `get_many`
+    when nothing changed. Anything stale or missing is loaded together in one query.
+
+    Reads inside a transaction go straight to the database and aren't kept, since they may see
+    follows that are about to be rolled back.
+    """
+    user_ids = set(user_ids)
+    if connection.in_atomic_block:
+        return _load(user_ids)
+
+    cache = _shared()
+    # Versions are read before loading, so a change committed in between is caught by the next read
+    versions = cache.get_many([_key(user_id) for user_id in user_ids])
+    found = {}
+    with _lock:
+        for user_id in user_ids:
+            entry = _entries.get(user_id)
+            if entry is not None and entry[0] == versions.get(_key(user_id)):
+                _entries.move_to_end(user_id)
+                found[user_id] = entry[1:]
+
+    stale = user_ids - found.keys()
+    if not stale:
+        return found
+
+    # Users without a version get one, so entries always have something to be checked against
+    unversioned = [_key(user_id) for user_id in stale if _key(user_id) not in versions]
+    if unversioned:
+        for key in unversioned:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+        versions.update(cache.get_many(unversioned))
+
+    loaded = _load(stale)
+    with _lock:
+        for user_id, sets in loaded.items():
+            version = versions.get(_key(user_id))
+            if version is not None:
+                _entries[user_id] = (version, *sets)
+                _entries.move_to_end(user_id)
+        while len(_entries) > settings.FOLLOW_GRAPH_MAX_USERS:
+            _entries.popitem(last=False)
+
+    found.update(loaded)
+    return found
+
+
+def following(user_id: int) -> IdSet:
+    return neighbours([user_id])[user_id][0]
+
+
+def followers(user_id: int) -> IdSet:
+    return neighbours([user_id])[user_id][1]
+
+
+def _forget(user_ids: Iterable[int]):
+    with _lock:
+        for user_id in user_ids:
+            _entries.pop(user_id, None)
+
+
+def invalidate(user_ids: Iterable[int]):
+    """
+    Drops `user_ids` from this process now, and from every process once the current transaction commits.
+    """
+    user_ids = list(user_ids)
+    _forget(user_ids)
+
+    def publish():
+        _forget(user_ids)
+        _shared().set_many({_key(user_id): uuid.uuid4().hex for user_id in user_ids}, timeout=None)
+    transaction.on_commit(publish)
+
+
+def clear():
+    """
+    Drops every entry kept by this process.
+    """
+    with _lock:
+        _entries.clear()
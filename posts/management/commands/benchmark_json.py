@@ -0,0 +1,70 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import parsers, renderers
+
+from posts import parsers as posts_parsers
+from posts import renderers as posts_renderers
+from posts.utils import fastjson
+
+
+def _user(i):
+    return {'id': i, 'username': f'user-{i}'}
+
+
+def _payloads():
+    now = timezone.now().isoformat()
+    paragraph = 'Dear diary, today was a day much like the others — café, bus, work, home. ' * 4 + '\n\n'
+    return {
+        '1 MB post': {
+            'id': 1, 'author': _user(1), 'created_at': now, 'title': 'A long entry',
+            'body': paragraph * (1024 * 1024 // len(paragraph)), 'last_modified': now
+        },
+        'page of 200 summaries': [
+            {
+                'id': i, 'author': _user(i), 'created_at': now, 'title': f'Entry {i}',
+                'excerpt': paragraph[:280], 'word_count': 450, 'reading_time': 3, 'last_modified': now
+            } for i in range(200)
+        ],
+        '5000 follows': [_user(i) for i in range(5000)],
+    }
+
+
+class Command(BaseCommand):
+    help = "Compares throughput of DRF's JSON renderer and parser against the orjson based ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=50)
+
+    def handle(self, *args, rounds, **options):
+        if fastjson.orjson is None:
+            self.stdout.write('orjson is not installed, so both sides use the standard library')
+
+        for name, payload in _payloads().items():
+            encoded = renderers.JSONRenderer().render(payload)
+            megabytes = len(encoded) / (1024 * 1024)
+
+            render = [
+                self.time(rounds, lambda: renderer.render(payload))
+                for renderer in (renderers.JSONRenderer(), posts_renderers.JSONRenderer())
+            ]
+            parse = [
+                self.time(rounds, lambda: parser.parse(io.BytesIO(encoded), 'application/json', {}))
+                for parser in (parsers.JSONParser(), posts_parsers.JSONParser())
+            ]
+
+            self.stdout.write(
+                f'{name} ({len(encoded)} bytes): '
+                f'render {megabytes / render[0]:.0f} -> {megabytes / render[1]:.0f} MB/s '
+                f'({render[0] / render[1]:.1f}x), '
+                f'parse {megabytes / parse[0]:.0f} -> {megabytes / parse[1]:.0f} MB/s '
+                f'({parse[0] / parse[1]:.1f}x)'
+            )
+
+    def time(self, rounds, work) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            work()
+        return (time.perf_counter() - started) / rounds
@@ -0,0 +1,63 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import fastpath
+from posts.models import Post
+from posts.serializers import PostSerializer, PostSummarySerializer, UserSerializer
+
+
+class Command(BaseCommand):
+    help = 'Times the DRF serializers for posts and users against their fast-path plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Seeded rows are rolled back at the end, as in benchmark_timeline
+        with transaction.atomic():
+            self.seed(options)
+            self.measure('PostSerializer', PostSerializer, Post.objects.select_related('author'), options)
+            self.measure(
+                'PostSummarySerializer', PostSummarySerializer,
+                Post.objects.select_related('author').defer('inline_body'), options
+            )
+            self.measure('UserSerializer', UserSerializer, User.objects.all(), options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        authors = User.objects.bulk_create(
+            [User(username=f'benchmark-author-{i}') for i in range(options['authors'])]
+        )
+        Post.objects.bulk_create_posts([
+            Post(author=authors[i % len(authors)], title=f'benchmark {i}', body='benchmark body ' * 40,
+                 visibility_type='public')
+            for i in range(options['posts'])
+        ])
+
+    def time(self, rounds, work):
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            work()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return timings[len(timings) // 2]
+
+    def measure(self, name, serializer_class, queryset, options):
+        plan = fastpath.plan_for(serializer_class)
+        rounds = options['rounds']
+
+        serializer = self.time(rounds, lambda: serializer_class(list(queryset), many=True).data)
+        objects = self.time(rounds, lambda: plan.build_objects(list(queryset)))
+        values = self.time(rounds, lambda: plan.serialize(queryset))
+
+        self.stdout.write(
+            f'{name}: serializer {serializer:.1f}ms, '
+            f'plan over instances {objects:.1f}ms ({serializer / objects:.1f}x), '
+            f'plan over values {values:.1f}ms ({serializer / values:.1f}x)'
+        )
@@ -0,0 +1,100 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.models import Follow, FriendGroup, FriendGroupMember, Post
+from posts.pagination import seek
+
+VISIBILITY_TYPES = ['public', 'private', 'all_friends', 'friend_group']
+
+
+class Command(BaseCommand):
+    help = 'Seeds a throwaway social graph and times the home timeline query against it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--authors', type=int, default=20000)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--pages', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        # Everything happens in one transaction that is rolled back at the end,
+        # so this can be pointed at a development database without leaving anything behind.
+        with transaction.atomic():
+            viewer = self.seed(options)
+            self.measure(viewer, options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        viewer = User.objects.create(username='benchmark-viewer')
+        authors = User.objects.bulk_create(
+            [User(username=f'benchmark-author-{i}') for i in range(options['authors'])], batch_size=batch_size
+        )
+
+        followed = random.sample(authors, min(options['follows'], len(authors)))
+        Follow.objects.bulk_create(
+            [Follow(follower=viewer, followee=author) for author in followed], batch_size=batch_size
+        )
+        # A tenth of the authors consider the viewer a friend, and put them in one of their groups.
+        friends = followed[:len(followed) // 10]
+        Follow.objects.bulk_create(
+            [Follow(follower=author, followee=viewer) for author in friends], batch_size=batch_size
+        )
+        groups = FriendGroup.objects.bulk_create(
+            [FriendGroup(owner=author, name='benchmark') for author in friends], batch_size=batch_size
+        )
+        FriendGroupMember.objects.bulk_create(
+            [FriendGroupMember(group=group, member=viewer) for group in groups], batch_size=batch_size
+        )
+        groups_by_owner = {group.owner_id: group for group in groups}
+
+        remaining = options['posts']
+        while remaining:
+            count = min(remaining, batch_size)
+            batch = []
+            for _ in range(count):
+                author = random.choice(authors)
+                batch.append(Post(
+                    author=author,
+                    title='benchmark',
+                    body='benchmark',
+                    visibility_type=random.choice(VISIBILITY_TYPES),
+                    access_group=groups_by_owner.get(author.pk)
+                ))
+            Post.objects.bulk_create(batch)
+            remaining -= count
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self.stdout.write(f'Seeded {options["posts"]} posts and {len(followed)} follows '
+                          f'in {time.perf_counter() - started:.1f}s')
+        return viewer
+
+    def measure(self, viewer, options):
+        page_size = options['page_size']
+        queryset = Post.objects.timeline_for(viewer)
+
+        position = None
+        timings = []
+        for _ in range(options['pages']):
+            started = time.perf_counter()
+            page = list(seek(queryset, position, ('created_at', 'id'))[:page_size])
+            timings.append((time.perf_counter() - started) * 1000)
+            if not page:
+                break
+            position = (page[-1].created_at, page[-1].id)
+
+        timings.sort()
+        self.stdout.write(f'{len(timings)} pages of {page_size}: '
+                          f'median {timings[len(timings) // 2]:.1f}ms, max {timings[-1]:.1f}ms')
+
+        self.stdout.write(seek(queryset, position, ('created_at', 'id'))[:page_size].explain(analyze=True))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Func, IntegerField
+
+from posts.models import Post, PostBody
+
+
+class OctetLength(Func):
+    function = 'OCTET_LENGTH'
+    output_field = IntegerField()
+
+
+class Command(BaseCommand):
+    help = 'Moves post bodies over POST_BODY_COMPRESSION_THRESHOLD bytes into compressed out-of-row storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        candidates = Post.objects.annotate(
+            body_bytes=OctetLength('inline_body')
+        ).filter(
+            body_compressed=False, body_bytes__gt=settings.POST_BODY_COMPRESSION_THRESHOLD
+        ).order_by('pk')
+        # Locked until written back, so an edit made in the meantime isn't overwritten with the old body
+        locked = candidates.select_for_update().only('pk', 'inline_body')
+
+        moved = 0
+        bytes_before = 0
+        bytes_after = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(locked.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+
+                bodies = [PostBody(post=post, **PostBody.compress(post.inline_body)) for post in batch]
+                for post in batch:
+                    post.inline_body = ''
+                    post.body_compressed = True
+
+                # bulk_update leaves last_modified alone, so clients don't see the posts as edited
+                PostBody.objects.bulk_create(bodies)
+                Post.objects.bulk_update(batch, ['inline_body', 'body_compressed'])
+
+            moved += len(batch)
+            bytes_before += sum(body.size for body in bodies)
+            bytes_after += sum(len(body.data) for body in bodies)
+            self.stdout.write(f'Compressed {moved} bodies')
+
+        saved = bytes_before - bytes_after
+        self.stdout.write(
+            f'Compressed {moved} bodies from {bytes_before} to {bytes_after} bytes, saving {saved} bytes'
+        )
@@ -0,0 +1,26 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from posts import feeds
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds materialized home timelines, for every user or just the ones named'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+
+    def handle(self, *args, usernames, **options):
+        users = User.objects.all()
+        if usernames:
+            users = users.filter(username__in=usernames)
+
+        # Pull status depends on the follower thresholds, which may have changed since it was last computed
+        feeds.update_pull_statuses()
+
+        count = 0
+        for user in users.iterator():
+            feeds.rebuild(user)
+            count += 1
+
+        self.stdout.write(f'Rebuilt {count} feeds')
@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from posts import follows
+
+
+class Command(BaseCommand):
+    help = 'Recounts follower and following counts, for everyone or for the given users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+
+    def handle(self, *args, usernames, **options):
+        user_ids = None
+        if usernames:
+            user_ids = list(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
+
+        corrected = follows.reconcile(user_ids)
+        self.stdout.write(f'Corrected follow counts for {corrected} users')
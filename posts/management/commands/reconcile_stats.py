@@ -0,0 +1,30 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from posts import stats
+from posts.models import UserStats
+
+FIELDS = ('post_count', 'word_count', 'last_post_date', 'current_streak', 'longest_streak')
+
+
+class Command(BaseCommand):
+    help = 'Recomputes user stats from their posts, for everyone or for the given users'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*')
+
+    def handle(self, *args, usernames, **options):
+        users = User.objects.all()
+        if usernames:
+            users = users.filter(username__in=usernames)
+
+        checked = 0
+        corrected = 0
+        for user_id in users.order_by('pk').values_list('pk', flat=True).iterator():
+            before = UserStats.objects.filter(user_id=user_id).values(*FIELDS).first()
+            after = stats.reconcile(user_id)
+            if before != {field: getattr(after, field) for field in FIELDS}:
+                corrected += 1
+            checked += 1
+
+        self.stdout.write(f'Reconciled stats for {checked} users, {corrected} were out of date')
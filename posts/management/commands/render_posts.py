@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from posts import rendering
+from posts.models import Post
+from posts.utils import markup
+
+
+class Command(BaseCommand):
+    help = 'Renders every post without a current HTML rendering, e.g. after the renderer version changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        stale = Post.objects.filter(
+            Q(rendering__isnull=True)
+            | ~Q(rendering__renderer_version=markup.VERSION)
+            | ~Q(rendering__source_modified=F('last_modified'))
+        ).select_related('rendering').order_by('pk')
+
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(stale.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            rendered += rendering.render_stale(batch)
+            self.stdout.write(f'Rendered {rendered} posts')
+
+        self.stdout.write(f'Rendered {rendered} posts')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import feeds
+
+
+class Command(BaseCommand):
+    help = 'Switches authors whose follower counts crossed the thresholds between pushed and pulled feeds'
+
+    def handle(self, *args, **options):
+        switched = feeds.update_pull_statuses()
+        self.stdout.write(f'Switched {switched} authors')
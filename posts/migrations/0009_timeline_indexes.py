@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', 'followee'], name='follow_follower_followee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendgroupmember',
+            index=models.Index(fields=['group', 'member'], name='groupmember_group_member_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postpermission',
+            index=models.Index(fields=['post', 'user'], name='postpermission_post_user_idx'),
+        ),
+    ]
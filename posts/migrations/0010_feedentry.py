@@ -0,0 +1,88 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Mirrors `feeds.backfill` for every follow at once, as the feed code itself may not match these models
+BACKFILL = """
+INSERT INTO {feedentry} (owner_id, author_id, post_id, created_at)
+SELECT owner_id, author_id, post_id, created_at FROM (
+    SELECT follows.follower_id AS owner_id, post.author_id, post.id AS post_id, post.created_at,
+           row_number() OVER (
+               PARTITION BY follows.follower_id, post.author_id ORDER BY post.created_at DESC, post.id DESC
+           ) AS recency
+    FROM (
+        SELECT DISTINCT follower_id, followee_id FROM {follow} WHERE follower_id = ANY(%s)
+    ) AS follows
+    JOIN {post} AS post ON post.author_id = follows.followee_id
+    WHERE post.author_id = follows.follower_id
+        OR post.visibility_type = 'public'
+        OR (post.visibility_type = 'all_friends' AND EXISTS (
+            SELECT 1 FROM {follow} WHERE follower_id = post.author_id AND followee_id = follows.follower_id
+        ))
+        OR (post.visibility_type = 'friend_group' AND EXISTS (
+            SELECT 1 FROM {member} WHERE group_id = post.access_group_id AND member_id = follows.follower_id
+        ))
+        OR EXISTS (SELECT 1 FROM {permission} WHERE post_id = post.id AND user_id = follows.follower_id)
+) AS visible
+WHERE recency <= %s
+ON CONFLICT DO NOTHING
+"""
+
+
+def backfill_feeds(apps, schema_editor):
+    # Otherwise every timeline is empty after deploying until `rebuild_feeds` has run
+    def table(name):
+        return apps.get_model('posts', name)._meta.db_table
+
+    Follow = apps.get_model('posts', 'Follow')
+    sql = BACKFILL.format(
+        feedentry=table('FeedEntry'), follow=table('Follow'), post=table('Post'),
+        member=table('FriendGroupMember'), permission=table('PostPermission')
+    )
+
+    followers = Follow.objects.order_by('follower_id').values_list('follower_id', flat=True).distinct()
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for follower_id in followers.iterator():
+            batch.append(follower_id)
+            if len(batch) >= settings.FEED_BATCH_SIZE:
+                cursor.execute(sql, [batch, settings.FEED_BACKFILL_LIMIT])
+                batch = []
+        if batch:
+            cursor.execute(sql, [batch, settings.FEED_BACKFILL_LIMIT])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['owner', 'created_at', 'post'], name='feedentry_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['owner', 'author'], name='feedentry_owner_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('owner', 'post'), name='feedentry_owner_post_unique'),
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
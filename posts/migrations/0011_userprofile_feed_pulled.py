@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='feed_pulled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+from posts.utils import text
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+
+    batch = []
+    for post in Post.objects.only('id', 'body').iterator(chunk_size=500):
+        post.excerpt = text.excerpt(post.body, settings.POST_EXCERPT_LENGTH)
+        post.word_count = text.word_count(post.body)
+        post.reading_time = text.reading_time(post.word_count)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+            batch = []
+    Post.objects.bulk_update(batch, ['excerpt', 'word_count', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_userprofile_feed_pulled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, default='', max_length=1024),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_excerpt'),
+    ]
+
+    operations = [
+        # `body` becomes a property, and the column it used to map to keeps its name
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RenameField(
+                    model_name='post',
+                    old_name='body',
+                    new_name='inline_body',
+                ),
+                migrations.AlterField(
+                    model_name='post',
+                    name='inline_body',
+                    field=models.CharField(blank=True, db_column='body', max_length=1048576),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='body_compressed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='PostBody',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stored_body', serialize=False, to='posts.Post')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:35
+
+import zlib
+
+from django.conf import settings
+from django.db import migrations
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+
+
+def fill_search_vectors(apps, schema_editor):
+    PostBody = apps.get_model('posts', 'PostBody')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE posts_post SET search_vector = "
+            "setweight(to_tsvector(%s::regconfig, title), 'A') || setweight(to_tsvector(%s::regconfig, body), 'B')",
+            [settings.POST_SEARCH_CONFIG, settings.POST_SEARCH_CONFIG]
+        )
+
+        # Compressed bodies have to be decompressed here, their column is empty
+        for stored in PostBody.objects.iterator(chunk_size=100):
+            cursor.execute(
+                "UPDATE posts_post SET search_vector = "
+                "setweight(to_tsvector(%s::regconfig, title), 'A') || setweight(to_tsvector(%s::regconfig, %s), 'B') "
+                "WHERE id = %s",
+                [settings.POST_SEARCH_CONFIG, settings.POST_SEARCH_CONFIG,
+                 zlib.decompress(stored.data).decode('utf-8'), stored.post_id]
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_posttombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
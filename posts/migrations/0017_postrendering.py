@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_author_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRendering',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rendering', serialize=False, to='posts.post')),
+                ('html', models.TextField()),
+                ('source_modified', models.DateTimeField()),
+                ('renderer_version', models.PositiveSmallIntegerField()),
+            ],
+        ),
+    ]
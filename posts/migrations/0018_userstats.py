@@ -0,0 +1,46 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:53
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+from posts.utils.streaks import streaks
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+
+    users = User.objects.annotate(posts=Count('post'), words=Sum('post__word_count'))
+    for user in users.iterator(chunk_size=500):
+        days = list(Post.objects.filter(author=user).dates('created_at', 'day'))
+        current, longest = streaks(days)
+        UserStats.objects.create(
+            user=user, post_count=user.posts, word_count=user.words or 0,
+            last_post_date=days[-1] if days else None, current_streak=current, longest_streak=longest
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0017_postrendering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='auth.user')),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('word_count', models.PositiveIntegerField(default=0)),
+                ('last_post_date', models.DateField(null=True)),
+                ('current_streak', models.PositiveIntegerField(default=0)),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
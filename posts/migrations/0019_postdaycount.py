@@ -0,0 +1,47 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:56
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def fill_day_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostDayCount = apps.get_model('posts', 'PostDayCount')
+
+    # TruncDate converts to the current time zone, which is TIME_ZONE here
+    rows = (Post.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('author_id', 'day')
+            .annotate(count=Count('pk'), public_count=Count('pk', filter=Q(visibility_type='public')))
+            .order_by())
+    PostDayCount.objects.bulk_create((PostDayCount(**row) for row in rows.iterator()), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_userstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDayCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('last_modified', models.DateTimeField(auto_now=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('public_count', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='postdaycount',
+            constraint=models.UniqueConstraint(fields=('author', 'day'), name='postdaycount_author_day_unique'),
+        ),
+        migrations.RunPython(fill_day_counts, migrations.RunPython.noop),
+    ]
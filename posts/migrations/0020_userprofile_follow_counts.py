@@ -0,0 +1,37 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_follow_counts(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserProfile = apps.get_model('posts', 'UserProfile')
+
+    def count(field):
+        follows = Follow.objects.filter(**{field: OuterRef('user')}).order_by().values(field).annotate(count=Count('pk'))
+        return Coalesce(Subquery(follows.values('count')), 0)
+
+    UserProfile.objects.update(follower_count=count('followee'), following_count=count('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_postdaycount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_follow_counts, migrations.RunPython.noop),
+    ]
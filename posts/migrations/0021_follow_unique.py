@@ -0,0 +1,45 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:02
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_follows(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    UserProfile = apps.get_model('posts', 'UserProfile')
+
+    # Keeps the oldest of each pair
+    duplicated = (Follow.objects.values('follower_id', 'followee_id')
+                  .annotate(kept=Min('pk'), count=Count('pk'))
+                  .filter(count__gt=1)
+                  .order_by())
+    for pair in duplicated.iterator():
+        Follow.objects.filter(follower_id=pair['follower_id'], followee_id=pair['followee_id']) \
+            .exclude(pk=pair['kept']).delete()
+
+    def count(field):
+        follows = Follow.objects.filter(**{field: OuterRef('user')}).order_by().values(field).annotate(count=Count('pk'))
+        return Coalesce(Subquery(follows.values('count')), 0)
+
+    UserProfile.objects.update(follower_count=count('followee'), following_count=count('follower'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_userprofile_follow_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_follows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('follower', 'followee'), name='follow_follower_followee_unique'),
+        ),
+        # The unique constraint's index covers the same lookups
+        migrations.RemoveIndex(
+            model_name='follow',
+            name='follow_follower_followee_idx',
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:22
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_visibility(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    # Posts made through the API before it took a visibility were stored without one, which no
+    # rule lets anyone but the author see. Touching last_modified sends them to syncing clients
+    # again. Run rebuild_feeds afterwards to put them in followers' timelines.
+    Post.objects.filter(visibility_type='').update(visibility_type='all_friends', last_modified=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_follow_unique'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='visibility_type',
+            field=models.CharField(choices=[('public', 'Public'), ('private', 'Private'), ('all_friends', 'All Friends'), ('friend_group', 'Friend Group')], default='all_friends', max_length=20),
+        ),
+        migrations.RunPython(fill_visibility, migrations.RunPython.noop),
+    ]
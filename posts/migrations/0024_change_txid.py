@@ -0,0 +1,81 @@
+# Generated by Django 3.1.14 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+# Existing posts keep a change_txid of 0 and sort by ID among themselves. Existing tombstones have no
+# author or visibility, so they aren't reported to anyone; clients that need them should sync from scratch.
+SET_CHANGE_TXID = """
+CREATE FUNCTION posts_set_change_txid() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        NEW.change_txid := txid_current();
+    ELSIF NEW.last_modified IS DISTINCT FROM OLD.last_modified THEN
+        NEW.change_txid := txid_current();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_post_change_txid BEFORE INSERT OR UPDATE ON posts_post
+    FOR EACH ROW EXECUTE PROCEDURE posts_set_change_txid();
+CREATE TRIGGER posts_posttombstone_change_txid BEFORE INSERT ON posts_posttombstone
+    FOR EACH ROW EXECUTE PROCEDURE posts_set_change_txid();
+"""
+
+DROP_CHANGE_TXID = """
+DROP TRIGGER posts_posttombstone_change_txid ON posts_posttombstone;
+DROP TRIGGER posts_post_change_txid ON posts_post;
+DROP FUNCTION posts_set_change_txid();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_post_visibility_default'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_last_modified_id_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='posttombstone',
+            name='posttombstone_deleted_id_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='change_txid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posttombstone',
+            name='access_group_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='posttombstone',
+            name='author_id',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='posttombstone',
+            name='change_txid',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='posttombstone',
+            name='visibility_type',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['change_txid', 'id'], name='post_change_txid_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='posttombstone',
+            index=models.Index(fields=['change_txid', 'id'], name='posttombstone_change_txid_idx'),
+        ),
+        migrations.RunSQL(SET_CHANGE_TXID, DROP_CHANGE_TXID),
+    ]
@@ -1,9 +1,22 @@
 import secrets
+import zlib
+from typing import List, Optional, Tuple, Union
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models import Exists, OuterRef, Q, Value
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from posts.utils import text
+
+
+# Sent by `PostQuerySet.bulk_create_posts` with the new `posts` in place of a `post_save` for each
+posts_created = Signal()
 
 
 def generate_registration_token():
@@ -22,6 +35,14 @@ class UserProfile(models.Model):
 
     bio = models.CharField(max_length=1024 * 10, blank=True, null=True)
 
+    # Set for authors with more than FEED_PULL_FOLLOWER_THRESHOLD followers. Their posts
+    # aren't copied into follower feeds and are merged in when a feed is read instead.
+    feed_pulled = models.BooleanField(default=False)
+
+    # Kept in step with `Follow` rows by signals, so showing them never needs a COUNT
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.user.username}'s profile"
 
@@ -32,8 +53,122 @@ def create_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
 
 
+class UserStats(models.Model):
+    """
+    Running totals over a user's posts, kept up to date as posts are written and deleted
+    so that profiles never have to aggregate over all of them.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='stats')
+
+    last_modified = models.DateTimeField(
+        auto_now=True
+    )
+
+    post_count = models.PositiveIntegerField(default=0)
+    word_count = models.PositiveIntegerField(default=0)
+
+    # Days are in TIME_ZONE. The current streak is the run of consecutive days with posts
+    # that ends on `last_post_date`, whether or not that was recent.
+    last_post_date = models.DateField(null=True)
+    current_streak = models.PositiveIntegerField(default=0)
+    longest_streak = models.PositiveIntegerField(default=0)
+
+
+class PostDayCount(models.Model):
+    """
+    How many posts an author wrote on each day, in TIME_ZONE, and how many of those are public.
+    Rows are upserted as posts come and go, and removed once a day has no posts left.
+    """
+    author = models.ForeignKey(User, null=False, on_delete=models.CASCADE, related_name='day_counts')
+    day = models.DateField(null=False)
+
+    last_modified = models.DateTimeField(
+        auto_now=True
+    )
+
+    count = models.PositiveIntegerField(default=0)
+    public_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['author', 'day'], name='postdaycount_author_day_unique')
+        ]
+
+
+class PostQuerySet(models.QuerySet):
+
+    def visible_to(self, viewer: Union[User, int]) -> 'PostQuerySet':
+        """
+        Posts `viewer` is allowed to read, decided in SQL.
+
+        `all_friends` posts are visible to the people their author follows,
+        `friend_group` posts to the members of their access group, and a `PostPermission`
+        grants access to a single post regardless of its visibility type.
+        """
+        is_friend = Follow.objects.filter(follower=OuterRef('author'), followee=viewer)
+        is_member = FriendGroupMember.objects.filter(group=OuterRef('access_group'), member=viewer)
+        is_granted = PostPermission.objects.filter(post=OuterRef('pk'), user=viewer)
+
+        return self.filter(
+            Q(author=viewer)
+            | Q(visibility_type='public')
+            | Q(Exists(is_friend), visibility_type='all_friends')
+            | Q(Exists(is_member), visibility_type='friend_group')
+            | Q(Exists(is_granted))
+        )
+
+    def timeline_for(self, viewer: Union[User, int]) -> 'PostQuerySet':
+        """
+        Posts `viewer` may see from the people they follow.
+        """
+        followees = Follow.objects.filter(follower=viewer).values('followee')
+        return self.filter(author__in=followees).visible_to(viewer)
+
+    def bulk_create_posts(self, posts: List['Post']) -> List['Post']:
+        """
+        `bulk_create` for new posts that also does what `Post.save` would: storing bodies and
+        deriving excerpts and search vectors. Instead of a `post_save` per post it sends
+        `posts_created` once, so receivers such as feed fan-out can handle the whole batch at a time.
+
+        Posts that already have a `created_at` keep it, for imports from elsewhere.
+        """
+        for post in posts:
+            post.store_body()
+        # bulk_create stamps every post with the current time, so given times are put back afterwards
+        created = [(post, post.created_at) for post in posts if post.created_at is not None]
+        posts = self.bulk_create(posts)
+        for post, created_at in created:
+            post.created_at = created_at
+        if created:
+            self.bulk_update([post for post, _ in created], ['created_at'])
+
+        PostBody.objects.bulk_create([
+            PostBody(post=post, **PostBody.compress(post.body)) for post in posts if post.body_compressed
+        ])
+
+        # Inline bodies can be indexed straight from their columns in one statement
+        config = settings.POST_SEARCH_CONFIG
+        self.filter(pk__in=[post.pk for post in posts if not post.body_compressed]).update(
+            search_vector=SearchVector('title', weight='A', config=config)
+            + SearchVector('inline_body', weight='B', config=config)
+        )
+
+        for post in posts:
+            # Compressed bodies only exist in Python, so these have to be sent over one at a time
+            if post.body_compressed:
+                post.update_search_vector()
+            post._body_changed = False
+            post.remember_loaded_values()
+
+        if posts:
+            posts_created.send(sender=Post, posts=posts, using=self.db)
+        return posts
+
+
 class Post(models.Model):
 
+    objects = PostQuerySet.as_manager()
+
     author = models.ForeignKey(
         User,
         null=False,
@@ -45,23 +180,41 @@ class Post(models.Model):
         auto_now=True
     )
 
+    # Set by a database trigger to the writing transaction's ID whenever a post is created or its
+    # last_modified changes, so syncs can follow commit order. See the `changes` endpoint.
+    change_txid = models.BigIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(
         auto_now_add=True
     )
 
     title = models.CharField(max_length=1024, blank=True, null=False)
 
-    body = models.CharField(max_length=1024 * 1024, blank=True, null=False)
+    # Bodies up to POST_BODY_COMPRESSION_THRESHOLD bytes are stored here. Longer ones are compressed
+    # into PostBody and this is left empty. Either way they are read and written through `body`.
+    inline_body = models.CharField(max_length=1024 * 1024, blank=True, null=False, db_column='body')
+    body_compressed = models.BooleanField(default=False)
+
+    # Derived from body whenever it changes, so list responses never have to load it
+    excerpt = models.CharField(max_length=1024, blank=True, null=False, default='')
+    word_count = models.PositiveIntegerField(null=False, default=0)
+    reading_time = models.PositiveIntegerField(null=False, default=0)
+
+    # Weighted title and body lexemes for full-text search, kept up to date by save()
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    VISIBILITY_TYPES = [
+        ('public', 'Public'),
+        ('private', 'Private'),
+        ('all_friends', 'All Friends'),
+        ('friend_group', 'Friend Group')]
 
     visibility_type = models.CharField(
         max_length=20,
-        choices=[
-            ('public', 'Public'),
-            ('private', 'Private'),
-            ('all_friends', 'All Friends'),
-            ('friend_group', 'Friend Group')],
+        choices=VISIBILITY_TYPES,
         null=False,
-        blank=False
+        blank=False,
+        default='all_friends'
     )
 
     access_group = models.ForeignKey(
@@ -71,9 +224,240 @@ class Post(models.Model):
         on_delete=models.SET_NULL
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='post_created_at_id_idx'),
+            models.Index(fields=['change_txid', 'id'], name='post_change_txid_id_idx'),
+            models.Index(fields=['author', '-created_at', '-id'], name='post_author_created_id_idx'),
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx')
+        ]
+
     def __str__(self):
         return f"Post by {self.author.username}: '{self.title[0:20]}'"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    _body: Optional[str] = None
+    _body_changed = False
+
+    @property
+    def body(self) -> str:
+        """
+        The post's text. Compressed bodies are loaded and decompressed on first access.
+        """
+        if self._body is None:
+            self._body = self.stored_body.text() if self.body_compressed else self.inline_body
+        return self._body
+
+    @body.setter
+    def body(self, value: str):
+        # Writing back the body already stored isn't a change, so it can't force a rewrite
+        if self.pk is not None and value == self.body:
+            return
+        self._body = value
+        self._body_changed = True
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._body = None
+        self._state.fields_cache.pop('stored_body', None)
+
+    def save(self, *args, **kwargs):
+        body_changed = self._body_changed
+        text_changed = body_changed or self.has_changed('title')
+        was_compressed = self.body_compressed
+
+        if body_changed:
+            self.store_body()
+
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.BODY_FIELDS} - {'body'}
+
+        super().save(*args, **kwargs)
+
+        if body_changed:
+            if self.body_compressed:
+                PostBody.objects.update_or_create(post=self, defaults=PostBody.compress(self.body))
+            elif was_compressed:
+                PostBody.objects.filter(post=self).delete()
+            self._body_changed = False
+
+        if text_changed:
+            self.update_search_vector()
+
+        self.remember_loaded_values()
+
+    BODY_FIELDS = ('inline_body', 'body_compressed', 'excerpt', 'word_count', 'reading_time')
+
+    def store_body(self):
+        """
+        Decides where `body` is stored and updates the fields derived from it, ahead of a write.
+        """
+        self.body_compressed = len(self.body.encode('utf-8')) > settings.POST_BODY_COMPRESSION_THRESHOLD
+        self.inline_body = '' if self.body_compressed else self.body
+        self.update_excerpt()
+
+    def remember_loaded_values(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in deferred
+        }
+
+    def update_excerpt(self):
+        self.excerpt = text.excerpt(self.body, settings.POST_EXCERPT_LENGTH)
+        self.word_count = text.word_count(self.body)
+        self.reading_time = text.reading_time(self.word_count)
+
+    def update_search_vector(self):
+        """
+        Recomputes the stored search vector from the text in hand rather than from columns,
+        since compressed bodies aren't readable from SQL.
+        """
+        config = settings.POST_SEARCH_CONFIG
+        title = Value(self.title, output_field=models.TextField())
+        body = Value(self.body, output_field=models.TextField())
+        Post.objects.filter(pk=self.pk).update(
+            search_vector=SearchVector(title, weight='A', config=config) + SearchVector(body, weight='B', config=config)
+        )
+
+    def has_unsaved_changes(self) -> bool:
+        """
+        Whether saving would write anything besides a new `last_modified`.
+        """
+        return self._body_changed or self.has_changed(*(
+            field.attname for field in self._meta.concrete_fields if field.attname != 'last_modified'
+        ))
+
+    def has_changed(self, *fields: str) -> bool:
+        """
+        Whether any of `fields` (by attname) differ from the values last loaded from or saved to the database.
+        Always true for posts that haven't been saved yet.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        return any(field in loaded and loaded[field] != getattr(self, field) for field in fields)
+
+
+class PostBody(models.Model):
+    """
+    zlib-compressed body of a post longer than POST_BODY_COMPRESSION_THRESHOLD bytes, kept out
+    of posts_post so that scans over posts don't have to carry it.
+    """
+    post = models.OneToOneField(Post, primary_key=True, on_delete=models.CASCADE, related_name='stored_body')
+
+    data = models.BinaryField(null=False)
+
+    # Uncompressed size in bytes
+    size = models.PositiveIntegerField(null=False)
+
+    @staticmethod
+    def compress(text: str) -> dict:
+        encoded = text.encode('utf-8')
+        return {'data': zlib.compress(encoded), 'size': len(encoded)}
+
+    def text(self) -> str:
+        return zlib.decompress(self.data).decode('utf-8')
+
+
+class PostRendering(models.Model):
+    """
+    A post's body rendered to HTML, kept so that rendering only happens once per version.
+    Stale once the post is modified after `source_modified` or the renderer's version changes.
+    """
+    post = models.OneToOneField(Post, primary_key=True, on_delete=models.CASCADE, related_name='rendering')
+
+    html = models.TextField(null=False)
+
+    # `last_modified` of the post that was rendered
+    source_modified = models.DateTimeField(null=False)
+    renderer_version = models.PositiveSmallIntegerField(null=False)
+
+
+class PostTombstoneQuerySet(models.QuerySet):
+
+    def visible_to(self, viewer: Union[User, int]) -> 'PostTombstoneQuerySet':
+        """
+        Tombstones of posts `viewer` could see when they were left, by the same rules as
+        `PostQuerySet.visible_to`, leaving out posts the viewer can see now. Permissions granted on
+        deleted posts are gone along with them, so those only count while the post is around.
+        """
+        viewer_id = getattr(viewer, 'pk', viewer)
+        is_friend = Follow.objects.filter(follower=OuterRef('author_id'), followee=viewer_id)
+        is_member = FriendGroupMember.objects.filter(group=OuterRef('access_group_id'), member=viewer_id)
+        is_visible = Post.objects.filter(pk=OuterRef('post_id')).visible_to(viewer_id)
+
+        return self.filter(
+            Q(author_id=viewer_id)
+            | Q(visibility_type='public')
+            | Q(Exists(is_friend), visibility_type='all_friends')
+            | Q(Exists(is_member), visibility_type='friend_group')
+        ).exclude(Exists(is_visible))
+
+
+class PostTombstone(models.Model):
+    """
+    Left behind when a post is deleted, or when its visibility changes, so that syncing clients
+    who could see it find out it's gone. Records who could see the post before.
+    """
+    objects = PostTombstoneQuerySet.as_manager()
+
+    # Not foreign keys, the post is gone and its author may be on their way out too
+    post_id = models.IntegerField(null=False)
+    author_id = models.IntegerField(null=True)
+    access_group_id = models.IntegerField(null=True)
+
+    visibility_type = models.CharField(max_length=20, blank=True, null=False, default='')
+
+    deleted_at = models.DateTimeField(
+        auto_now_add=True
+    )
+
+    # Set by the same trigger as `Post.change_txid`
+    change_txid = models.BigIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['change_txid', 'id'], name='posttombstone_change_txid_idx')
+        ]
+
+
+class FeedEntry(models.Model):
+    """
+    A post in someone's home timeline, written when the post is saved so that reading
+    a timeline is a range scan over `(owner, created_at, post)`.
+    """
+    owner = models.ForeignKey(
+        User, null=False, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+
+    post = models.ForeignKey(
+        Post, null=False, db_index=True, on_delete=models.CASCADE, related_name='feed_entries'
+    )
+
+    author = models.ForeignKey(
+        User, null=False, db_index=True, on_delete=models.CASCADE, related_name='+'
+    )
+
+    # Copied from the post so the feed can be ordered without touching posts_post
+    created_at = models.DateTimeField(null=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='feedentry_owner_post_unique')
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'post'], name='feedentry_owner_created_idx'),
+            models.Index(fields=['owner', 'author'], name='feedentry_owner_author_idx')
+        ]
+
 
 class EmailVerificationToken(models.Model):
     token = models.CharField(max_length=20, null=False, default=generate_registration_token)
@@ -90,6 +474,58 @@ class EmailVerificationToken(models.Model):
     )
 
 
+class FollowQuerySet(models.QuerySet):
+
+    def follow_many(self, follower: User, followees: List[User]) -> List['Follow']:
+        """
+        Makes `follower` follow each of `followees`, returning only the follows that are new.
+
+        A single `INSERT ... ON CONFLICT DO NOTHING RETURNING` against the unique constraint, so
+        concurrent requests can't create duplicates and exactly one of them is told a follow is new.
+        `post_save` is sent for each new follow, as `create()` would.
+        """
+        followees = list({followee.pk: followee for followee in followees}.values())
+        if not followees:
+            return []
+
+        fields = self.model._meta.concrete_fields
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        now = timezone.now()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(self.model._meta.db_table)} '
+                f'(follower_id, followee_id, created_at, last_modified) '
+                f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(followees))} '
+                f'ON CONFLICT (follower_id, followee_id) DO NOTHING '
+                f'RETURNING {", ".join(quote(field.column) for field in fields)}',
+                [value for followee in followees for value in (follower.pk, followee.pk, now, now)]
+            )
+            rows = cursor.fetchall()
+
+        by_id = {followee.pk: followee for followee in followees}
+        follows = []
+        for row in rows:
+            follow = self.model.from_db(self.db, [field.attname for field in fields], row)
+            follow.follower = follower
+            follow.followee = by_id[follow.followee_id]
+            post_save.send(
+                sender=self.model, instance=follow, created=True, update_fields=None, raw=False, using=self.db
+            )
+            follows.append(follow)
+        return follows
+
+    def follow(self, follower: User, followee: User) -> Tuple['Follow', bool]:
+        """
+        Makes `follower` follow `followee`, returning the follow and whether it is new.
+        """
+        created = self.follow_many(follower, [followee])
+        if created:
+            return created[0], True
+        return self.get(follower=follower, followee=followee), False
+
+
 class Follow(models.Model):
     follower = models.ForeignKey(
         User,
@@ -110,6 +546,13 @@ class Follow(models.Model):
         auto_now_add=True
     )
 
+    objects = FollowQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='follow_follower_followee_unique')
+        ]
+
     def __str__(self):
         return f"{self.follower.username} follows {self.followee.username}"
 
@@ -147,6 +590,11 @@ class FriendGroupMember(models.Model):
         auto_now_add=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['group', 'member'], name='groupmember_group_member_idx')
+        ]
+
 
 class PostPermission(models.Model):
 
@@ -164,4 +612,9 @@ class PostPermission(models.Model):
 
     created_at = models.DateTimeField(
         auto_now_add=True
-    )
\ No newline at end of file
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'user'], name='postpermission_post_user_idx')
+        ]
@@ -0,0 +1,190 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Type, Union
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from posts import errors
+
+# A sort key, normally a timestamp, and an ID to break ties
+Position = Tuple[Union[datetime, int], int]
+
+
+def _encode(payload) -> str:
+    encoded = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(encoded).decode('ascii').rstrip('=')
+
+
+def _decode(cursor: str):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+
+
+def _serialize_position(position: Optional[Position]):
+    if position is None:
+        return None
+    key, pk = position
+    return [key.isoformat() if isinstance(key, datetime) else key, pk]
+
+
+def _deserialize_position(value, key_type: Type = datetime) -> Optional[Position]:
+    key, pk = value
+    if key_type is datetime:
+        key = parse_datetime(key)
+    elif not isinstance(key, key_type) or isinstance(key, bool):
+        key = None
+    if key is None or not isinstance(pk, int):
+        raise ValueError(value)
+    return (key, pk)
+
+
+def encode_position(position: Position) -> str:
+    return _encode(_serialize_position(position))
+
+
+def decode_position(cursor: str) -> Optional[Position]:
+    """
+    Inverse of `encode_position`. Returns None for anything that isn't a cursor we issued.
+    """
+    try:
+        return _deserialize_position(_decode(cursor))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        return None
+
+
+def encode_positions(positions: Sequence[Optional[Position]]) -> str:
+    """
+    Packs several independent positions, some of which may be unset, into one opaque token.
+    """
+    return _encode([_serialize_position(position) for position in positions])
+
+
+def decode_positions(token: str, count: int, key_type: Type = datetime) -> Optional[List[Optional[Position]]]:
+    """
+    Inverse of `encode_positions`. Returns None for anything that isn't a token we issued for `count`
+    positions keyed on `key_type`.
+    """
+    try:
+        values = _decode(token)
+        if not isinstance(values, list) or len(values) != count:
+            return None
+        return [None if value is None else _deserialize_position(value, key_type) for value in values]
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        return None
+
+
+def seek(
+    queryset: QuerySet, position: Optional[Position], ordering: Sequence[str], ascending: bool = False
+) -> QuerySet:
+    """
+    Orders `queryset` newest first (or oldest first, with `ascending`) on the `(timestamp, id)`
+    pair named by `ordering`, or any other sort key in place of the timestamp, and skips everything
+    up to and including `position`.
+
+    The redundant `<=` on the timestamp lets Postgres start an index range scan at the
+    cursor instead of walking the index from the top, so deep pages cost the same as the first one.
+    """
+    timestamp_field, id_field = ordering
+    direction, inclusive, exclusive = ('', 'gte', 'gt') if ascending else ('-', 'lte', 'lt')
+
+    queryset = queryset.order_by(f'{direction}{timestamp_field}', f'{direction}{id_field}')
+    if position is None:
+        return queryset
+
+    timestamp, pk = position
+    return queryset.filter(
+        Q(**{f'{timestamp_field}__{inclusive}': timestamp}),
+        Q(**{f'{timestamp_field}__{exclusive}': timestamp}) | Q(**{f'{id_field}__{exclusive}': pk})
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over a `(timestamp, id)` ordering.
+
+    The response body stays a plain list. The cursor for the next page is sent in a
+    `Link: <...>; rel="next"` header and is absent on the last page.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('created_at', 'id')
+
+    next_position: Optional[Position] = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_with(
+            lambda position, limit: list(seek(queryset, position, self.ordering)[:limit]),
+            request, view
+        )
+
+    def window(self, queryset: QuerySet, request) -> QuerySet:
+        """
+        The rows of `queryset` that the page for `request` reads, including the one that decides
+        whether there is a next page, for probing without going over the rest of `queryset`.
+        """
+        rows = seek(queryset, self.get_position(request), self.ordering)[:self.get_page_size(request) + 1]
+        return queryset.filter(pk__in=rows.values('pk'))
+
+    def paginate_with(
+        self, fetch: Callable[[Optional[Position], int], List[Any]], request, view=None
+    ) -> List[Any]:
+        """
+        Runs `fetch(position, limit)` for one more row than the page holds so we know
+        whether there is a next page without a separate COUNT.
+        """
+        self.request = request
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        page_size = self.get_page_size(request)
+
+        rows = fetch(self.get_position(request), page_size + 1)
+        page = rows[:page_size]
+
+        if len(rows) > page_size:
+            last = page[-1]
+            self.next_position = (getattr(last, self.ordering[0]), getattr(last, self.ordering[1]))
+        else:
+            self.next_position = None
+
+        return page
+
+    def get_position(self, request) -> Optional[Position]:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        position = decode_position(cursor)
+        if position is None:
+            raise errors.ResponseException(errors.InvalidFieldsError([self.cursor_query_param]), 400)
+        return position
+
+    def get_page_size(self, request) -> int:
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise errors.ResponseException(errors.InvalidFieldsError([self.page_size_query_param]), 400)
+        if page_size <= 0:
+            raise errors.ResponseException(errors.InvalidFieldsError([self.page_size_query_param]), 400)
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self) -> Optional[str]:
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_position(self.next_position))
+
+    def get_paginated_response(self, data):
+        next_link = self.get_next_link()
+        headers = {'Link': f'<{next_link}>; rel="next"'} if next_link else None
+        return Response(data, headers=headers)
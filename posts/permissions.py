@@ -16,3 +16,16 @@ class IsUser(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return obj == request.user
+
+
+class CanViewPostOrIsAuthor(BasePermission):
+    """
+    Reading a post needs the current user to be in its audience, and anything else needs them to be its author.
+    Needs a view with `AudienceMixin`.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return view.audience.can_see(obj)
+
+        return obj.author_id == request.user.pk
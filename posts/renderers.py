@@ -0,0 +1,21 @@
+from rest_framework import renderers
+
+from posts.utils import fastjson
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    `JSONRenderer` that encodes with orjson when it can.
+
+    Indented output and non-default `COMPACT_JSON`, `UNICODE_JSON` or `STRICT_JSON` settings
+    aren't supported by the fast path and are left to DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        return fastjson.dumps(data)
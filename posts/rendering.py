@@ -0,0 +1,47 @@
+from typing import Iterable, Optional
+
+from posts.models import Post, PostRendering
+from posts.utils import markup
+
+
+def _current_html(post: Post) -> Optional[str]:
+    try:
+        rendering = post.rendering
+    except PostRendering.DoesNotExist:
+        return None
+    if rendering.renderer_version != markup.VERSION or rendering.source_modified != post.last_modified:
+        return None
+    return rendering.html
+
+
+def html_for(post: Post) -> str:
+    """
+    `post`'s body as HTML, from its stored rendering when that is current.
+
+    Otherwise the body is rendered and stored, so each version of a post is rendered once, on
+    the first read that asks for it. Posts aren't rendered when saved because autosaves write
+    many versions that nobody reads. Select or prefetch `rendering` to read a page in one query.
+    """
+    html = _current_html(post)
+    if html is not None:
+        return html
+
+    rendering, _ = PostRendering.objects.update_or_create(post=post, defaults={
+        'html': markup.render(post.body),
+        'source_modified': post.last_modified,
+        'renderer_version': markup.VERSION,
+    })
+    post.rendering = rendering
+    return rendering.html
+
+
+def render_stale(posts: Iterable[Post]) -> int:
+    """
+    Renders whichever of `posts` has no current rendering. Returns how many were rendered.
+    """
+    rendered = 0
+    for post in posts:
+        if _current_html(post) is None:
+            html_for(post)
+            rendered += 1
+    return rendered
@@ -1,9 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Manager
+from django.utils import timezone
 from drf_writable_nested import WritableNestedModelSerializer
 from expander import ExpanderSerializerMixin
 from rest_framework import serializers
 
-from posts.models import FriendGroup, Post, UserProfile, Follow, FriendGroupMember
+from posts import rendering
+from posts.models import FriendGroup, Post, UserProfile, Follow, FriendGroupMember, UserStats
+
+# Same as the column limit on `Post.inline_body`
+POST_BODY_MAX_LENGTH = 1024 * 1024
 
 
 class RelatedUserSerializer(serializers.ModelSerializer):
@@ -16,7 +25,8 @@ class RelatedUserSerializer(serializers.ModelSerializer):
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
-        fields = ['bio']
+        fields = ['bio', 'follower_count', 'following_count']
+        read_only_fields = ['follower_count', 'following_count']
 
 
 class FriendGroupMemberUserSerializer(RelatedUserSerializer):
@@ -54,6 +64,16 @@ class CurrentUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'profile', 'groups']
 
 
+class FollowListSerializer(serializers.ListSerializer):
+    """
+    Follows oldest first. They're sorted here rather than in SQL so that prefetched follows are used as they are.
+    """
+
+    def to_representation(self, data):
+        follows = data.all() if isinstance(data, Manager) else data
+        return super().to_representation(sorted(follows, key=lambda follow: (follow.created_at, follow.pk)))
+
+
 class FollowerUserSerializer(serializers.ModelSerializer):
 
     username = serializers.CharField(source='follower.username')
@@ -61,6 +81,7 @@ class FollowerUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = ['username']
+        list_serializer_class = FollowListSerializer
 
 
 class FollowingUserSerializer(serializers.ModelSerializer):
@@ -70,6 +91,36 @@ class FollowingUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = Follow
         fields = ['username']
+        list_serializer_class = FollowListSerializer
+
+
+class FollowBatchSerializer(serializers.Serializer):
+
+    usernames = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False, max_length=settings.FOLLOW_BATCH_MAX_USERNAMES
+    )
+
+
+class UserStatsSerializer(serializers.ModelSerializer):
+
+    current_streak = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserStats
+        fields = ['post_count', 'word_count', 'current_streak', 'longest_streak', 'last_post_date']
+
+    def to_representation(self, stats: UserStats):
+        # Totals and streaks count private, friends-only and group posts, so only their owner sees them
+        request = self.context.get('request')
+        if request is None or stats.user_id != request.user.pk:
+            return None
+        return super().to_representation(stats)
+
+    def get_current_streak(self, stats: UserStats) -> int:
+        # The stored streak is only updated by posting, so it lapses once a full day goes by without one
+        if stats.last_post_date is None or stats.last_post_date < timezone.localdate() - timedelta(days=1):
+            return 0
+        return stats.current_streak
 
 
 class UserSerializer(ExpanderSerializerMixin, WritableNestedModelSerializer):
@@ -82,14 +133,120 @@ class UserSerializer(ExpanderSerializerMixin, WritableNestedModelSerializer):
         expandable_fields = {
             'profile': UserProfileSerializer,
             'followers': (FollowerUserSerializer, (), {'many': True}),
-            'following': (FollowingUserSerializer, (), {'many': True})
+            'following': (FollowingUserSerializer, (), {'many': True}),
+            'stats': (UserStatsSerializer, (), {'read_only': True})
         }
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostHTMLSerializer(serializers.BaseSerializer):
+    """
+    A post's body rendered to sanitized HTML.
+    """
+
+    def to_representation(self, instance):
+        return rendering.html_for(instance)
+
+
+class PostSerializer(ExpanderSerializerMixin, serializers.ModelSerializer):
 
     author = UserSerializer(read_only=True)
+    # `Post.body` is a property over inline or compressed storage, so it needs declaring explicitly
+    body = serializers.CharField(max_length=POST_BODY_MAX_LENGTH, allow_blank=True, required=False)
 
     class Meta:
         model = Post
-        fields = ['id', 'author', 'created_at', 'title', 'body', 'last_modified']
+        fields = ['id', 'author', 'created_at', 'title', 'body', 'visibility_type', 'access_group', 'last_modified']
+        expandable_fields = {
+            'html': (PostHTMLSerializer, (), {'source': '*', 'read_only': True})
+        }
+
+    def validate(self, data):
+        visibility_type = data.get('visibility_type', getattr(self.instance, 'visibility_type', None))
+        if 'access_group' in data:
+            access_group = data['access_group']
+        else:
+            access_group = getattr(self.instance, 'access_group', None)
+
+        if visibility_type == 'friend_group' and access_group is None:
+            raise serializers.ValidationError({'access_group': 'Required for friend_group posts.'})
+        if access_group is not None and access_group.owner_id != self.context['request'].user.pk:
+            raise serializers.ValidationError({'access_group': 'Must be one of your own groups.'})
+        return data
+
+    def update(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        # Autosaves often send what is already stored, which shouldn't be written or count as an edit
+        if instance.has_unsaved_changes():
+            instance.save()
+        return instance
+
+
+class SpliceSerializer(serializers.Serializer):
+
+    start = serializers.IntegerField(min_value=0)
+    end = serializers.IntegerField(min_value=0)
+    text = serializers.CharField(allow_blank=True, trim_whitespace=False, default='')
+
+
+class PostDeltaSerializer(serializers.Serializer):
+    """
+    An edit to a post's body as splices against the version last modified at `base`,
+    with offsets in UTF-16 code units.
+    """
+
+    base = serializers.DateTimeField()
+    ops = SpliceSerializer(many=True)
+    title = serializers.CharField(max_length=1024, allow_blank=True, required=False)
+
+
+class PostVersionSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Post
+        fields = ['id', 'last_modified']
+
+
+class PostImportSerializer(serializers.Serializer):
+    """
+    One line of a bulk import. Checks the same writable fields as `PostSerializer`, apart from
+    `access_group` since group IDs don't carry over between accounts, plus `created_at`, without
+    the cost of a model serializer per row.
+    """
+
+    title = serializers.CharField(max_length=1024, allow_blank=True, required=False)
+    body = serializers.CharField(max_length=POST_BODY_MAX_LENGTH, allow_blank=True, required=False)
+    visibility_type = serializers.ChoiceField(
+        choices=[choice for choice, _ in Post.VISIBILITY_TYPES if choice != 'friend_group'], required=False
+    )
+    # Kept from wherever the post was written first, so calendars and streaks still line up
+    created_at = serializers.DateTimeField(required=False)
+
+    def validate_created_at(self, created_at):
+        if created_at > timezone.now():
+            raise serializers.ValidationError('Must not be in the future.')
+        return created_at
+
+
+class PostSummarySerializer(serializers.ModelSerializer):
+    """
+    List representation of a post. Carries the stored excerpt instead of the body,
+    which is only available from the detail route.
+    """
+
+    author = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'author', 'created_at', 'title', 'excerpt', 'word_count', 'reading_time', 'last_modified'
+        ]
+
+
+class PostSearchResultSerializer(PostSummarySerializer):
+
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(PostSummarySerializer.Meta):
+        fields = PostSummarySerializer.Meta.fields + ['rank', 'snippet']
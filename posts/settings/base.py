@@ -46,13 +46,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
     'drfpasswordless',
     'rest_framework',
     'rest_framework.authtoken',
     'django_extensions',
     'django_filters',
-    'posts'
+    'posts.apps.PostsConfig'
 ]
 
 MIDDLEWARE = [
@@ -104,6 +105,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+#
+# Post payloads and follow graph versions live here, so every process on every host has to share it:
+# CACHE_BACKEND and CACHE_LOCATION are required, e.g. `django.core.cache.backends.memcached.MemcachedCache`
+# and `host:11211`. local.py uses a file-based cache instead.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND'),
+        'LOCATION': os.getenv('CACHE_LOCATION'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -126,6 +142,15 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication'
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'posts.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'posts.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser'
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ]
@@ -165,3 +190,41 @@ PASSWORDLESS_AUTH = {
 }
 
 IS_HTTPS = True
+
+# Home timelines are materialized into FeedEntry rows when posts are written.
+# FEED_BACKFILL_LIMIT caps how many of an author's posts are copied into a feed
+# when someone starts following them.
+FEED_BATCH_SIZE = 1000
+FEED_BACKFILL_LIMIT = 200
+# Authors with more followers than FEED_PULL_FOLLOWER_THRESHOLD are pulled into feeds at read time
+# instead of fanned out, until they drop below FEED_PUSH_FOLLOWER_THRESHOLD. The gap keeps authors near
+# the line from switching back and forth. Switches are made by the update_feed_pull_status command.
+FEED_PULL_FOLLOWER_THRESHOLD = 10000
+FEED_PUSH_FOLLOWER_THRESHOLD = 8000
+
+# Number of characters of a post's body stored as its excerpt for list responses
+POST_EXCERPT_LENGTH = 280
+
+# Post bodies longer than this many bytes are stored compressed in PostBody
+POST_BODY_COMPRESSION_THRESHOLD = 8 * 1024
+
+# Postgres text search configuration used to index and query posts
+POST_SEARCH_CONFIG = 'english'
+
+# Bulk imports insert this many posts per statement, and report at most POST_IMPORT_MAX_ERRORS bad lines
+POST_IMPORT_BATCH_SIZE = 500
+POST_IMPORT_MAX_ERRORS = 100
+
+# Exports read posts from a server-side cursor this many rows at a time
+POST_EXPORT_CHUNK_SIZE = 500
+
+# Serialized post payloads are cached in this cache for this many seconds
+POST_CACHE_ALIAS = 'default'
+POST_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Most usernames one batch follow or unfollow request may name
+FOLLOW_BATCH_MAX_USERNAMES = 200
+
+# Each process keeps the follow graph of up to this many users, checked for changes against versions in this cache
+FOLLOW_GRAPH_CACHE_ALIAS = 'default'
+FOLLOW_GRAPH_MAX_USERS = 10000
@@ -1,7 +1,17 @@
+import os
+
 from posts.settings.base import *  # noqa: F401 F403
 
 DEBUG = True
 
+# Shared by the worker processes on this machine, which is all a local run has
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/journaltown-cache'),
+    }
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 IS_HTTPS = False
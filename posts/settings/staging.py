@@ -1,7 +1,12 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 from posts.settings.base import *  # noqa: F401 F403
 
+if not os.getenv('CACHE_BACKEND') or not os.getenv('CACHE_LOCATION'):
+    raise ImproperlyConfigured('CACHE_BACKEND and CACHE_LOCATION must point at a shared cache server')
+
 ANYMAIL = {
     "MAILGUN_API_KEY": os.getenv("MAILGUN_API_KEY"),
     "MAILGUN_SENDER_DOMAIN": os.getenv('MAIL_DOMAIN')
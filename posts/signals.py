@@ -0,0 +1,209 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts import caching
+from posts import daycounts
+from posts import feeds
+from posts import follows
+from posts import graph
+from posts import stats
+from posts.models import (
+    Follow, FriendGroup, FriendGroupMember, Post, PostPermission, PostTombstone, UserStats, posts_created
+)
+
+# Saves can widen who sees a post and deletes can only narrow it, so saves backfill feeds
+# and deletes prune them. Pruning never inserts rows, which matters when a delete is part
+# of a cascade that is about to remove the posts involved.
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance: Post, created: bool, raw: bool = False, **kwargs):
+    if raw:
+        return
+    if created or instance.has_changed('visibility_type', 'access_group_id'):
+        feeds.fan_out(instance)
+
+
+@receiver(posts_created, sender=Post)
+def fan_out_created_posts(sender, posts, **kwargs):
+    feeds.fan_out_created(posts)
+
+
+@receiver(post_delete, sender=Post)
+def leave_tombstone(sender, instance: Post, **kwargs):
+    PostTombstone.objects.create(
+        post_id=instance.pk, author_id=instance.author_id,
+        visibility_type=instance.visibility_type, access_group_id=instance.access_group_id
+    )
+
+
+@receiver(post_save, sender=Post)
+def leave_tombstone_for_visibility_change(sender, instance: Post, created: bool, raw: bool = False, **kwargs):
+    if raw or created:
+        return
+    # Syncing clients who could see the post before, and can't any more, are told it's gone
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'visibility_type' in loaded and instance.has_changed('visibility_type', 'access_group_id'):
+        PostTombstone.objects.create(
+            post_id=instance.pk, author_id=loaded.get('author_id', instance.author_id),
+            visibility_type=loaded['visibility_type'], access_group_id=loaded.get('access_group_id')
+        )
+
+
+@receiver(post_save, sender=Follow)
+def invalidate_graph_for_follow(sender, instance: Follow, **kwargs):
+    graph.invalidate([instance.follower_id, instance.followee_id])
+
+
+@receiver(post_delete, sender=Follow)
+def invalidate_graph_for_unfollow(sender, instance: Follow, **kwargs):
+    graph.invalidate([instance.follower_id, instance.followee_id])
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance: Follow, created: bool, raw: bool = False, **kwargs):
+    if created and not raw:
+        follows.count_follow(instance.follower_id, instance.followee_id, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance: Follow, **kwargs):
+    follows.count_follow(instance.follower_id, instance.followee_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feeds_for_follow(sender, instance: Follow, raw: bool = False, **kwargs):
+    if raw:
+        return
+    # The follower starts seeing the followee's posts, and the followee becomes
+    # a friend who can see the follower's friends-only posts.
+    feeds.backfill(instance.follower_id, instance.followee_id)
+    feeds.backfill(instance.followee_id, instance.follower_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_feeds_for_follow(sender, instance: Follow, **kwargs):
+    feeds.prune(instance.follower_id, instance.followee_id)
+    feeds.prune(instance.followee_id, instance.follower_id)
+
+
+def _group_owner_id(group_id: int):
+    return FriendGroup.objects.filter(pk=group_id).values_list('owner_id', flat=True).first()
+
+
+@receiver(post_save, sender=FriendGroupMember)
+def backfill_feed_for_group_member(sender, instance: FriendGroupMember, raw: bool = False, **kwargs):
+    if raw:
+        return
+    feeds.backfill(instance.member_id, _group_owner_id(instance.group_id))
+
+
+@receiver(post_delete, sender=FriendGroupMember)
+def prune_feed_for_group_member(sender, instance: FriendGroupMember, **kwargs):
+    owner_id = _group_owner_id(instance.group_id)
+    if owner_id is not None:
+        feeds.prune(instance.member_id, owner_id)
+
+
+def _post_author_id(post_id: int):
+    return Post.objects.filter(pk=post_id).values_list('author_id', flat=True).first()
+
+
+@receiver(post_save, sender=PostPermission)
+def backfill_feed_for_permission(sender, instance: PostPermission, raw: bool = False, **kwargs):
+    if raw:
+        return
+    feeds.backfill(instance.user_id, _post_author_id(instance.post_id))
+
+
+@receiver(post_delete, sender=PostPermission)
+def prune_feed_for_permission(sender, instance: PostPermission, **kwargs):
+    author_id = _post_author_id(instance.post_id)
+    if author_id is not None:
+        feeds.prune(instance.user_id, author_id)
+
+
+# Cached payloads are keyed on `last_modified`, so edits miss the cache by themselves.
+# These just drop entries that can no longer be read, and payloads that embed an author who changed.
+
+
+@receiver(post_save, sender=Post)
+def invalidate_cached_post(sender, instance: Post, created: bool, raw: bool = False, **kwargs):
+    if raw or created:
+        return
+    last_modified = getattr(instance, '_loaded_values', {}).get('last_modified')
+    if last_modified is not None:
+        caching.invalidate([(instance.pk, last_modified)])
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance: Post, **kwargs):
+    caching.invalidate([(instance.pk, instance.last_modified)])
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_posts_by_author(sender, instance: User, created: bool, raw: bool = False,
+                                      update_fields=None, **kwargs):
+    if raw or created:
+        return
+    # Logging in saves `last_login` alone, which no payload includes
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    caching.invalidate(Post.objects.filter(author=instance).values_list('id', 'last_modified').iterator())
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance: User, created: bool, raw: bool = False, **kwargs):
+    if created and not raw:
+        UserStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance: Post, created: bool, raw: bool = False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.post_created(instance)
+    elif instance.has_changed('word_count'):
+        # Posts saved without being loaded first have nothing to measure the change against
+        loaded = getattr(instance, '_loaded_values', {})
+        if 'word_count' in loaded:
+            stats.words_changed(instance, instance.word_count - loaded['word_count'])
+
+
+@receiver(posts_created, sender=Post)
+def count_created_posts(sender, posts, **kwargs):
+    stats.posts_created(posts)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance: Post, **kwargs):
+    stats.post_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post_day(sender, instance: Post, created: bool, raw: bool = False, **kwargs):
+    if raw:
+        return
+    public = instance.visibility_type == 'public'
+    if created:
+        daycounts.add(instance.author_id, instance.created_at, public)
+        return
+
+    loaded = getattr(instance, '_loaded_values', {})
+    if not {'author_id', 'created_at', 'visibility_type'} <= loaded.keys():
+        return
+    if instance.has_changed('created_at', 'visibility_type', 'author_id'):
+        daycounts.remove(loaded['author_id'], loaded['created_at'], loaded['visibility_type'] == 'public')
+        daycounts.add(instance.author_id, instance.created_at, public)
+
+
+@receiver(posts_created, sender=Post)
+def count_created_post_days(sender, posts, **kwargs):
+    daycounts.add_many((post.author_id, post.created_at, post.visibility_type == 'public') for post in posts)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_day(sender, instance: Post, **kwargs):
+    daycounts.remove(instance.author_id, instance.created_at, instance.visibility_type == 'public')
@@ -0,0 +1,92 @@
+import datetime
+from typing import List
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from posts.models import Post, UserStats
+from posts.utils.streaks import streaks
+
+
+def _day(post: Post) -> datetime.date:
+    return timezone.localdate(post.created_at)
+
+
+def _days(author_id: int) -> List[datetime.date]:
+    return list(Post.objects.filter(author_id=author_id).dates('created_at', 'day'))
+
+
+def reconcile(user_id: int) -> UserStats:
+    """
+    Recomputes `user_id`'s stats from all of their posts.
+    """
+    totals = Post.objects.filter(author_id=user_id).aggregate(posts=Count('pk'), words=Sum('word_count'))
+    days = _days(user_id)
+    current, longest = streaks(days)
+
+    stats, _ = UserStats.objects.update_or_create(user_id=user_id, defaults={
+        'post_count': totals['posts'],
+        'word_count': totals['words'] or 0,
+        'last_post_date': days[-1] if days else None,
+        'current_streak': current,
+        'longest_streak': longest,
+    })
+    return stats
+
+
+def post_created(post: Post):
+    with transaction.atomic():
+        stats = UserStats.objects.select_for_update().filter(user_id=post.author_id).first()
+        day = _day(post)
+        # Posts are normally created today, so anything else means starting over
+        if stats is None or (stats.last_post_date is not None and day < stats.last_post_date):
+            reconcile(post.author_id)
+            return
+
+        stats.post_count += 1
+        stats.word_count += post.word_count
+        if stats.last_post_date != day:
+            continues = stats.last_post_date == day - datetime.timedelta(days=1)
+            stats.current_streak = stats.current_streak + 1 if continues else 1
+            stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+            stats.last_post_date = day
+        stats.save()
+
+
+def posts_created(posts: List[Post]):
+    """
+    Brings the stats of every author in a batch of new posts up to date, once per author.
+    """
+    for author_id in {post.author_id for post in posts}:
+        reconcile(author_id)
+
+
+def words_changed(post: Post, delta: int):
+    UserStats.objects.filter(user_id=post.author_id).update(
+        word_count=Greatest(F('word_count') + delta, 0), last_modified=timezone.now()
+    )
+
+
+def post_deleted(post: Post):
+    """
+    Only ever updates, so it is safe to run in the middle of a cascade deleting the author.
+    """
+    updated = UserStats.objects.filter(user_id=post.author_id).update(
+        post_count=Greatest(F('post_count') - 1, 0),
+        word_count=Greatest(F('word_count') - post.word_count, 0),
+        last_modified=timezone.now()
+    )
+    if not updated:
+        return
+
+    # Streaks only change when this was the last post of its day, and then they have to be counted again
+    day = _day(post)
+    if Post.objects.filter(author_id=post.author_id, created_at__date=day).exists():
+        return
+    days = _days(post.author_id)
+    current, longest = streaks(days)
+    UserStats.objects.filter(user_id=post.author_id).update(
+        last_post_date=days[-1] if days else None, current_streak=current, longest_streak=longest
+    )
@@ -1,6 +1,7 @@
 import os
+from typing import Iterable
 
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.template import loader
 from django.contrib.auth.models import User
 
@@ -29,7 +30,7 @@ Enjoy,
     )
 
 
-def send_follow_email(follow: models.Follow, target: User):
+def _follow_email(follow: models.Follow, target: User) -> EmailMultiAlternatives:
     username = follow.follower.username
     email_subject = f"New follower on JournalTown!"
     email_plaintext = """
@@ -42,12 +43,24 @@ Enjoy,
     email_html = 'new_follower_email.html'
 
     context = {'username': username, **login.link_context()}
-    html_message = loader.render_to_string(email_html, context)
-    send_mail(
+    message = EmailMultiAlternatives(
         email_subject,
         email_plaintext.format(**context),
         os.getenv('PASSWORDLESS_EMAIL_NOREPLY_ADDRESS'),
-        [target.email],
-        fail_silently=False,
-        html_message=html_message
+        [target.email]
     )
+    message.attach_alternative(loader.render_to_string(email_html, context), 'text/html')
+    return message
+
+
+def send_follow_email(follow: models.Follow, target: User):
+    _follow_email(follow, target).send(fail_silently=False)
+
+
+def send_follow_emails(follows: Iterable[models.Follow]):
+    """
+    Tells each followee about their new follower, sending everything over one mail connection.
+    """
+    messages = [_follow_email(follow, follow.followee) for follow in follows]
+    if messages:
+        get_connection(fail_silently=False).send_messages(messages)
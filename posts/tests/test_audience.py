@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.audience import Audience
+from posts.models import Follow, FriendGroup, FriendGroupMember, Post, PostPermission
+
+
+class AudienceTestCase(TestCase):
+
+    def setUp(self):
+        self.viewer = get_user_model().objects.create_user(username='viewer', email='viewer@example.com')
+        self.friend = get_user_model().objects.create_user(username='friend', email='friend@example.com')
+        self.stranger = get_user_model().objects.create_user(username='stranger', email='stranger@example.com')
+
+        Follow.objects.create(follower=self.friend, followee=self.viewer)
+        self.member_group = FriendGroup.objects.create(owner=self.friend, name='in')
+        FriendGroupMember.objects.create(group=self.member_group, member=self.viewer)
+        self.other_group = FriendGroup.objects.create(owner=self.stranger, name='out')
+
+        self.posts = []
+        for author, group in [(self.viewer, None), (self.friend, self.member_group), (self.stranger, self.other_group)]:
+            for visibility_type in ['public', 'private', 'all_friends', 'friend_group']:
+                self.posts.append(Post.objects.create(
+                    author=author, title='t', body='b', visibility_type=visibility_type,
+                    access_group=group if visibility_type == 'friend_group' else None
+                ))
+        granted = Post.objects.create(author=self.stranger, title='t', body='b', visibility_type='private')
+        PostPermission.objects.create(post=granted, user=self.viewer)
+        self.posts.append(granted)
+
+    def test_matches_visible_to(self):
+        expected = set(Post.objects.visible_to(self.viewer).values_list('pk', flat=True))
+
+        visible = Audience(self.viewer).visible(self.posts)
+        self.assertEqual(expected, {post.pk for post in visible})
+
+    def test_a_page_costs_at_most_three_queries(self):
+        audience = Audience(self.viewer)
+        with self.assertNumQueries(3):
+            audience.visible(self.posts)
+
+        # Everything is known now
+        with self.assertNumQueries(0):
+            for post in self.posts:
+                audience.can_see(post)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        for _ in range(50):
+            self.posts.append(Post.objects.create(
+                author=self.stranger, title='t', body='b', visibility_type='all_friends'
+            ))
+
+        with self.assertNumQueries(3):
+            Audience(self.viewer).visible(self.posts)
+
+    def test_own_and_public_posts_need_no_queries(self):
+        posts = [post for post in self.posts if post.author == self.viewer or post.visibility_type == 'public']
+        with self.assertNumQueries(0):
+            self.assertEqual(posts, Audience(self.viewer).visible(posts))
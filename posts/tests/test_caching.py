@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import caching
+from posts.models import Post
+from posts.serializers import PostSerializer, PostSummarySerializer
+
+
+class PostCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.posts = [Post.objects.create(author=self.user, title=f't{i}', body='b') for i in range(3)]
+
+    def test_cached_payloads_match_serializer(self):
+        expected = PostSerializer(self.posts, many=True).data
+
+        self.assertEqual(expected, caching.serialize_posts(self.posts, PostSerializer))
+        self.assertEqual(expected, caching.serialize_posts(self.posts, PostSerializer))
+
+    def test_page_is_one_get_many_and_one_set_many(self):
+        caching.serialize_posts(self.posts[:1], PostSerializer)
+
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'set_many', wraps=cache.set_many) as set_many:
+            caching.serialize_posts(self.posts, PostSerializer)
+
+        self.assertEqual(1, get_many.call_count)
+        self.assertEqual(1, set_many.call_count)
+        self.assertEqual(2, len(set_many.call_args[0][0]))
+
+    def test_hits_skip_the_serializer(self):
+        caching.serialize_posts(self.posts, PostSerializer)
+
+        with mock.patch.object(PostSerializer, 'to_representation') as to_representation:
+            caching.serialize_posts(self.posts, PostSerializer)
+        to_representation.assert_not_called()
+
+    def test_namespaces_are_separate(self):
+        caching.serialize_posts(self.posts, PostSerializer)
+
+        summaries = caching.serialize_posts(self.posts, PostSummarySerializer)
+        self.assertEqual(PostSummarySerializer(self.posts, many=True).data, summaries)
+
+    def test_edit_replaces_payload(self):
+        post = self.posts[0]
+        caching.serialize_post(post, PostSerializer)
+
+        post.body = 'edited'
+        post.save()
+
+        self.assertEqual('edited', caching.serialize_post(post, PostSerializer)['body'])
+
+    def test_delete_drops_payload(self):
+        post = self.posts[0]
+        key = caching._key('post', post.pk, post.last_modified)
+        caching.serialize_post(post, PostSerializer)
+        self.assertIsNotNone(cache.get(key, version=caching.VERSION))
+
+        post.delete()
+        self.assertIsNone(cache.get(key, version=caching.VERSION))
+
+    def test_renaming_author_drops_payloads(self):
+        caching.serialize_posts(self.posts, PostSerializer)
+
+        self.user.username = 'renamed'
+        self.user.save()
+
+        payloads = caching.serialize_posts(list(Post.objects.order_by('pk')), PostSerializer)
+        self.assertEqual(['renamed'] * 3, [payload['author']['username'] for payload in payloads])
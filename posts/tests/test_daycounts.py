@@ -0,0 +1,72 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Post, PostDayCount
+
+
+class PostDayCountTestCase(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', email='writer@example.com')
+        self.today = timezone.localdate()
+        self.yesterday = self.today - datetime.timedelta(days=1)
+
+    def post_on(self, when: datetime.datetime, visibility_type: str = 'private') -> Post:
+        with mock.patch('django.utils.timezone.now', return_value=when):
+            return Post.objects.create(author=self.user, title='t', body='b', visibility_type=visibility_type)
+
+    def counts(self) -> dict:
+        return {row.day: (row.count, row.public_count) for row in PostDayCount.objects.filter(author=self.user)}
+
+    def test_posts_are_counted_by_day(self):
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        self.post_on(yesterday)
+        self.post_on(timezone.now())
+        self.post_on(timezone.now(), visibility_type='public')
+
+        self.assertEqual({self.yesterday: (1, 0), self.today: (2, 1)}, self.counts())
+
+    def test_deletes_are_uncounted(self):
+        kept = self.post_on(timezone.now(), visibility_type='public')
+        self.post_on(timezone.now() - datetime.timedelta(days=1)).delete()
+        self.assertEqual({self.today: (1, 1)}, self.counts())
+
+        kept.delete()
+        self.assertEqual({}, self.counts())
+
+    def test_date_and_visibility_edits_move_counts(self):
+        post = self.post_on(timezone.now())
+
+        post.created_at = timezone.now() - datetime.timedelta(days=1)
+        post.visibility_type = 'public'
+        post.save()
+
+        self.assertEqual({self.yesterday: (1, 1)}, self.counts())
+
+    def test_other_edits_leave_counts_alone(self):
+        post = self.post_on(timezone.now())
+        post.title = 'renamed'
+        with mock.patch('posts.daycounts.add') as add, mock.patch('posts.daycounts.remove') as remove:
+            post.save()
+        add.assert_not_called()
+        remove.assert_not_called()
+
+    def test_edits_without_loading_leave_counts_alone(self):
+        post = self.post_on(timezone.now())
+        Post(pk=post.pk, author=self.user, title='edited', body='b', created_at=post.created_at).save()
+
+        self.assertEqual('edited', Post.objects.get(pk=post.pk).title)
+        self.assertEqual({self.today: (1, 0)}, self.counts())
+
+    def test_bulk_created_posts_are_counted(self):
+        Post.objects.bulk_create_posts([Post(author=self.user, title='t', body='b') for _ in range(3)])
+        self.assertEqual({self.today: (3, 0)}, self.counts())
+
+    def test_deleting_the_author_cascades(self):
+        self.post_on(timezone.now())
+        self.user.delete()
+        self.assertFalse(PostDayCount.objects.exists())
@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from posts import fastpath
+from posts.models import Post
+from posts.serializers import PostSerializer, PostSummarySerializer, RelatedUserSerializer, UserSerializer
+
+
+class FastPathParityTestCase(TestCase):
+    """
+    Plans have to render to exactly the same bytes as the serializers they stand in for.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.other_user = get_user_model().objects.create_user(username='ötherß', email='other@example.com')
+        Post.objects.create(author=self.user, title='plain', body='short body', visibility_type='public')
+        Post.objects.create(author=self.other_user, title='ünïcode ✓', body='«quoted» "text"\n\tand more')
+        Post.objects.create(author=self.user, title='', body='')
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=10):
+            Post.objects.create(author=self.user, title='long', body='compressed ' * 50)
+
+    def assertParity(self, serializer_class, queryset):
+        plan = fastpath.plan_for(serializer_class)
+        render = JSONRenderer().render
+        expected = render(serializer_class(list(queryset), many=True).data)
+
+        self.assertEqual(expected, render(plan.serialize(queryset)))
+        self.assertEqual(expected, render(plan.build_objects(list(queryset))))
+
+    def test_post_serializer(self):
+        self.assertParity(PostSerializer, Post.objects.order_by('pk'))
+
+    def test_post_summary_serializer(self):
+        self.assertParity(PostSummarySerializer, Post.objects.order_by('pk'))
+
+    def test_user_serializer(self):
+        self.assertParity(UserSerializer, get_user_model().objects.order_by('pk'))
+
+    def test_related_user_serializer(self):
+        self.assertParity(RelatedUserSerializer, get_user_model().objects.order_by('pk'))
+
+    def test_serialize_is_one_query(self):
+        with self.assertNumQueries(1):
+            fastpath.plan_for(PostSerializer).serialize(Post.objects.all())
@@ -0,0 +1,158 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import feeds
+from posts.models import FeedEntry, Follow, FriendGroup, FriendGroupMember, Post
+
+
+class FeedTestCase(TestCase):
+
+    def setUp(self):
+        self.reader = get_user_model().objects.create_user(username='reader', email='reader@example.com')
+        self.author = get_user_model().objects.create_user(username='author', email='author@example.com')
+
+    def feed(self, user=None):
+        return list(
+            FeedEntry.objects.filter(owner=user or self.reader).order_by('created_at').values_list('post_id', flat=True)
+        )
+
+    def test_new_post_is_written_to_followers_feeds(self):
+        """Saving a post fans it out to followers who may see it"""
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        public = Post.objects.create(author=self.author, title='t', body='b', visibility_type='public')
+        Post.objects.create(author=self.author, title='t', body='b', visibility_type='private')
+
+        self.assertEqual([public.pk], self.feed())
+
+    def test_visibility_change_rewrites_entries(self):
+        """Making a post private takes it out of feeds"""
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        post = Post.objects.create(author=self.author, title='t', body='b', visibility_type='public')
+
+        post = Post.objects.get(pk=post.pk)
+        post.visibility_type = 'private'
+        post.save()
+
+        self.assertEqual([], self.feed())
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Following an author copies their posts into our feed and unfollowing removes them"""
+        posts = [Post.objects.create(author=self.author, title='t', body='b', visibility_type='public')
+                 for _ in range(3)]
+
+        follow = Follow.objects.create(follower=self.reader, followee=self.author)
+        self.assertEqual([post.pk for post in posts], self.feed())
+
+        follow.delete()
+        self.assertEqual([], self.feed())
+
+    def test_leaving_group_prunes_group_posts(self):
+        """Removing someone from a group hides the group's posts again"""
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        group = FriendGroup.objects.create(owner=self.author, name='group')
+        member = FriendGroupMember.objects.create(group=group, member=self.reader)
+        public = Post.objects.create(author=self.author, title='t', body='b', visibility_type='public')
+        grouped = Post.objects.create(
+            author=self.author, title='t', body='b', visibility_type='friend_group', access_group=group
+        )
+        self.assertEqual([public.pk, grouped.pk], self.feed())
+
+        member.delete()
+        self.assertEqual([public.pk], self.feed())
+
+    def test_deleting_author_cleans_up(self):
+        """Deleting an author with friends-only posts leaves no dangling entries"""
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        Follow.objects.create(follower=self.author, followee=self.reader)
+        Post.objects.create(author=self.author, title='t', body='b', visibility_type='all_friends')
+
+        self.author.delete()
+        self.assertEqual([], self.feed())
+
+    def test_rebuild_matches_timeline_query(self):
+        """Rebuilding a feed gives the same posts as computing the timeline directly"""
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        for visibility_type in ['public', 'private', 'all_friends', 'friend_group']:
+            Post.objects.create(author=self.author, title='t', body='b', visibility_type=visibility_type)
+        FeedEntry.objects.all().delete()
+
+        call_command('rebuild_feeds', self.reader.username, stdout=io.StringIO())
+
+        expected = Post.objects.timeline_for(self.reader).order_by('created_at').values_list('pk', flat=True)
+        self.assertEqual(list(expected), self.feed())
+
+
+@override_settings(FEED_PULL_FOLLOWER_THRESHOLD=1, FEED_PUSH_FOLLOWER_THRESHOLD=2)
+class HybridFeedTestCase(TestCase):
+
+    def setUp(self):
+        self.reader = get_user_model().objects.create_user(username='reader', email='reader@example.com')
+        self.fan = get_user_model().objects.create_user(username='fan', email='fan@example.com')
+        self.author = get_user_model().objects.create_user(username='author', email='author@example.com')
+        self.celebrity = get_user_model().objects.create_user(username='celebrity', email='celebrity@example.com')
+
+        Follow.objects.create(follower=self.reader, followee=self.author)
+        Follow.objects.create(follower=self.reader, followee=self.celebrity)
+        Follow.objects.create(follower=self.fan, followee=self.celebrity)
+        feeds.update_pull_statuses()
+
+    def is_pulled(self, user) -> bool:
+        user.profile.refresh_from_db()
+        return user.profile.feed_pulled
+
+    def test_crossing_threshold_switches_to_pull(self):
+        """Authors with more followers than the threshold are pulled and their entries dropped"""
+        self.assertTrue(self.is_pulled(self.celebrity))
+        self.assertFalse(self.is_pulled(self.author))
+
+        Post.objects.create(author=self.celebrity, title='t', body='b', visibility_type='public')
+        self.assertFalse(FeedEntry.objects.filter(author=self.celebrity).exists())
+
+    def test_dropping_below_threshold_switches_back_to_push(self):
+        """Losing followers puts an author back on fan-out, with their posts backfilled"""
+        post = Post.objects.create(author=self.celebrity, title='t', body='b', visibility_type='public')
+
+        Follow.objects.filter(follower=self.fan).delete()
+        self.assertTrue(self.is_pulled(self.celebrity))
+
+        out = io.StringIO()
+        call_command('update_feed_pull_status', stdout=out)
+        self.assertIn('Switched 1 authors', out.getvalue())
+        self.assertFalse(self.is_pulled(self.celebrity))
+        self.assertEqual(
+            [post.pk], list(FeedEntry.objects.filter(owner=self.reader).values_list('post_id', flat=True))
+        )
+
+    @override_settings(FEED_PULL_FOLLOWER_THRESHOLD=3, FEED_PUSH_FOLLOWER_THRESHOLD=2)
+    def test_authors_between_thresholds_keep_their_status(self):
+        """Following or unfollowing near the threshold doesn't switch an author back and forth"""
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+
+        Follow.objects.create(follower=other, followee=self.author)
+        Follow.objects.create(follower=self.fan, followee=self.author)
+        self.assertEqual(0, feeds.update_pull_statuses())
+        self.assertFalse(self.is_pulled(self.author))
+
+        Follow.objects.create(follower=self.celebrity, followee=self.author)
+        self.assertEqual(1, feeds.update_pull_statuses())
+        self.assertTrue(self.is_pulled(self.author))
+
+        Follow.objects.filter(follower=self.celebrity, followee=self.author).delete()
+        self.assertEqual(0, feeds.update_pull_statuses())
+        self.assertTrue(self.is_pulled(self.author))
+
+    def test_read_merges_pushed_and_pulled_posts(self):
+        """Reading a feed interleaves pushed and pulled posts newest first, across pages"""
+        posts = [
+            Post.objects.create(author=author, title='t', body='b', visibility_type='public')
+            for author in [self.author, self.celebrity, self.celebrity, self.author, self.celebrity]
+        ]
+        Post.objects.create(author=self.celebrity, title='t', body='b', visibility_type='private')
+
+        first = feeds.read(self.reader, None, 3)
+        second = feeds.read(self.reader, (first[-1].created_at, first[-1].pk), 3)
+
+        self.assertEqual([post.pk for post in reversed(posts)], [post.pk for post in first + second])
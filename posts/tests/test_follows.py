@@ -0,0 +1,90 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from posts.models import Follow, UserProfile
+
+
+class FollowCountTestCase(TestCase):
+
+    def setUp(self):
+        self.alice = get_user_model().objects.create_user(username='alice', email='alice@example.com')
+        self.bob = get_user_model().objects.create_user(username='bob', email='bob@example.com')
+        self.carol = get_user_model().objects.create_user(username='carol', email='carol@example.com')
+
+    def counts(self, user) -> tuple:
+        profile = UserProfile.objects.get(user=user)
+        return (profile.follower_count, profile.following_count)
+
+    def test_follows_are_counted(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        Follow.objects.create(follower=self.carol, followee=self.bob)
+        Follow.objects.create(follower=self.bob, followee=self.alice)
+
+        self.assertEqual((1, 1), self.counts(self.alice))
+        self.assertEqual((2, 1), self.counts(self.bob))
+        self.assertEqual((0, 1), self.counts(self.carol))
+
+    def test_resaving_a_follow_does_not_count_twice(self):
+        follow = Follow.objects.create(follower=self.alice, followee=self.bob)
+        follow.save()
+        self.assertEqual((1, 0), self.counts(self.bob))
+
+    def test_unfollows_are_uncounted(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        Follow.objects.filter(follower=self.alice).delete()
+
+        self.assertEqual((0, 0), self.counts(self.alice))
+        self.assertEqual((0, 0), self.counts(self.bob))
+
+    def test_deleting_a_user_uncounts_their_follows(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        Follow.objects.create(follower=self.bob, followee=self.carol)
+
+        self.bob.delete()
+
+        self.assertEqual((0, 0), self.counts(self.alice))
+        self.assertEqual((0, 0), self.counts(self.carol))
+
+    def test_follow_reports_new_follows(self):
+        follow, created = Follow.objects.follow(self.alice, self.bob)
+        self.assertTrue(created)
+        self.assertEqual((self.alice, self.bob), (follow.follower, follow.followee))
+        self.assertIsNotNone(follow.created_at)
+
+        again, created = Follow.objects.follow(self.alice, self.bob)
+        self.assertFalse(created)
+        self.assertEqual(follow.pk, again.pk)
+
+        self.assertEqual(1, Follow.objects.count())
+        self.assertEqual((1, 0), self.counts(self.bob))
+        self.assertEqual((0, 1), self.counts(self.alice))
+
+    def test_follows_are_unique(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(follower=self.alice, followee=self.bob)
+
+    def test_reconcile_command_fixes_drift(self):
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        UserProfile.objects.filter(user=self.bob).update(follower_count=7)
+        UserProfile.objects.filter(user=self.alice).update(following_count=0)
+
+        out = StringIO()
+        call_command('reconcile_follow_counts', stdout=out)
+
+        self.assertEqual((1, 0), self.counts(self.bob))
+        self.assertEqual((0, 1), self.counts(self.alice))
+        self.assertIn('for 2 users', out.getvalue())
+
+    def test_reconcile_command_takes_usernames(self):
+        UserProfile.objects.filter(user=self.bob).update(follower_count=7)
+
+        call_command('reconcile_follow_counts', 'alice', stdout=StringIO())
+        self.assertEqual((7, 0), self.counts(self.bob))
+
+        call_command('reconcile_follow_counts', 'bob', stdout=StringIO())
+        self.assertEqual((0, 0), self.counts(self.bob))
@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from posts import graph
+from posts.models import Follow
+
+
+class IdSetTestCase(SimpleTestCase):
+
+    def test_membership(self):
+        ids = graph.IdSet([5, 1, 3, 3])
+        self.assertEqual([1, 3, 5], list(ids))
+        self.assertEqual(3, len(ids))
+        self.assertIn(3, ids)
+        self.assertNotIn(4, ids)
+        self.assertNotIn(6, ids)
+        self.assertNotIn(1, graph.IdSet([]))
+
+
+# Entries are only kept outside transactions, so these tests need real commits
+class FollowGraphTestCase(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        graph.clear()
+        self.alice, self.bob, self.carol = [
+            get_user_model().objects.create_user(username=name, email=f'{name}@example.com')
+            for name in ['alice', 'bob', 'carol']
+        ]
+        Follow.objects.create(follower=self.alice, followee=self.bob)
+        Follow.objects.create(follower=self.carol, followee=self.bob)
+        Follow.objects.create(follower=self.bob, followee=self.alice)
+
+    def tearDown(self):
+        graph.clear()
+
+    def test_neighbours(self):
+        self.assertEqual([self.alice.pk], list(graph.following(self.bob.pk)))
+        self.assertEqual(sorted([self.alice.pk, self.carol.pk]), list(graph.followers(self.bob.pk)))
+        self.assertEqual([], list(graph.followers(self.carol.pk)))
+
+    def test_kept_between_reads(self):
+        with self.assertNumQueries(1):
+            graph.neighbours([self.alice.pk, self.bob.pk])
+        with self.assertNumQueries(0):
+            self.assertIn(self.bob.pk, graph.following(self.alice.pk))
+            self.assertIn(self.alice.pk, graph.followers(self.bob.pk))
+
+    def test_follows_and_unfollows_invalidate(self):
+        graph.neighbours([self.alice.pk, self.carol.pk])
+
+        Follow.objects.follow(self.alice, self.carol)
+        self.assertIn(self.alice.pk, graph.followers(self.carol.pk))
+
+        Follow.objects.filter(follower=self.alice).delete()
+        self.assertEqual([], list(graph.following(self.alice.pk)))
+        self.assertNotIn(self.alice.pk, graph.followers(self.carol.pk))
+
+    def test_changes_from_other_processes_invalidate(self):
+        graph.following(self.alice.pk)
+        entry = graph._entries[self.alice.pk]
+
+        Follow.objects.create(follower=self.alice, followee=self.carol)
+        # Another process still has the entry it loaded before the follow, but sees the shared version move on
+        graph._entries[self.alice.pk] = entry
+
+        self.assertIn(self.carol.pk, graph.following(self.alice.pk))
+
+    def test_lost_versions_invalidate(self):
+        graph.following(self.alice.pk)
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            graph.following(self.alice.pk)
+
+    def test_reads_in_transactions_are_not_kept(self):
+        with transaction.atomic():
+            Follow.objects.create(follower=self.alice, followee=self.carol)
+            self.assertIn(self.carol.pk, graph.following(self.alice.pk))
+            transaction.set_rollback(True)
+
+        self.assertNotIn(self.carol.pk, graph.following(self.alice.pk))
+
+    @override_settings(FOLLOW_GRAPH_MAX_USERS=2)
+    def test_least_recently_used_are_dropped(self):
+        graph.following(self.alice.pk)
+        graph.following(self.bob.pk)
+        graph.following(self.alice.pk)
+        graph.following(self.carol.pk)
+
+        self.assertEqual({self.alice.pk, self.carol.pk}, set(graph._entries))
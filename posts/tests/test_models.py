@@ -0,0 +1,138 @@
+import io
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from posts import rendering
+from posts.models import Post, PostBody, PostRendering
+from posts.utils import markup
+
+
+@override_settings(POST_BODY_COMPRESSION_THRESHOLD=100)
+class PostBodyStorageTestCase(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+
+    def test_short_body_is_stored_inline(self):
+        post = Post.objects.create(author=self.user, title='t', body='short')
+
+        self.assertFalse(post.body_compressed)
+        self.assertEqual('short', Post.objects.get(pk=post.pk).inline_body)
+        self.assertFalse(PostBody.objects.exists())
+
+    def test_long_body_is_compressed_out_of_row(self):
+        body = 'word ' * 100
+        post = Post.objects.create(author=self.user, title='t', body=body)
+
+        stored = Post.objects.get(pk=post.pk)
+        self.assertTrue(stored.body_compressed)
+        self.assertEqual('', stored.inline_body)
+        self.assertLess(len(PostBody.objects.get(post=post).data), len(body))
+        self.assertEqual(body, stored.body)
+        self.assertEqual(100, stored.word_count)
+
+    def test_body_loads_lazily(self):
+        post = Post.objects.create(author=self.user, title='t', body='word ' * 100)
+
+        stored = Post.objects.get(pk=post.pk)
+        with self.assertNumQueries(1):
+            stored.body
+        with self.assertNumQueries(0):
+            stored.body
+
+    def test_shrinking_body_moves_it_back_inline(self):
+        post = Post.objects.create(author=self.user, title='t', body='word ' * 100)
+
+        post = Post.objects.get(pk=post.pk)
+        post.body = 'short'
+        post.save()
+
+        stored = Post.objects.get(pk=post.pk)
+        self.assertFalse(stored.body_compressed)
+        self.assertEqual('short', stored.body)
+        self.assertFalse(PostBody.objects.exists())
+
+    def test_compress_command_moves_existing_bodies(self):
+        long_post = Post.objects.create(author=self.user, title='t', body='short')
+        short_post = Post.objects.create(author=self.user, title='t', body='short')
+        # Simulate a row written before compression existed
+        Post.objects.filter(pk=long_post.pk).update(inline_body='word ' * 100)
+
+        output = io.StringIO()
+        call_command('compress_post_bodies', batch_size=1, stdout=output)
+
+        self.assertIn('Compressed 1 bodies from 500 to', output.getvalue())
+        self.assertEqual('word ' * 100, Post.objects.get(pk=long_post.pk).body)
+        self.assertTrue(Post.objects.get(pk=long_post.pk).body_compressed)
+        self.assertFalse(Post.objects.get(pk=short_post.pk).body_compressed)
+
+
+@override_settings(POST_BODY_COMPRESSION_THRESHOLD=100)
+class CompressPostBodiesConcurrencyTestCase(TransactionTestCase):
+
+    def test_edit_during_compression_is_kept(self):
+        """A body edited while the command reads its batch is compressed as edited, not as it was"""
+        user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        post = Post.objects.create(author=user, title='t', body='short')
+        Post.objects.filter(pk=post.pk).update(inline_body='old ' * 100)
+
+        edited = threading.Event()
+
+        def edit():
+            with transaction.atomic():
+                Post.objects.filter(pk=post.pk).update(inline_body='new ' * 100)
+                edited.set()
+                # Long enough for the command to get to the row while this is uncommitted
+                threading.Event().wait(0.5)
+
+        editor = threading.Thread(target=edit)
+        editor.start()
+        edited.wait(10)
+        call_command('compress_post_bodies', stdout=io.StringIO())
+        editor.join()
+
+        stored = Post.objects.get(pk=post.pk)
+        self.assertTrue(stored.body_compressed)
+        self.assertEqual('new ' * 100, stored.body)
+
+
+class PostRenderingTestCase(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.post = Post.objects.create(author=self.user, title='t', body='**hello**')
+
+    def test_renders_once_per_version(self):
+        with mock.patch('posts.utils.markup.render', wraps=markup.render) as render:
+            self.assertEqual('<p><strong>hello</strong></p>', rendering.html_for(self.post))
+            self.assertEqual('<p><strong>hello</strong></p>', rendering.html_for(Post.objects.get(pk=self.post.pk)))
+            self.assertEqual(1, render.call_count)
+
+            self.post.body = 'changed'
+            self.post.save()
+            self.assertEqual('<p>changed</p>', rendering.html_for(Post.objects.get(pk=self.post.pk)))
+            self.assertEqual(2, render.call_count)
+
+    def test_renderer_version_change_rerenders(self):
+        rendering.html_for(self.post)
+
+        with mock.patch.object(markup, 'VERSION', markup.VERSION + 1):
+            post = Post.objects.get(pk=self.post.pk)
+            PostRendering.objects.filter(post=post).update(html='old')
+            self.assertEqual('<p><strong>hello</strong></p>', rendering.html_for(post))
+            self.assertEqual(markup.VERSION, PostRendering.objects.get(post=post).renderer_version)
+
+    def test_render_posts_command_renders_stale_posts(self):
+        rendering.html_for(self.post)
+        other = Post.objects.create(author=self.user, title='t', body='other')
+
+        out = io.StringIO()
+        call_command('render_posts', stdout=out)
+
+        self.assertIn('Rendered 1 posts', out.getvalue())
+        self.assertEqual('<p>other</p>', PostRendering.objects.get(post=other).html)
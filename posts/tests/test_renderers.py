@@ -0,0 +1,87 @@
+import datetime
+import decimal
+import io
+import uuid
+from collections import OrderedDict
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+
+from posts import parsers as posts_parsers
+from posts import renderers as posts_renderers
+from posts.utils import fastjson
+
+PAYLOADS = [
+    None,
+    [],
+    {'body': 'x' * 100000, 'id': 1, 'nested': OrderedDict([('b', 1), ('a', [1.5, True, None])])},
+    {'text': 'ünïcode ✓ «quoted» "escaped" \\ \n\t', 'separators': 'line\u2028paragraph\u2029end'},
+    {'aware': timezone.now(), 'naive': datetime.datetime(2020, 1, 2, 3, 4, 5, 678901)},
+    {'date': datetime.date(2020, 1, 2), 'time': datetime.time(3, 4, 5), 'delta': datetime.timedelta(hours=1)},
+    {'decimal': decimal.Decimal('1.25'), 'uuid': uuid.UUID(int=1), 'bytes': b'raw', 1: 'int key'},
+    {'big': 2 ** 70},
+]
+
+
+class JSONRendererTestCase(SimpleTestCase):
+
+    def assertRendersLikeDRF(self):
+        for payload in PAYLOADS:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    renderers.JSONRenderer().render(payload), posts_renderers.JSONRenderer().render(payload)
+                )
+
+    def test_matches_drf(self):
+        self.assertIsNotNone(fastjson.orjson)
+        self.assertRendersLikeDRF()
+
+    def test_matches_drf_without_orjson(self):
+        with mock.patch.object(fastjson, 'orjson', None):
+            self.assertRendersLikeDRF()
+
+    def test_non_finite_floats_fail(self):
+        for payload in [{'a': [float('nan')]}, {'b': (None, float('inf'))}, {'c': decimal.Decimal('-Infinity')}]:
+            with self.subTest(payload=payload):
+                with self.assertRaises(ValueError):
+                    renderers.JSONRenderer().render(payload)
+                with self.assertRaises(ValueError):
+                    posts_renderers.JSONRenderer().render(payload)
+                with mock.patch.object(fastjson, 'orjson', None), self.assertRaises(ValueError):
+                    posts_renderers.JSONRenderer().render(payload)
+
+    def test_indented_output_is_left_to_drf(self):
+        payload = {'a': [1, 2]}
+        self.assertEqual(
+            renderers.JSONRenderer().render(payload, 'application/json; indent=4'),
+            posts_renderers.JSONRenderer().render(payload, 'application/json; indent=4')
+        )
+
+
+class JSONParserTestCase(SimpleTestCase):
+
+    def parse(self, data: bytes, encoding='utf-8'):
+        return posts_parsers.JSONParser().parse(io.BytesIO(data), 'application/json', {'encoding': encoding})
+
+    def test_matches_drf(self):
+        for payload in PAYLOADS[1:4]:
+            with self.subTest(payload=payload):
+                encoded = renderers.JSONRenderer().render(payload)
+                expected = parsers.JSONParser().parse(io.BytesIO(encoded))
+                self.assertEqual(expected, self.parse(encoded))
+                with mock.patch.object(fastjson, 'orjson', None):
+                    self.assertEqual(expected, self.parse(encoded))
+
+    def test_other_encodings(self):
+        self.assertEqual({'title': 'ü'}, self.parse('{"title": "ü"}'.encode('latin-1'), 'latin-1'))
+
+    def test_invalid_json_fails(self):
+        for data in [b'{"title": ', b'{"value": NaN}', b'\xff']:
+            with self.subTest(data=data):
+                with self.assertRaises(ParseError):
+                    self.parse(data)
+                with mock.patch.object(fastjson, 'orjson', None), self.assertRaises(ParseError):
+                    self.parse(data)
@@ -0,0 +1,175 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import signals
+from posts.models import Post, UserStats
+from posts.tests.utils import AuthTestCase
+
+
+def days_ago(days: int) -> datetime.datetime:
+    return timezone.now() - datetime.timedelta(days=days)
+
+
+class UserStatsTestCase(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='writer', email='writer@example.com')
+
+    def post_on(self, when: datetime.datetime, body: str = 'one two three') -> Post:
+        with mock.patch('django.utils.timezone.now', return_value=when):
+            return Post.objects.create(author=self.user, title='t', body=body)
+
+    def stats(self) -> UserStats:
+        return UserStats.objects.get(user=self.user)
+
+    def test_new_users_start_empty(self):
+        stats = self.stats()
+        self.assertEqual((0, 0, None, 0, 0), (
+            stats.post_count, stats.word_count, stats.last_post_date, stats.current_streak, stats.longest_streak
+        ))
+
+    def test_posts_are_counted(self):
+        self.post_on(timezone.now())
+        self.post_on(timezone.now(), body='four five')
+
+        stats = self.stats()
+        self.assertEqual(2, stats.post_count)
+        self.assertEqual(5, stats.word_count)
+        self.assertEqual(1, stats.current_streak)
+
+    def test_streaks_follow_consecutive_days(self):
+        for days in [6, 5, 3, 2, 1]:
+            self.post_on(days_ago(days))
+
+        stats = self.stats()
+        self.assertEqual(3, stats.current_streak)
+        self.assertEqual(3, stats.longest_streak)
+        self.assertEqual(timezone.localdate(days_ago(1)), stats.last_post_date)
+
+    def test_backdated_posts_are_recounted(self):
+        self.post_on(days_ago(1))
+        self.post_on(days_ago(3))
+        self.post_on(days_ago(2))
+
+        stats = self.stats()
+        self.assertEqual(3, stats.post_count)
+        self.assertEqual(3, stats.current_streak)
+
+    def test_edits_change_word_count(self):
+        post = self.post_on(timezone.now())
+        post.body = 'one'
+        post.save()
+
+        self.assertEqual(1, self.stats().word_count)
+
+        post.title = 'only the title'
+        post.save()
+        self.assertEqual(1, self.stats().word_count)
+
+    def test_edits_without_loading_leave_word_count_alone(self):
+        post = self.post_on(timezone.now())
+        unloaded = Post(pk=post.pk, author=self.user, title='t', body='one', created_at=post.created_at)
+        unloaded.store_body()
+
+        signals.count_saved_post(Post, instance=unloaded, created=False)
+        self.assertEqual(3, self.stats().word_count)
+
+    def test_deleting_last_post_of_a_day_recounts_streaks(self):
+        self.post_on(days_ago(2))
+        middle = self.post_on(days_ago(1))
+        self.post_on(timezone.now())
+
+        middle.delete()
+
+        stats = self.stats()
+        self.assertEqual(2, stats.post_count)
+        self.assertEqual(6, stats.word_count)
+        self.assertEqual(1, stats.current_streak)
+        self.assertEqual(1, stats.longest_streak)
+
+    def test_deleting_the_author_cascades(self):
+        self.post_on(timezone.now())
+        self.user.delete()
+        self.assertFalse(UserStats.objects.exists())
+
+    def test_bulk_created_posts_are_counted(self):
+        Post.objects.bulk_create_posts([Post(author=self.user, title='t', body='a b') for _ in range(3)])
+        self.assertEqual((3, 6), (self.stats().post_count, self.stats().word_count))
+
+    def test_reconcile_command_fixes_drift(self):
+        self.post_on(timezone.now())
+        UserStats.objects.filter(user=self.user).update(post_count=10, word_count=0)
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        UserStats.objects.filter(user=other).delete()
+
+        out = StringIO()
+        call_command('reconcile_stats', stdout=out)
+
+        self.assertEqual((1, 3), (self.stats().post_count, self.stats().word_count))
+        self.assertTrue(UserStats.objects.filter(user=other).exists())
+        self.assertIn('2 were out of date', out.getvalue())
+
+    def test_reconcile_command_takes_usernames(self):
+        UserStats.objects.filter(user=self.user).update(post_count=10)
+
+        call_command('reconcile_stats', 'nobody', stdout=StringIO())
+        self.assertEqual(10, self.stats().post_count)
+
+        call_command('reconcile_stats', 'writer', stdout=StringIO())
+        self.assertEqual(0, self.stats().post_count)
+
+
+class UserStatsViewTestCase(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.client.force_login(self.user)
+
+    def test_expand_stats(self):
+        Post.objects.create(author=self.user, title='t', body='some words here')
+
+        response = self.client.get('/users/me/', {'expand': 'stats'})
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({
+            'post_count': 1, 'word_count': 3, 'current_streak': 1, 'longest_streak': 1,
+            'last_post_date': timezone.localdate().isoformat()
+        }, response.json()['stats'])
+
+    def test_lapsed_streak_reads_as_zero(self):
+        with mock.patch('django.utils.timezone.now', return_value=days_ago(3)):
+            Post.objects.create(author=self.user, title='t', body='b')
+
+        response = self.client.get('/users/me/', {'expand': 'stats'})
+
+        stats = response.json()['stats']
+        self.assertEqual(0, stats['current_streak'])
+        self.assertEqual(1, stats['longest_streak'])
+
+    def test_new_post_changes_etag(self):
+        first = self.client.get('/users/', {'expand': 'stats'})
+        Post.objects.create(author=self.user, title='t', body='b')
+
+        second = self.client.get('/users/', {'expand': 'stats'}, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(200, second.status_code)
+        self.assertEqual(1, second.json()[0]['stats']['post_count'])
+
+    def test_stats_are_only_shown_to_their_user(self):
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        Post.objects.create(author=other, title='t', body='private words', visibility_type='private')
+
+        response = self.client.get('/users/other/', {'expand': 'stats'})
+        self.assertIsNone(response.json()['stats'])
+
+        listed = self.client.get('/users/', {'expand': 'stats'}).json()
+        self.assertEqual({'me': 0, 'other': None}, {
+            user['username']: user['stats'] and user['stats']['post_count'] for user in listed
+        })
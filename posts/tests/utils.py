@@ -1,5 +1,6 @@
+from django.core.cache import cache
 from django.test.client import Client
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from rest_framework.authtoken.models import Token
 
 
@@ -20,3 +21,18 @@ class TokenAuthClient(Client):
 
 class AuthTestCase(TestCase):
     client_class = TokenAuthClient
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class AuthTransactionTestCase(TransactionTestCase):
+    """
+    For tests that need each write committed as it happens, rather than all in one transaction.
+    """
+    client_class = TokenAuthClient
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
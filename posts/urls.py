@@ -35,6 +35,10 @@ urlpatterns = [
     path('callback/register/', registration.register_email_callback),
     path('users/<username>/available/', registration.is_available),
     path('users/<username>/follows/', users.FollowView.as_view()),
+    path('users/<username>/follows/batch/', users.FollowBatchView.as_view()),
+    path('users/<username>/posts/', posts.AuthorPostsView.as_view()),
+    path('users/<username>/export/', posts.ExportView.as_view()),
+    path('users/<username>/calendar/', posts.CalendarView.as_view()),
     path('users/<username>/groups/', groups.FriendGroupsView.as_view()),
     path('users/<username>/groups/<int:group_id>/', groups.FriendGroupView.as_view()),
     path('users/<username>/groups/<int:group_id>/members/', groups.FriendGroupMemberView.as_view())
@@ -0,0 +1,67 @@
+"""
+JSON encoding and decoding with orjson when it is installed and the standard library when it isn't.
+
+Output matches DRF's compact `JSONRenderer` either way: UTF-8 without ASCII escaping, no whitespace,
+U+2028 and U+2029 escaped, anything JSON has no type for encoded by DRF's `JSONEncoder`, and
+NaN and infinities rejected with a ValueError.
+"""
+import decimal
+import json
+import math
+from typing import Any, Union
+
+from rest_framework.utils import encoders
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = encoders.JSONEncoder()
+
+# orjson encodes datetimes itself, slightly differently from DRF, so they are handed to DRF's encoder too
+_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _escape_separators(encoded: bytes) -> bytes:
+    # Keeps the output a strict JavaScript subset, as DRF does
+    return encoded.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def _has_non_finite(data: Any) -> bool:
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+        elif isinstance(value, (float, decimal.Decimal)) and not math.isfinite(value):
+            return True
+    return False
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(data, default=_encoder.default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Integers past 64 bits, for one. The standard library either manages or raises properly.
+            pass
+        else:
+            # orjson writes NaN and infinities as null, so output with nulls in it is checked for them
+            # and left to the standard library to raise about, as DRF does
+            if b'null' not in encoded or not _has_non_finite(data):
+                return _escape_separators(encoded)
+    encoded = json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return _escape_separators(encoded.encode('utf-8'))
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Raises ValueError for invalid JSON, which includes NaN and infinities as in DRF's strict mode.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data, parse_constant=strict_constant)
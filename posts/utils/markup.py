@@ -0,0 +1,79 @@
+import re
+
+from django.utils.html import escape
+
+# Bump whenever the output for some text changes, so stored renderings are redone
+VERSION = 2
+
+_HEADING = re.compile(r'^(#{1,6})\s+(.*)$')
+_LIST_ITEM = re.compile(r'^[-*]\s+')
+_CODE = re.compile(r'(`[^`\n]+`)')
+_STRONG = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+_EMPHASIS = re.compile(r'(?<![*\w])[*_](?=\S)(.+?)(?<=\S)[*_](?![*\w])')
+# Runs on escaped text, so quotes in the URL are already entities and can't end the attribute
+_LINK = re.compile(r'\[([^\]\n]+)\]\((https?://[^\s()]+)\)')
+
+
+def _emphasis(text: str) -> str:
+    return _EMPHASIS.sub(r'<em>\1</em>', text)
+
+
+def _strong(text: str) -> str:
+    # Emphasis is applied on either side of strong spans separately, so the two can't overlap
+    pieces = _STRONG.split(text)
+    return ''.join(f'<strong>{_emphasis(piece)}</strong>' if index % 2 else _emphasis(piece)
+                   for index, piece in enumerate(pieces))
+
+
+def _links(text: str) -> str:
+    # Split out like code spans, so URLs are never formatted and formatting never spans a link's tags
+    pieces = _LINK.split(text)
+    html = []
+    for index in range(0, len(pieces), 3):
+        html.append(_strong(pieces[index]))
+        if index + 1 < len(pieces):
+            label, url = pieces[index + 1], pieces[index + 2]
+            html.append(f'<a href="{url}" rel="nofollow noopener">{_strong(label)}</a>')
+    return ''.join(html)
+
+
+def _inline(text: str) -> str:
+    pieces = _CODE.split(escape(text))
+    for index, piece in enumerate(pieces):
+        if index % 2:
+            pieces[index] = f'<code>{piece[1:-1]}</code>'
+        else:
+            pieces[index] = _links(piece)
+    return ''.join(pieces)
+
+
+def _block(block: str) -> str:
+    lines = block.split('\n')
+
+    heading = _HEADING.match(block)
+    if heading and len(lines) == 1:
+        level = len(heading.group(1))
+        return f'<h{level}>{_inline(heading.group(2))}</h{level}>'
+
+    if all(_LIST_ITEM.match(line) for line in lines):
+        items = ''.join(f'<li>{_inline(_LIST_ITEM.sub("", line))}</li>' for line in lines)
+        return f'<ul>{items}</ul>'
+
+    if all(line.startswith('>') for line in lines):
+        quoted = '<br>\n'.join(_inline(line[1:].strip()) for line in lines)
+        return f'<blockquote><p>{quoted}</p></blockquote>'
+
+    return '<p>' + '<br>\n'.join(_inline(line) for line in lines) + '</p>'
+
+
+def render(text: str) -> str:
+    """
+    HTML for a post body written in a small subset of Markdown: paragraphs, headings,
+    lists, block quotes, emphasis, code spans and http(s) links.
+
+    Everything is escaped before any markup is added, so the only tags in the output are
+    the ones produced here and no attributes besides link targets. Code spans, links, strong
+    and emphasis are each matched within the text the previous ones left, so tags always nest.
+    """
+    blocks = re.split(r'\n\s*\n', text.replace('\r\n', '\n').strip())
+    return '\n'.join(_block(block.strip('\n')) for block in blocks if block.strip())
@@ -0,0 +1,17 @@
+import datetime
+from typing import Iterable, Tuple
+
+
+def streaks(days: Iterable[datetime.date]) -> Tuple[int, int]:
+    """
+    The length of the run of consecutive days ending at the last of `days`, and of the longest
+    such run. `days` must be distinct and in order.
+    """
+    current = 0
+    longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == datetime.timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
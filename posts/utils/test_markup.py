@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+from .markup import render
+
+
+class MarkupTestCase(SimpleTestCase):
+
+    def test_paragraphs_and_line_breaks(self):
+        self.assertEqual(render('one\ntwo\n\nthree'), '<p>one<br>\ntwo</p>\n<p>three</p>')
+
+    def test_headings_lists_and_quotes(self):
+        self.assertEqual(render('## Monday'), '<h2>Monday</h2>')
+        self.assertEqual(render('- eggs\n- milk'), '<ul><li>eggs</li><li>milk</li></ul>')
+        self.assertEqual(render('> said\n> twice'), '<blockquote><p>said<br>\ntwice</p></blockquote>')
+
+    def test_inline_formatting(self):
+        self.assertEqual(
+            render('**bold**, *em* and `**code**`'),
+            '<p><strong>bold</strong>, <em>em</em> and <code>**code**</code></p>'
+        )
+        self.assertEqual(render('snake_case_name'), '<p>snake_case_name</p>')
+
+    def test_links(self):
+        self.assertEqual(
+            render('[site](https://example.com/?a=1&b=2)'),
+            '<p><a href="https://example.com/?a=1&amp;b=2" rel="nofollow noopener">site</a></p>'
+        )
+
+    def test_formatting_does_not_reach_into_links(self):
+        self.assertEqual(
+            render('[a](http://x.com/**b) and c**'),
+            '<p><a href="http://x.com/**b" rel="nofollow noopener">a</a> and c**</p>'
+        )
+        self.assertEqual(
+            render('*see [a](https://x.com/a_b*c) now*'),
+            '<p>*see <a href="https://x.com/a_b*c" rel="nofollow noopener">a</a> now*</p>'
+        )
+        self.assertEqual(
+            render('[**bold** link](https://x.com/_a_)'),
+            '<p><a href="https://x.com/_a_" rel="nofollow noopener"><strong>bold</strong> link</a></p>'
+        )
+
+    def test_overlapping_formatting_stays_nested(self):
+        self.assertEqual(render('**a *b** c*'), '<p><strong>a *b</strong> c*</p>')
+        self.assertEqual(render('**a *b* c**'), '<p><strong>a <em>b</em> c</strong></p>')
+
+    def test_html_is_escaped(self):
+        self.assertEqual(render('<script>alert(1)</script>'), '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+
+    def test_unsafe_links_are_left_as_text(self):
+        self.assertNotIn('<a', render('[x](javascript:alert(1))'))
+        self.assertNotIn('onmouseover="', render('[x](https://example.com/"onmouseover="alert(1))'))
+
+    def test_blank_text(self):
+        self.assertEqual(render(''), '')
+        self.assertEqual(render('\n\n  \n'), '')
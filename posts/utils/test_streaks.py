@@ -0,0 +1,23 @@
+import datetime
+
+from django.test import SimpleTestCase
+from .streaks import streaks
+
+
+def days(*offsets):
+    return [datetime.date(2020, 1, 1) + datetime.timedelta(days=offset) for offset in offsets]
+
+
+class StreaksTestCase(SimpleTestCase):
+
+    def test_no_days(self):
+        self.assertEqual(streaks([]), (0, 0))
+
+    def test_current_streak_ends_at_last_day(self):
+        self.assertEqual(streaks(days(0, 1, 2, 5, 6)), (2, 3))
+
+    def test_single_days(self):
+        self.assertEqual(streaks(days(0, 2, 4)), (1, 1))
+
+    def test_runs_across_months(self):
+        self.assertEqual(streaks(days(29, 30, 31, 32)), (4, 4))
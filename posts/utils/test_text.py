@@ -0,0 +1,45 @@
+from django.test import TestCase
+from .text import excerpt, reading_time, splice, word_count
+
+
+class TextUtilsTestCase(TestCase):
+
+    def test_excerpt_keeps_short_text(self):
+        self.assertEqual(excerpt('short text', 20), 'short text')
+
+    def test_excerpt_cuts_at_word_boundary(self):
+        self.assertEqual(excerpt('the quick brown fox jumps', 12), 'the quick…')
+
+    def test_excerpt_cuts_long_words(self):
+        self.assertEqual(excerpt('a' * 30, 10), 'a' * 10 + '…')
+
+    def test_word_count_splits_on_any_whitespace(self):
+        self.assertEqual(word_count('one two\nthree\t four  '), 4)
+
+    def test_reading_time_rounds_up(self):
+        self.assertEqual(reading_time(0), 0)
+        self.assertEqual(reading_time(1), 1)
+        self.assertEqual(reading_time(401), 3)
+
+    def test_splice_applies_ops_against_original_offsets(self):
+        ops = [(0, 3, 'a'), (10, 15, 'red'), (19, 19, '!')]
+        self.assertEqual(splice('the quick brown fox', ops), 'a quick red fox!')
+
+    def test_splice_without_ops_is_identity(self):
+        self.assertEqual(splice('text', []), 'text')
+
+    def test_splice_rejects_bad_ops(self):
+        for ops in [[(2, 1, '')], [(0, 5, '')], [(2, 3, ''), (1, 2, '')], [(-1, 0, '')]]:
+            with self.assertRaises(ValueError):
+                splice('text', ops)
+
+    def test_splice_offsets_are_utf16_code_units(self):
+        # Each emoji is two code units in JavaScript but one character in Python
+        self.assertEqual(splice('😀 hi 😀 there', [(6, 8, '🙂'), (9, 14, 'you')]), '😀 hi 🙂 you')
+        self.assertEqual(splice('é😀', [(3, 3, '!')]), 'é😀!')
+        self.assertEqual(splice('😀 text', [(7, 7, '!')]), '😀 text!')
+
+    def test_splice_rejects_splitting_surrogate_pairs(self):
+        for ops in [[(1, 1, 'x')], [(0, 1, '')], [(1, 2, '')]]:
+            with self.assertRaises(ValueError):
+                splice('😀', ops)
@@ -0,0 +1,53 @@
+import math
+from typing import Iterable, Tuple
+
+WORDS_PER_MINUTE = 200
+
+
+def excerpt(text: str, length: int) -> str:
+    """
+    The first `length` characters of `text`, cut back to a word boundary where that
+    doesn't lose more than half of it, with an ellipsis if anything was dropped.
+    """
+    if len(text) <= length:
+        return text
+
+    cut = text[:length]
+    boundary = cut.rfind(' ')
+    if boundary > length // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + '…'
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def reading_time(words: int) -> int:
+    """
+    Minutes to read `words` words, rounded up.
+    """
+    return math.ceil(words / WORDS_PER_MINUTE)
+
+
+def splice(text: str, ops: Iterable[Tuple[int, int, str]]) -> str:
+    """
+    Replaces each `text[start:end]` with the op's replacement. Offsets are in UTF-16 code units,
+    as in JavaScript strings, and refer to the original text, so ops must be in order and must not
+    overlap. Edits that would leave half of a surrogate pair behind are rejected.
+    """
+    # Two bytes per code unit, so code unit offsets index it directly
+    units = text.encode('utf-16-le')
+    pieces = []
+    position = 0
+    for start, end, replacement in ops:
+        if not position <= start <= end <= len(units) // 2:
+            raise ValueError(f'Splice {start}:{end} is out of order or out of range')
+        pieces.append(units[2 * position:2 * start])
+        pieces.append(replacement.encode('utf-16-le'))
+        position = end
+    pieces.append(units[2 * position:])
+    try:
+        return b''.join(pieces).decode('utf-16-le')
+    except UnicodeDecodeError:
+        raise ValueError('Splices leave half of a surrogate pair behind')
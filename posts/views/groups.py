@@ -11,7 +11,7 @@ from posts import errors
 from posts import models
 from posts import permissions
 from posts import serializers
-from posts.views.mixins import UsernameScopedMixin
+from posts.views.mixins import ConditionalGetMixin, UsernameScopedMixin
 
 from posts.utils.dict import without
 
@@ -37,7 +37,7 @@ def _update_members(
     return members
 
 
-class FriendGroupsView(generics.GenericAPIView, UsernameScopedMixin):
+class FriendGroupsView(ConditionalGetMixin, generics.GenericAPIView, UsernameScopedMixin):
     permission_classes = (IsAuthenticated, permissions.IsUser)
 
     def get(self, request: Request, username: str, *args, **kwargs):
@@ -45,7 +45,10 @@ class FriendGroupsView(generics.GenericAPIView, UsernameScopedMixin):
 
         groups = models.FriendGroup.objects.filter(owner=user)
 
-        return Response([serializers.FriendGroupSerializer(group).data for group in groups])
+        return self.conditional_response(
+            request, [(groups, 'last_modified')],
+            lambda: Response([serializers.FriendGroupSerializer(group).data for group in groups])
+        )
 
     def post(self, request: Request, username: str, *args, **kwargs):
         user = self.get_user_or_404(username)
@@ -78,14 +81,25 @@ class FriendGroupsView(generics.GenericAPIView, UsernameScopedMixin):
             return Response(group.data, status=201)
 
 
-class FriendGroupView(generics.GenericAPIView, UsernameScopedMixin):
+class FriendGroupView(ConditionalGetMixin, generics.GenericAPIView, UsernameScopedMixin):
     permission_classes = (IsAuthenticated, permissions.IsUser)
 
     def get(self, request: Request, username: str, group_id: int, *args, **kwargs):
         user = self.get_user_or_404(username)
-        current_group = get_object_or_404(models.FriendGroup, owner=user, pk=group_id)
 
-        return Response(serializers.FriendGroupSerializer(current_group, expanded_fields='members').data)
+        probes = [
+            (models.FriendGroup.objects.filter(owner=user, pk=group_id), 'last_modified'),
+            (models.FriendGroupMember.objects.filter(group__owner=user, group_id=group_id), 'last_modified'),
+            # Members are listed by username, and renames show up on their profiles
+            (models.FriendGroupMember.objects.filter(group__owner=user, group_id=group_id),
+             'member__profile__last_modified'),
+        ]
+
+        def respond():
+            current_group = get_object_or_404(models.FriendGroup, owner=user, pk=group_id)
+            return Response(serializers.FriendGroupSerializer(current_group, expanded_fields='members').data)
+
+        return self.conditional_response(request, probes, respond)
 
     def put(self, request: Request, username: str, group_id: int, *args, **kwargs):
         user = self.get_user_or_404(username)
@@ -120,7 +134,7 @@ class FriendGroupView(generics.GenericAPIView, UsernameScopedMixin):
         return Response('', status=204)
 
 
-class FriendGroupMemberView(generics.GenericAPIView, UsernameScopedMixin):
+class FriendGroupMemberView(ConditionalGetMixin, generics.GenericAPIView, UsernameScopedMixin):
     permission_classes = (IsAuthenticated, permissions.IsUser)
 
     def get(self, request: Request, username: str, group_id: int, *args, **kwargs):
@@ -129,7 +143,10 @@ class FriendGroupMemberView(generics.GenericAPIView, UsernameScopedMixin):
 
         members = models.FriendGroupMember.objects.filter(group=group)
 
-        return Response([serializers.RelatedUserSerializer(record.member).data for record in members])
+        return self.conditional_response(
+            request, [(members, 'last_modified'), (members, 'member__profile__last_modified')],
+            lambda: Response([serializers.RelatedUserSerializer(record.member).data for record in members])
+        )
 
     def put(self, request: Request, username: str, group_id: int, *args, **kwargs):
         user = self.get_user_or_404(username)
@@ -1,5 +1,16 @@
+import hashlib
+from typing import Callable, Iterable, Tuple
+
 from django.contrib.auth import get_user_model
+from django.db.models import Count, Max, QuerySet
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
+from rest_framework.request import Request
+
 from posts import errors
+from posts.audience import Audience
 
 
 class UsernameScopedMixin:
@@ -16,3 +27,48 @@ class UsernameScopedMixin:
             self.check_object_permissions(self.request, user)
 
         return user
+
+
+class AudienceMixin:
+    """
+    Gives views an `Audience` for the current user that lasts for the request.
+    """
+
+    @cached_property
+    def audience(self) -> Audience:
+        return Audience(self.request.user)
+
+
+class ConditionalGetMixin:
+    """
+    Lets GET handlers answer 304 Not Modified from a cheap probe instead of
+    re-querying and re-serializing their payload.
+
+    Each probe is a queryset and the name of a `last_modified` style field on it,
+    and costs one `max(field), count(*)` query. The count catches deletions, which
+    don't move the maximum.
+    """
+
+    def conditional_response(
+        self, request: Request, probes: Iterable[Tuple[QuerySet, str]], respond: Callable[[], HttpResponseBase]
+    ) -> HttpResponseBase:
+        validators = [
+            tuple(queryset.order_by().aggregate(modified=Max(field), count=Count('pk')).values())
+            for queryset, field in probes
+        ]
+        modified = [last_modified for last_modified, _ in validators if last_modified is not None]
+        last_modified = int(max(modified).timestamp()) if modified else None
+
+        # The same rows render differently depending on the query string, viewer and renderer
+        key = (request.get_full_path(), request.user.pk, request.accepted_renderer.format, validators)
+        etag = quote_etag(hashlib.md5(repr(key).encode('utf-8')).hexdigest())
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -1,20 +1,341 @@
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, NullIf
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.html import escape
+from rest_framework import generics
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
 
-from posts.models import Post
+from posts.models import Post, PostDayCount, PostTombstone
+from posts import caching
+from posts import daycounts
+from posts import errors
+from posts import export
+from posts import feeds
 from posts import filters
+from posts import pagination
+from posts import permissions
 from posts import serializers
+from posts.pagination import seek
+from posts.utils import fastjson, text
+from posts.views.mixins import AudienceMixin, ConditionalGetMixin, UsernameScopedMixin
+
+# Wrapped around matches in search snippets before they are HTML-escaped, then swapped for <mark> tags
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
 
 
-class PostViewSet(viewsets.ModelViewSet):
+def _settled_txid() -> int:
+    """
+    Every transaction with a lower ID has finished, so no more rows can be written below it.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT txid_snapshot_xmin(txid_current_snapshot())')
+        return cursor.fetchone()[0]
+
+
+class PostViewSet(AudienceMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows posts to be viewed or edited.
     """
-    permission_classes = (IsAuthenticated, )
+    permission_classes = (IsAuthenticated, permissions.CanViewPostOrIsAuthor)
     queryset = Post.objects.all()
     serializer_class = serializers.PostSerializer
 
     filterset_class = filters.PostFilterSet
+    pagination_class = pagination.KeysetPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.select_related('author').defer('inline_body')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'timeline'):
+            return serializers.PostSummarySerializer
+        if self.action == 'search':
+            return serializers.PostSearchResultSerializer
+        if self.action == 'bulk_import':
+            return serializers.PostImportSerializer
+        return super().get_serializer_class()
+
+    def serialize_cached(self, posts):
+        return caching.serialize_posts(posts, self.get_serializer_class(), self.get_serializer_context())
+
+    def list(self, request: Request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).visible_to(request.user)
+        # Only the rows on the requested page can change what it shows
+        return self.conditional_response(
+            request, self.probes(self.paginator.window(queryset, request)),
+            lambda: self.get_paginated_response(self.serialize_cached(self.paginate_queryset(queryset)))
+        )
+
+    def retrieve(self, request: Request, *args, **kwargs):
+        queryset = self.get_queryset().filter(pk=kwargs['pk'])
+        return self.conditional_response(
+            request, self.probes(queryset), lambda: Response(self.serialize_cached([self.get_object()])[0])
+        )
+
+    def probes(self, queryset):
+        # Payloads embed the author, whose changes show up on their profile rather than the post
+        return [(queryset, 'last_modified'), (queryset, 'author__profile__last_modified')]
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+
+    def partial_update(self, request: Request, *args, **kwargs):
+        """
+        With `ops`, edits the body as a list of `{start, end, text}` splices against the version
+        last modified at `base` instead of replacing it. Offsets are in UTF-16 code units, as JavaScript
+        counts them. Fails with 409 if the post has changed since.
+        """
+        if 'ops' not in request.data:
+            return super().partial_update(request, *args, **kwargs)
+
+        delta = serializers.PostDeltaSerializer(data=request.data)
+        delta.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            post = generics.get_object_or_404(self.get_queryset().select_for_update(), pk=kwargs['pk'])
+            self.check_object_permissions(request, post)
+
+            if post.last_modified != delta.validated_data['base']:
+                current = serializers.PostVersionSerializer(post).data['last_modified']
+                raise errors.ResponseException(errors.StaleVersionError(current), 409)
+
+            ops = [(op['start'], op['end'], op['text']) for op in delta.validated_data['ops']]
+            try:
+                body = text.splice(post.body, ops)
+            except ValueError:
+                raise errors.ResponseException(errors.InvalidFieldsError(['ops']), 400)
+            if len(body) > serializers.POST_BODY_MAX_LENGTH:
+                raise errors.ResponseException(errors.InvalidFieldsError(['ops']), 400)
+
+            post.body = body
+            if 'title' in delta.validated_data:
+                post.title = delta.validated_data['title']
+            if post.has_unsaved_changes():
+                post.save()
+
+        # The client already has the body, so it only needs the version to base its next edit on
+        return Response(serializers.PostVersionSerializer(post).data)
+
+    @action(detail=False)
+    def timeline(self, request: Request, *args, **kwargs):
+        """
+        Posts the current user may see from the people they follow, read from their materialized feed.
+        Takes the same filters as the post list.
+        """
+        filterset = self.filterset_class(request.query_params, queryset=Post.objects.none(), request=request)
+        if not filterset.is_valid():
+            raise errors.ResponseException(errors.InvalidFieldsError(list(filterset.errors)), 400)
+        lookups = filterset.lookups()
+
+        page = self.paginator.paginate_with(
+            lambda position, limit: feeds.read(request.user, position, limit, lookups), request, self
+        )
+        return self.get_paginated_response(self.serialize_cached(page))
+
+    @action(detail=False)
+    def changes(self, request: Request, *args, **kwargs):
+        """
+        Posts the current user can see that were created or updated since the `since` token from a previous
+        call, and posts they could see that were deleted or hidden from them since, in commit order.
+        Leaving out `since` starts a sync from scratch. Keep calling with the returned token while `more` is set.
+
+        Rows are ordered by the ID of the transaction that wrote them and only read up to the oldest transaction
+        still running, so a long transaction can't commit rows behind a token that was already handed out.
+        """
+        since = request.query_params.get('since')
+        if since:
+            positions = pagination.decode_positions(since, 2, int)
+            if positions is None:
+                raise errors.ResponseException(errors.InvalidFieldsError(['since']), 400)
+            changed_position, deleted_position = positions
+        else:
+            changed_position, deleted_position = None, None
+
+        limit = self.paginator.get_page_size(request)
+        settled = _settled_txid()
+
+        queryset = Post.objects.visible_to(request.user).filter(change_txid__lt=settled)
+        queryset = queryset.select_related('author', 'stored_body')
+        if 'html' in request.query_params.get('expand', '').split(','):
+            queryset = queryset.select_related('rendering')
+        changed = list(seek(queryset, changed_position, ('change_txid', 'id'), ascending=True)[:limit + 1])
+        deleted = list(seek(
+            PostTombstone.objects.visible_to(request.user).filter(change_txid__lt=settled),
+            deleted_position, ('change_txid', 'id'), ascending=True
+        )[:limit + 1])
+
+        more = len(changed) > limit or len(deleted) > limit
+        changed, deleted = changed[:limit], deleted[:limit]
+
+        if changed:
+            changed_position = (changed[-1].change_txid, changed[-1].pk)
+        if deleted:
+            deleted_position = (deleted[-1].change_txid, deleted[-1].pk)
+
+        return Response({
+            'changed': caching.serialize_posts(changed, serializers.PostSerializer, self.get_serializer_context()),
+            # A post can be hidden more than once before a sync catches up
+            'deleted': list(dict.fromkeys(tombstone.post_id for tombstone in deleted)),
+            'since': pagination.encode_positions([changed_position, deleted_position]),
+            'more': more
+        })
+
+    @action(detail=False)
+    def search(self, request: Request, *args, **kwargs):
+        """
+        The best matches for `q` among the posts the current user may see, with highlighted snippets.
+        """
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            raise errors.ResponseException(errors.MissingFieldsError(['q']), 400)
+
+        query = SearchQuery(q, config=settings.POST_SEARCH_CONFIG, search_type='websearch')
+        matches = Post.objects.visible_to(request.user).filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-created_at', '-id').values_list('pk', 'rank')[:self.paginator.get_page_size(request)]
+        matches = list(matches)
+        ranks = dict(matches)
+        order = {pk: index for index, (pk, _) in enumerate(matches)}
+
+        # Headlines are expensive, so they are only computed for the page of matches. Compressed
+        # bodies aren't readable from SQL, so those posts are highlighted within their excerpt.
+        posts = Post.objects.filter(pk__in=ranks).select_related('author').defer('inline_body').annotate(
+            snippet=SearchHeadline(
+                Coalesce(NullIf('inline_body', Value('')), 'excerpt'), query,
+                config=settings.POST_SEARCH_CONFIG, start_sel=HIGHLIGHT_START, stop_sel=HIGHLIGHT_STOP
+            )
+        )
+
+        results = sorted(posts, key=lambda post: order[post.pk])
+        for post in results:
+            post.rank = ranks[post.pk]
+            post.snippet = escape(post.snippet).replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+        return Response(self.get_serializer(results, many=True).data)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request: Request, *args, **kwargs):
+        """
+        Creates posts for the current user from an NDJSON body, one post object per line. Lines can carry
+        the `created_at` of posts written elsewhere, such as in an export.
+        The body is read as a stream and inserted `POST_IMPORT_BATCH_SIZE` posts at a time, all in one
+        transaction. Invalid lines are skipped and reported by line number.
+        """
+        imported = 0
+        failed = 0
+        failures = []
+        batch = []
+
+        with transaction.atomic():
+            for number, line in enumerate(request.stream or (), start=1):
+                if not line.strip():
+                    continue
+
+                try:
+                    row = fastjson.loads(line)
+                except ValueError:
+                    row = None
+                if isinstance(row, dict):
+                    serializer = self.get_serializer(data=row)
+                    valid = serializer.is_valid()
+                    line_errors = serializer.errors
+                else:
+                    valid = False
+                    line_errors = {'non_field_errors': ['Expected a JSON object.']}
+
+                if not valid:
+                    failed += 1
+                    if len(failures) < settings.POST_IMPORT_MAX_ERRORS:
+                        failures.append({'line': number, 'errors': line_errors})
+                    continue
+
+                batch.append(Post(author=request.user, **serializer.validated_data))
+                if len(batch) >= settings.POST_IMPORT_BATCH_SIZE:
+                    imported += len(Post.objects.bulk_create_posts(batch))
+                    batch = []
+
+            if batch:
+                imported += len(Post.objects.bulk_create_posts(batch))
+
+        return Response({'imported': imported, 'failed': failed, 'errors': failures})
+
+
+class AuthorPostsView(generics.GenericAPIView, UsernameScopedMixin):
+    """
+    Lists one user's posts, newest first. Other people only see the posts they're allowed to.
+    """
+    permission_classes = (IsAuthenticated, )
+    serializer_class = serializers.PostSummarySerializer
+    pagination_class = pagination.KeysetPagination
+
+    def get(self, request: Request, username: str, *args, **kwargs):
+        author = self.get_user_or_404(username, check=False)
+
+        queryset = Post.objects.filter(author=author)
+        if author != request.user:
+            queryset = queryset.visible_to(request.user)
+
+        page = self.paginate_queryset(queryset.select_related('author').defer('inline_body'))
+        return self.get_paginated_response(
+            caching.serialize_posts(page, self.get_serializer_class(), self.get_serializer_context())
+        )
+
+
+class CalendarView(ConditionalGetMixin, generics.GenericAPIView, UsernameScopedMixin):
+    """
+    How many posts a user wrote on each day and in each month of `?year=`, the current year by default.
+    Other people only see public posts counted.
+    """
+    permission_classes = (IsAuthenticated, )
+
+    def get(self, request: Request, username: str, *args, **kwargs):
+        author = self.get_user_or_404(username, check=False)
+
+        year = request.query_params.get('year', str(timezone.localdate().year))
+        if not year.isdigit() or not 1 <= int(year) <= 9999:
+            raise errors.ResponseException(errors.InvalidFieldsError(['year']), 400)
+
+        public_only = author != request.user
+        return self.conditional_response(
+            request,
+            [(PostDayCount.objects.filter(author=author), 'last_modified')],
+            lambda: Response(daycounts.calendar(author.pk, int(year), public_only))
+        )
+
+
+class ExportView(generics.GenericAPIView, UsernameScopedMixin):
+    """
+    Streams all of a user's posts, as NDJSON or, with `?output=zip`, as a zip archive with a file per post.
+    """
+    permission_classes = (IsAuthenticated, permissions.IsUser)
+
+    OUTPUTS = {
+        'ndjson': (export.ndjson, 'application/x-ndjson'),
+        'zip': (export.zip_archive, 'application/zip'),
+    }
+
+    def get(self, request: Request, username: str, *args, **kwargs):
+        user = self.get_user_or_404(username)
+
+        # Not `format`, which DRF reserves for picking a renderer
+        output = request.query_params.get('output', 'ndjson')
+        if output not in self.OUTPUTS:
+            raise errors.ResponseException(errors.InvalidFieldsError(['output']), 400)
+        encode, content_type = self.OUTPUTS[output]
+
+        response = StreamingHttpResponse(encode(export.entries(user)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{user.username}-journal.{output}"'
+        return response
@@ -121,6 +121,40 @@ class FriendGroupViewTest(AuthTestCase):
         self.assertEqual('Some Group', body['name'])
         self.assertEqual([{'username': self.other.username}], body['members'])
 
+    def test_group_not_modified_until_members_change(self):
+        """Fetching an unchanged group with its ETag gets a 304"""
+        self.client.force_login(self.user)
+        group = FriendGroup.objects.create(owner=self.user, name="Some Group")
+
+        etag = self.client.get(f'/users/{self.user.username}/groups/{group.pk}/')['ETag']
+        response = self.client.get(f'/users/{self.user.username}/groups/{group.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+        FriendGroupMember.objects.create(group=group, member=self.other)
+        response = self.client.get(f'/users/{self.user.username}/groups/{group.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+    def test_group_etag_changes_when_a_member_is_renamed(self):
+        """Members are listed by username, so renaming one changes the group's ETag"""
+        group = FriendGroup.objects.create(owner=self.user, name="Some Group")
+        FriendGroupMember.objects.create(group=group, member=self.other)
+
+        self.client.force_login(self.user)
+        base = f'/users/{self.user.username}/groups/{group.pk}/'
+        urls = [base, f'{base}members/']
+        etags = [self.client.get(url)['ETag'] for url in urls]
+
+        self.client.force_login(self.other)
+        response = self.client.patch(f'/users/{self.other.username}/', data=json.dumps({'username': 'renamed'}),
+                                     content_type='application/json')
+        self.assertEqual(200, response.status_code)
+
+        self.client.force_login(self.user)
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(200, response.status_code)
+            self.assertIn('renamed', response.content.decode())
+
     def test_can_change_group_name(self):
         """We can change a group's name"""
         self.client.force_login(self.user)
@@ -1,8 +1,19 @@
+import datetime
+import io
 import json
+import threading
+import zipfile
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from posts.tests.utils import AuthTestCase
-from posts.models import Post
+from posts import feeds
+from posts import pagination
+from posts.tests.utils import AuthTestCase, AuthTransactionTestCase
+from posts.models import Follow, FriendGroup, FriendGroupMember, Post, PostPermission
 
 
 class PostUserViewTest(AuthTestCase):
@@ -35,7 +46,9 @@ class PostUserViewTest(AuthTestCase):
 
         # verify
         self.assertEqual(201, response.status_code)
-        self.assertEqual(set(body.keys()), set(['id', 'author', 'created_at', 'title', 'body', 'last_modified']))
+        self.assertEqual(set(body.keys()), set([
+            'id', 'author', 'created_at', 'title', 'body', 'visibility_type', 'access_group', 'last_modified'
+        ]))
         self.assertEqual(body['author']['id'], self.user.pk)
         self.assertEqual(body['author']['username'], self.user.username)
         self.assertEqual(body['title'], payload['title'])
@@ -43,6 +56,82 @@ class PostUserViewTest(AuthTestCase):
         self.assertIsNotNone(body['created_at'])
         self.assertIsNotNone(body['last_modified'])
 
+    def test_created_posts_default_to_friends(self):
+        """Posts made without a visibility are shown to the author's friends"""
+        Follow.objects.create(follower=self.user, followee=self.other_user)
+        self.client.force_login(self.user)
+        response = self.client.post('/posts/', data=json.dumps({'title': 't', 'body': 'b'}),
+                                    content_type='application/json')
+        self.assertEqual('all_friends', response.json()['visibility_type'])
+        self.assertIsNone(response.json()['access_group'])
+
+        self.client.force_login(self.other_user)
+        self.assertEqual(200, self.client.get(f"/posts/{response.json()['id']}/").status_code)
+
+    def test_can_post_to_own_friend_group(self):
+        """Friend group posts need one of the author's own groups"""
+        self.client.force_login(self.user)
+        mine = FriendGroup.objects.create(owner=self.user, name='mine')
+        theirs = FriendGroup.objects.create(owner=self.other_user, name='theirs')
+
+        def create(**payload):
+            return self.client.post('/posts/', data=json.dumps({'title': 't', 'body': 'b', **payload}),
+                                    content_type='application/json')
+
+        response = create(visibility_type='friend_group', access_group=mine.pk)
+        self.assertEqual(201, response.status_code)
+        self.assertEqual(mine.pk, Post.objects.get(pk=response.json()['id']).access_group_id)
+
+        self.assertEqual(400, create(visibility_type='friend_group').status_code)
+        self.assertEqual(400, create(visibility_type='friend_group', access_group=theirs.pk).status_code)
+        self.assertEqual(400, create(visibility_type='everyone').status_code)
+
+    def test_can_change_visibility(self):
+        """Visibility can be changed on its own"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(author=self.user, title='t', body='b', visibility_type='private')
+
+        response = self.client.patch(f'/posts/{post.pk}/', data=json.dumps({'visibility_type': 'public'}),
+                                     content_type='application/json')
+
+        self.assertEqual(200, response.status_code)
+        post.refresh_from_db()
+        self.assertEqual('public', post.visibility_type)
+
+    def test_only_the_author_can_write(self):
+        """Other people can't edit or delete a post, whether or not they can see it"""
+        self.client.force_login(self.other_user)
+        for visibility_type in ['private', 'public']:
+            post = Post.objects.create(author=self.user, title='t', body='b', visibility_type=visibility_type)
+            url = f'/posts/{post.pk}/'
+            writes = [
+                ('put', {'title': 'x', 'body': 'x', 'visibility_type': 'public'}),
+                ('patch', {'visibility_type': 'public'}),
+                ('patch', {}),
+                ('patch', {'base': post.last_modified.isoformat(), 'ops': [{'start': 0, 'end': 1, 'text': 'x'}]}),
+                ('delete', None),
+            ]
+            for method, data in writes:
+                with self.subTest(visibility_type=visibility_type, method=method, data=data):
+                    response = getattr(self.client, method)(url, data=json.dumps(data), content_type='application/json')
+                    self.assertEqual(403, response.status_code)
+                    self.assertNotIn('body', response.json())
+
+            post.refresh_from_db()
+            self.assertEqual(('t', 'b', visibility_type), (post.title, post.body, post.visibility_type))
+
+    def test_list_only_shows_visible_posts(self):
+        """Other people's posts are only listed when the viewer may see them"""
+        self.client.force_login(self.user)
+        mine = Post.objects.create(author=self.user, title='mine', body='b', visibility_type='private')
+        public = Post.objects.create(author=self.other_user, title='public', body='b', visibility_type='public')
+        Post.objects.create(author=self.other_user, title='private', body='b', visibility_type='private')
+        Post.objects.create(author=self.other_user, title='friends', body='b', visibility_type='all_friends')
+
+        response = self.client.get('/posts/')
+
+        self.assertEqual({mine.pk, public.pk}, {post['id'] for post in response.json()})
+
     def test_can_update_content(self):
         """We should be able to update a new post"""
         self.client.force_login(self.user)
@@ -133,6 +222,26 @@ class PostUserViewTest(AuthTestCase):
 
         self.assertEqual(200, response.status_code)
 
+    def test_get_post_with_html(self):
+        """Rendered HTML is only included when asked for"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='*hi* <b>', author=self.user)
+
+        self.assertNotIn('html', self.client.get(f'/posts/{post.id}/').json())
+
+        body = self.client.get(f'/posts/{post.id}/', {'expand': 'html'}).json()
+        self.assertEqual('<p><em>hi</em> &lt;b&gt;</p>', body['html'])
+
+    def test_cannot_get_post_we_cannot_see(self):
+        """Getting someone else's post needs us to be in its audience"""
+        self.client.force_login(self.user)
+        hidden = Post.objects.create(title='t', body='b', author=self.other_user, visibility_type='private')
+        shown = Post.objects.create(title='t', body='b', author=self.other_user, visibility_type='all_friends')
+        Follow.objects.create(follower=self.other_user, followee=self.user)
+
+        self.assertEqual(403, self.client.get(f'/posts/{hidden.id}/').status_code)
+        self.assertEqual(200, self.client.get(f'/posts/{shown.id}/').status_code)
+
     def test_delete_post(self):
         """Can we delete a post"""
         self.client.force_login(self.user)
@@ -141,3 +250,882 @@ class PostUserViewTest(AuthTestCase):
         response = self.client.delete(f'/posts/{post.id}/')
         self.assertEqual(204, response.status_code)
         self.assertEqual(response.content, b'')
+
+    def test_posts_are_paginated_newest_first(self):
+        """Posts come back newest first, a page at a time, with a cursor for the next page"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(title=f'title{i}', body='body', author=self.user) for i in range(5)]
+
+        response = self.client.get('/posts/', {'page_size': 2})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([posts[4].pk, posts[3].pk], [post['id'] for post in response.json()])
+
+        seen = [post['id'] for post in response.json()]
+        while response.has_header('Link'):
+            next_url = response['Link'][1:response['Link'].index('>')]
+            response = self.client.get(next_url)
+            self.assertEqual(200, response.status_code)
+            seen += [post['id'] for post in response.json()]
+
+        self.assertEqual([post.pk for post in reversed(posts)], seen)
+
+    def test_posts_pagination_respects_filters(self):
+        """The cursor composes with the created_at filters"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(title=f'title{i}', body='body', author=self.user) for i in range(4)]
+
+        response = self.client.get('/posts/', {'page_size': 1, 'created_at__lt': posts[3].created_at})
+        self.assertEqual([posts[2].pk], [post['id'] for post in response.json()])
+
+        next_url = response['Link'][1:response['Link'].index('>')]
+        response = self.client.get(next_url)
+        self.assertEqual([posts[1].pk], [post['id'] for post in response.json()])
+
+    def test_posts_invalid_cursor_fails(self):
+        """A cursor we didn't issue is rejected"""
+        self.client.force_login(self.user)
+
+        response = self.client.get('/posts/', {'cursor': 'nonsense'})
+        self.assertEqual(400, response.status_code)
+        self.assertEqual(response.json()['type'], 'invalid-fields')
+
+    def test_post_list_returns_excerpts(self):
+        """List items carry the stored excerpt and counts instead of the body"""
+        self.client.force_login(self.user)
+        Post.objects.create(title='title', body='word ' * 1000, author=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/posts/')
+        body = response.json()
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('body', body[0])
+        self.assertTrue(body[0]['excerpt'].startswith('word word'))
+        self.assertLess(len(body[0]['excerpt']), 300)
+        self.assertEqual(body[0]['word_count'], 1000)
+        self.assertEqual(body[0]['reading_time'], 5)
+        self.assertFalse(any('"posts_post"."body"' in query['sql'] for query in queries.captured_queries))
+
+    def test_post_detail_returns_body(self):
+        """The full body comes from the detail route"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='word ' * 1000, author=self.user)
+
+        response = self.client.get(f'/posts/{post.pk}/')
+        self.assertEqual(post.body, response.json()['body'])
+
+    def test_updating_body_updates_excerpt(self):
+        """Excerpts are recomputed when the body changes"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='old', author=self.user)
+
+        self.client.put(
+            f'/posts/{post.pk}/', data=json.dumps({'title': 'title', 'body': 'new body'}),
+            content_type='application/json'
+        )
+        post.refresh_from_db()
+        self.assertEqual('new body', post.excerpt)
+        self.assertEqual(2, post.word_count)
+
+    def test_post_list_not_modified(self):
+        """Repeating a list request with its ETag gets a 304 until a post changes"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='body', author=self.user)
+
+        response = self.client.get('/posts/')
+        etag = response['ETag']
+
+        response = self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.content)
+
+        post.title = 'new title'
+        post.save()
+        response = self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+
+    def test_post_list_etag_only_covers_its_page(self):
+        """Changes to posts past the requested page don't invalidate it, but new posts on it do"""
+        self.client.force_login(self.user)
+        older = Post.objects.create(title='title', body='body', author=self.user)
+        Post.objects.create(title='title', body='body', author=self.user)
+        Post.objects.create(title='title', body='body', author=self.user)
+
+        etag = self.client.get('/posts/', {'page_size': 1})['ETag']
+        older.title = 'new title'
+        older.save()
+        response = self.client.get('/posts/', {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+        Post.objects.create(title='title', body='body', author=self.user)
+        response = self.client.get('/posts/', {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+    def test_post_etags_change_when_author_is_renamed(self):
+        """Posts embed their author's username, so renaming the author changes their ETags"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='body', author=self.user, visibility_type='public')
+        urls = ['/posts/', f'/posts/{post.pk}/']
+        etags = [self.client.get(url)['ETag'] for url in urls]
+
+        response = self.client.patch(f'/users/{self.user.username}/', data=json.dumps({'username': 'renamed'}),
+                                     content_type='application/json')
+        self.assertEqual(200, response.status_code)
+
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(200, response.status_code)
+            self.assertIn('renamed', response.content.decode())
+
+    def test_post_list_etag_changes_on_delete(self):
+        """Deleting a post changes the list's ETag even though no remaining post changed"""
+        self.client.force_login(self.user)
+        Post.objects.create(title='title', body='body', author=self.user)
+        post = Post.objects.create(title='title', body='body', author=self.user)
+
+        etag = self.client.get('/posts/')['ETag']
+        post.delete()
+
+        response = self.client.get('/posts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
+    def test_post_detail_not_modified_since(self):
+        """A post can be revalidated with If-Modified-Since"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='title', body='body', author=self.user)
+
+        response = self.client.get(f'/posts/{post.pk}/')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(f'/posts/{post.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(304, response.status_code)
+
+
+class TimelineViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+        Follow.objects.create(follower=self.user, followee=self.other_user)
+
+    def timeline_ids(self):
+        response = self.client.get('/posts/timeline/')
+        self.assertEqual(200, response.status_code)
+        return [post['id'] for post in response.json()]
+
+    def test_timeline_only_includes_followed_authors(self):
+        """Public posts from people we don't follow aren't in our timeline"""
+        self.client.force_login(self.user)
+        stranger = get_user_model().objects.create_user(username='stranger', email='stranger@example.com')
+        followed = Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='public')
+        Post.objects.create(author=stranger, title='t', body='b', visibility_type='public')
+
+        self.assertEqual([followed.pk], self.timeline_ids())
+
+    def test_timeline_includes_posts_made_through_the_api(self):
+        """Posts the people we follow make through the API reach our timeline when we may see them"""
+        Follow.objects.create(follower=self.other_user, followee=self.user)
+        self.client.force_login(self.other_user)
+
+        def create(**payload):
+            response = self.client.post('/posts/', data=json.dumps({'title': 't', 'body': 'b', **payload}),
+                                        content_type='application/json')
+            self.assertEqual(201, response.status_code)
+            return response.json()['id']
+
+        friends = create()
+        public = create(visibility_type='public')
+        create(visibility_type='private')
+
+        self.client.force_login(self.user)
+        self.assertEqual([public, friends], self.timeline_ids())
+
+    def test_timeline_excludes_private_posts(self):
+        """Private posts are only visible to their author"""
+        self.client.force_login(self.user)
+        Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='private')
+
+        self.assertEqual([], self.timeline_ids())
+
+    def test_timeline_all_friends_requires_author_to_follow_viewer(self):
+        """Friends-only posts show up once the author follows us back"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='all_friends')
+        self.assertEqual([], self.timeline_ids())
+
+        Follow.objects.create(follower=self.other_user, followee=self.user)
+        self.assertEqual([post.pk], self.timeline_ids())
+
+    def test_timeline_friend_group_requires_membership(self):
+        """Group posts show up for members of the post's group"""
+        self.client.force_login(self.user)
+        group = FriendGroup.objects.create(owner=self.other_user, name='group')
+        post = Post.objects.create(
+            author=self.other_user, title='t', body='b', visibility_type='friend_group', access_group=group
+        )
+        self.assertEqual([], self.timeline_ids())
+
+        FriendGroupMember.objects.create(group=group, member=self.user)
+        self.assertEqual([post.pk], self.timeline_ids())
+
+    def test_timeline_includes_explicitly_permitted_posts(self):
+        """A post permission grants access to an otherwise hidden post"""
+        self.client.force_login(self.user)
+        post = Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='private')
+        PostPermission.objects.create(post=post, user=self.user)
+
+        self.assertEqual([post.pk], self.timeline_ids())
+
+    def test_timeline_takes_the_post_list_filters(self):
+        """Date filters narrow down posts from pushed and pulled authors alike"""
+        self.client.force_login(self.user)
+        pulled = get_user_model().objects.create_user(username='pulled', email='pulled@example.com')
+        Follow.objects.create(follower=self.user, followee=pulled)
+        feeds.set_pulled(pulled.pk, True)
+
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() - datetime.timedelta(days=2)):
+            Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='public')
+            Post.objects.create(author=pulled, title='t', body='b', visibility_type='public')
+        recent = [
+            Post.objects.create(author=author, title='t', body='b', visibility_type='public').pk
+            for author in (self.other_user, pulled)
+        ]
+
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        for field in ('created_at__gt', 'last_modified__gt'):
+            response = self.client.get('/posts/timeline/', {field: since})
+            self.assertEqual(200, response.status_code)
+            self.assertEqual(recent[::-1], [post['id'] for post in response.json()])
+
+        response = self.client.get('/posts/timeline/', {'created_at__lt': 'yesterday'})
+        self.assertEqual(400, response.status_code)
+
+    def test_timeline_is_a_single_query(self):
+        """Visibility is decided in SQL rather than row by row"""
+        self.client.force_login(self.user)
+        for visibility_type in ['public', 'private', 'all_friends', 'friend_group']:
+            Post.objects.create(author=self.other_user, title='t', body='b', visibility_type=visibility_type)
+        self.client.get('/posts/timeline/')
+
+        # authentication, then the pushed and pulled halves of the page
+        with self.assertNumQueries(3):
+            self.client.get('/posts/timeline/')
+
+
+# Changes are only read once the transactions that wrote them have finished, so these need real commits
+class PostChangesViewTest(AuthTransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+
+    def test_changes_without_token_returns_everything(self):
+        """A sync from scratch gets every post and a token to continue from"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(title='title', body='body', author=self.user) for _ in range(2)]
+
+        response = self.client.get('/posts/changes/')
+        body = response.json()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([post.pk for post in posts], [post['id'] for post in body['changed']])
+        self.assertEqual([], body['deleted'])
+        self.assertFalse(body['more'])
+        self.assertTrue(body['since'])
+
+    def test_changes_since_token_returns_only_delta(self):
+        """After syncing, only updated, created and deleted posts come back"""
+        self.client.force_login(self.user)
+        updated = Post.objects.create(title='title', body='body', author=self.user)
+        deleted = Post.objects.create(title='title', body='body', author=self.user)
+        Post.objects.create(title='title', body='body', author=self.user)
+
+        since = self.client.get('/posts/changes/').json()['since']
+
+        updated.title = 'new title'
+        updated.save()
+        created = Post.objects.create(title='title', body='body', author=self.user)
+        deleted_id = deleted.pk
+        deleted.delete()
+
+        body = self.client.get('/posts/changes/', {'since': since}).json()
+        self.assertEqual([updated.pk, created.pk], [post['id'] for post in body['changed']])
+        self.assertEqual('new title', body['changed'][0]['title'])
+        self.assertEqual([deleted_id], body['deleted'])
+
+        body = self.client.get('/posts/changes/', {'since': body['since']}).json()
+        self.assertEqual([], body['changed'])
+        self.assertEqual([], body['deleted'])
+
+    def test_changes_are_paged(self):
+        """Large deltas come back in pages flagged with more"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(title='title', body='body', author=self.user) for _ in range(3)]
+
+        body = self.client.get('/posts/changes/', {'page_size': 2}).json()
+        self.assertTrue(body['more'])
+        seen = [post['id'] for post in body['changed']]
+
+        body = self.client.get('/posts/changes/', {'page_size': 2, 'since': body['since']}).json()
+        self.assertFalse(body['more'])
+        seen += [post['id'] for post in body['changed']]
+
+        self.assertEqual([post.pk for post in posts], seen)
+
+    def test_changes_cost_does_not_grow_with_compressed_posts(self):
+        """Compressed bodies are loaded along with their posts"""
+        self.client.force_login(self.user)
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=10):
+            Post.objects.create(title='title', body='a long body ' * 10, author=self.user)
+            with CaptureQueriesContext(connection) as few:
+                self.client.get('/posts/changes/')
+            for _ in range(3):
+                Post.objects.create(title='title', body='another long body ' * 10, author=self.user)
+            with CaptureQueriesContext(connection) as many:
+                body = self.client.get('/posts/changes/').json()
+
+        self.assertEqual(4, len(body['changed']))
+        self.assertEqual('another long body ' * 10, body['changed'][-1]['body'])
+        self.assertEqual(len(few), len(many))
+
+    def test_changes_only_include_posts_we_can_see(self):
+        """Other people's posts we can't see are left out, and reported deleted only if we could see them"""
+        self.client.force_login(self.user)
+        other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+        shown = Post.objects.create(title='t', body='b', author=other_user, visibility_type='public')
+        hidden = Post.objects.create(title='t', body='b', author=other_user, visibility_type='private')
+        deleted = Post.objects.create(title='t', body='b', author=other_user, visibility_type='public')
+
+        body = self.client.get('/posts/changes/').json()
+        self.assertEqual([shown.pk, deleted.pk], [post['id'] for post in body['changed']])
+        self.assertEqual([], body['deleted'])
+
+        shown.visibility_type = 'private'
+        shown.save()
+        hidden.title = 'edited'
+        hidden.save()
+        deleted_id = deleted.pk
+        deleted.delete()
+        hidden.delete()
+
+        body = self.client.get('/posts/changes/', {'since': body['since']}).json()
+        self.assertEqual([], body['changed'])
+        self.assertEqual([shown.pk, deleted_id], body['deleted'])
+
+    def test_visibility_changes_we_can_still_see_are_not_deletes(self):
+        self.client.force_login(self.user)
+        post = Post.objects.create(title='t', body='b', author=self.user, visibility_type='public')
+        since = self.client.get('/posts/changes/').json()['since']
+
+        post.visibility_type = 'private'
+        post.save()
+
+        body = self.client.get('/posts/changes/', {'since': since}).json()
+        self.assertEqual([post.pk], [post['id'] for post in body['changed']])
+        self.assertEqual([], body['deleted'])
+
+    def test_changes_wait_for_transactions_in_progress(self):
+        """Posts written by a transaction that commits late aren't skipped by tokens handed out meanwhile"""
+        self.client.force_login(self.user)
+        # Someone else's, so the slow transaction's locks on our stats don't hold it up
+        other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+        started, finish = threading.Event(), threading.Event()
+
+        def import_slowly():
+            try:
+                with transaction.atomic():
+                    Post.objects.create(title='slow', body='b', author=self.user)
+                    started.set()
+                    finish.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=import_slowly)
+        thread.start()
+        started.wait(10)
+        try:
+            Post.objects.create(title='fast', body='b', author=other_user, visibility_type='public')
+            body = self.client.get('/posts/changes/').json()
+            self.assertEqual([], body['changed'])
+        finally:
+            finish.set()
+            thread.join()
+
+        body = self.client.get('/posts/changes/', {'since': body['since']}).json()
+        self.assertEqual(['slow', 'fast'], [post['title'] for post in body['changed']])
+
+    def test_changes_with_html(self):
+        self.client.force_login(self.user)
+        Post.objects.create(title='title', body='*hi* <b>', author=self.user)
+
+        body = self.client.get('/posts/changes/', {'expand': 'html'}).json()
+        self.assertEqual('<p><em>hi</em> &lt;b&gt;</p>', body['changed'][0]['html'])
+
+    def test_changes_invalid_token_fails(self):
+        """A token we didn't issue is rejected"""
+        self.client.force_login(self.user)
+
+        response = self.client.get('/posts/changes/', {'since': 'nonsense'})
+        self.assertEqual(400, response.status_code)
+
+        # Tokens from before changes were kept in commit order held timestamps
+        since = pagination.encode_positions([(timezone.now(), 1), None])
+        response = self.client.get('/posts/changes/', {'since': since})
+        self.assertEqual(400, response.status_code)
+
+
+class PostSearchViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+
+    def test_search_requires_query(self):
+        """Searching without a query fails"""
+        self.client.force_login(self.user)
+
+        response = self.client.get('/posts/search/')
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('missing-fields', response.json()['type'])
+
+    def test_search_ranks_title_matches_first(self):
+        """Matches in the title outrank matches in the body"""
+        self.client.force_login(self.user)
+        body_match = Post.objects.create(author=self.user, title='Tuesday', body='went hiking in the hills')
+        title_match = Post.objects.create(author=self.user, title='Hiking', body='a long walk')
+        Post.objects.create(author=self.user, title='Wednesday', body='stayed in')
+
+        response = self.client.get('/posts/search/', {'q': 'hikes'})
+        body = response.json()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([title_match.pk, body_match.pk], [post['id'] for post in body])
+        self.assertIn('<mark>hiking</mark>', body[1]['snippet'])
+
+    def test_search_respects_visibility(self):
+        """Other people's private posts never match"""
+        self.client.force_login(self.user)
+        Post.objects.create(author=self.other_user, title='secret', body='hidden', visibility_type='private')
+        public = Post.objects.create(author=self.other_user, title='secret', body='shown', visibility_type='public')
+
+        response = self.client.get('/posts/search/', {'q': 'secret'})
+        self.assertEqual([public.pk], [post['id'] for post in response.json()])
+
+    def test_search_snippets_are_escaped(self):
+        """Post text is escaped in snippets so only the highlighting is markup"""
+        self.client.force_login(self.user)
+        Post.objects.create(author=self.user, title='t', body='<script>alert(1)</script> dragon')
+
+        response = self.client.get('/posts/search/', {'q': 'dragon'})
+        snippet = response.json()[0]['snippet']
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('<mark>dragon</mark>', snippet)
+
+    def test_search_finds_compressed_bodies(self):
+        """Bodies stored compressed are still searchable"""
+        self.client.force_login(self.user)
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=10):
+            post = Post.objects.create(author=self.user, title='t', body='a very long entry about volcanoes')
+
+        response = self.client.get('/posts/search/', {'q': 'volcano'})
+        self.assertEqual([post.pk], [post['id'] for post in response.json()])
+
+
+class AuthorPostsViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+
+    def test_author_sees_all_their_posts(self):
+        """We see all of our own posts, newest first"""
+        self.client.force_login(self.user)
+        posts = [
+            Post.objects.create(author=self.user, title='t', body='b', visibility_type=visibility_type)
+            for visibility_type in ['public', 'private', 'all_friends']
+        ]
+        Post.objects.create(author=self.other_user, title='t', body='b', visibility_type='public')
+
+        response = self.client.get(f'/users/{self.user.username}/posts/')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([post.pk for post in reversed(posts)], [post['id'] for post in response.json()])
+
+    def test_other_users_only_see_visible_posts(self):
+        """Other people only see the posts they're allowed to"""
+        self.client.force_login(self.other_user)
+        public = Post.objects.create(author=self.user, title='t', body='b', visibility_type='public')
+        Post.objects.create(author=self.user, title='t', body='b', visibility_type='private')
+
+        response = self.client.get(f'/users/{self.user.username}/posts/')
+        self.assertEqual([public.pk], [post['id'] for post in response.json()])
+
+    def test_author_posts_are_paginated(self):
+        """Author listings page with a cursor"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(author=self.user, title='t', body='b') for _ in range(3)]
+
+        response = self.client.get(f'/users/{self.user.username}/posts/', {'page_size': 2})
+        self.assertEqual([posts[2].pk, posts[1].pk], [post['id'] for post in response.json()])
+
+        next_url = response['Link'][1:response['Link'].index('>')]
+        response = self.client.get(next_url)
+        self.assertEqual([posts[0].pk], [post['id'] for post in response.json()])
+
+    def test_unknown_author_fails(self):
+        """Listing posts for an unknown user is a 404"""
+        self.client.force_login(self.user)
+
+        response = self.client.get('/users/whatever/posts/')
+        self.assertEqual(404, response.status_code)
+
+
+class PostImportViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+
+    def post_lines(self, lines):
+        return self.client.post('/posts/import/', data='\n'.join(lines), content_type='application/x-ndjson')
+
+    def test_import_creates_posts(self):
+        """Every line becomes a post by the current user"""
+        self.client.force_login(self.user)
+        lines = [json.dumps({'title': f'entry {i}', 'body': f'body {i}'}) for i in range(5)]
+
+        with self.settings(POST_IMPORT_BATCH_SIZE=2):
+            response = self.post_lines(lines)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'imported': 5, 'failed': 0, 'errors': []}, response.json())
+        posts = Post.objects.filter(author=self.user).order_by('pk')
+        self.assertEqual([f'entry {i}' for i in range(5)], [post.title for post in posts])
+        self.assertEqual([f'body {i}' for i in range(5)], [post.body for post in posts])
+
+    def test_import_reports_bad_lines(self):
+        """Invalid lines are skipped and reported by line number"""
+        self.client.force_login(self.user)
+        lines = [
+            json.dumps({'title': 'good', 'body': 'one'}),
+            '{not json',
+            '',
+            json.dumps(['not', 'an', 'object']),
+            json.dumps({'title': 'x' * 2000}),
+            json.dumps({'title': 'good', 'body': 'two'}),
+        ]
+
+        response = self.post_lines(lines)
+        body = response.json()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, body['imported'])
+        self.assertEqual(3, body['failed'])
+        self.assertEqual([2, 4, 5], [error['line'] for error in body['errors']])
+        self.assertIn('title', body['errors'][2]['errors'])
+        self.assertEqual(2, Post.objects.filter(author=self.user).count())
+
+    def test_import_derives_post_fields(self):
+        """Imported posts get excerpts, compressed storage and search vectors like saved ones"""
+        self.client.force_login(self.user)
+        lines = [
+            json.dumps({'title': 'short', 'body': 'a walk by the river'}),
+            json.dumps({'title': 'long', 'body': 'a long story about volcanoes ' * 10}),
+        ]
+
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=100):
+            self.post_lines(lines)
+
+        short, long = Post.objects.filter(author=self.user).order_by('pk')
+        self.assertEqual('a walk by the river', short.excerpt)
+        self.assertEqual(5, short.word_count)
+        self.assertFalse(short.body_compressed)
+        self.assertTrue(long.body_compressed)
+        self.assertEqual('', long.inline_body)
+        self.assertEqual(('a long story about volcanoes ' * 10).strip(), long.body)
+
+        response = self.client.get('/posts/search/', {'q': 'volcano'})
+        self.assertEqual([long.pk], [post['id'] for post in response.json()])
+        response = self.client.get('/posts/search/', {'q': 'river'})
+        self.assertEqual([short.pk], [post['id'] for post in response.json()])
+
+    def test_import_keeps_creation_times(self):
+        """Posts can bring their creation time along, and day counts and streaks follow it"""
+        self.client.force_login(self.user)
+        today = timezone.now()
+        days = [today - datetime.timedelta(days=days_ago) for days_ago in (10, 9, 8)]
+        lines = [json.dumps({'title': 'old', 'body': 'b', 'created_at': day.isoformat()}) for day in days]
+        lines.append(json.dumps({'title': 'new', 'body': 'b'}))
+
+        response = self.post_lines(lines)
+        self.assertEqual(4, response.json()['imported'])
+
+        posts = Post.objects.filter(author=self.user).order_by('created_at')
+        self.assertEqual(days, [post.created_at for post in posts][:3])
+        self.assertEqual(timezone.localdate(), timezone.localdate(posts[3].created_at))
+
+        stats = self.client.get('/users/me/', {'expand': 'stats'}).json()['stats']
+        self.assertEqual((3, 1), (stats['longest_streak'], stats['current_streak']))
+        self.assertEqual(
+            4, sum(self.client.get('/users/me/calendar/', {'year': year}).json()['total']
+                   for year in {day.year for day in days + [today]})
+        )
+
+    def test_import_rejects_future_creation_times(self):
+        """Posts can't be dated ahead of when they're imported"""
+        self.client.force_login(self.user)
+        tomorrow = timezone.now() + datetime.timedelta(days=1)
+
+        response = self.post_lines([json.dumps({'title': 't', 'body': 'b', 'created_at': tomorrow.isoformat()})])
+
+        self.assertEqual(0, response.json()['imported'])
+        self.assertIn('created_at', response.json()['errors'][0]['errors'])
+
+    def test_import_fans_out_to_feeds(self):
+        """Imported posts show up in timelines like posts created one at a time"""
+        Follow.objects.create(follower=self.user, followee=self.user)
+        self.client.force_login(self.user)
+
+        self.post_lines([json.dumps({'title': 'imported', 'body': 'b'})])
+
+        response = self.client.get('/posts/timeline/')
+        self.assertEqual(['imported'], [post['title'] for post in response.json()])
+
+    def test_import_cost_does_not_grow_with_lines(self):
+        """Feeds, stats and day counts are updated once per batch rather than once per post"""
+        friend = get_user_model().objects.create_user(username='friend', email='friend@example.com')
+        Follow.objects.create(follower=friend, followee=self.user)
+        Follow.objects.create(follower=self.user, followee=friend)
+        self.client.force_login(self.user)
+
+        def import_queries(count):
+            lines = [json.dumps({'title': 'entry', 'body': 'b', 'visibility_type': 'public'})] * count
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(count, self.post_lines(lines).json()['imported'])
+            return len(queries)
+
+        self.assertEqual(import_queries(2), import_queries(20))
+        self.assertEqual(22, friend.feed_entries.count())
+
+
+class ExportViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.other_user = get_user_model().objects.create_user(username='other', email='other@example.com')
+
+    def test_export_streams_ndjson(self):
+        """Exports are every post of ours as a line of JSON, oldest first, including compressed bodies"""
+        self.client.force_login(self.user)
+        first = Post.objects.create(author=self.user, title='first', body='short', visibility_type='public')
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=10):
+            second = Post.objects.create(author=self.user, title='second', body='x' * 100, visibility_type='private')
+        Post.objects.create(author=self.other_user, title='theirs', body='b', visibility_type='public')
+
+        response = self.client.get(f'/users/{self.user.username}/export/')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.assertTrue(response.streaming)
+
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([first.pk, second.pk], [line['id'] for line in lines])
+        self.assertEqual(['short', 'x' * 100], [line['body'] for line in lines])
+
+        detail = self.client.get(f'/posts/{first.pk}/').json()
+        for field in ['created_at', 'last_modified', 'title', 'body']:
+            self.assertEqual(detail[field], lines[0][field])
+
+    def test_export_as_zip(self):
+        """Zip exports have a file per post"""
+        self.client.force_login(self.user)
+        posts = [Post.objects.create(author=self.user, title=f't{i}', body='b') for i in range(3)]
+
+        response = self.client.get(f'/users/{self.user.username}/export/', {'output': 'zip'})
+        self.assertEqual('application/zip', response['Content-Type'])
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual([f'entries/{post.pk}.json' for post in posts], archive.namelist())
+        self.assertEqual('t1', json.loads(archive.read(f'entries/{posts[1].pk}.json'))['title'])
+
+    def test_export_unknown_output_fails(self):
+        """Only the supported outputs can be asked for"""
+        self.client.force_login(self.user)
+
+        response = self.client.get(f'/users/{self.user.username}/export/', {'output': 'pdf'})
+        self.assertEqual(400, response.status_code)
+
+    def test_cannot_export_other_users(self):
+        """Only our own journal can be exported"""
+        self.client.force_login(self.other_user)
+
+        response = self.client.get(f'/users/{self.user.username}/export/')
+        self.assertEqual(403, response.status_code)
+
+
+class PostDeltaViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.post = Post.objects.create(author=self.user, title='title', body='the quick brown fox')
+
+    def patch(self, payload):
+        return self.client.patch(f'/posts/{self.post.pk}/', data=json.dumps(payload), content_type='application/json')
+
+    def base(self):
+        return self.client.get(f'/posts/{self.post.pk}/').json()['last_modified']
+
+    def test_delta_splices_body(self):
+        """Splices are applied against the base version and the new version comes back"""
+        self.client.force_login(self.user)
+
+        response = self.patch({'base': self.base(), 'ops': [{'start': 4, 'end': 9, 'text': 'slow'}]})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'id', 'last_modified'}, set(response.json().keys()))
+        self.assertEqual('the slow brown fox', Post.objects.get(pk=self.post.pk).body)
+
+        # The returned version is the base for the next edit
+        base = response.json()['last_modified']
+        response = self.patch({'base': base, 'ops': [{'start': 18, 'end': 18, 'text': ' '}]})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('the slow brown fox ', Post.objects.get(pk=self.post.pk).body)
+
+    def test_delta_offsets_are_utf16_code_units(self):
+        """Offsets count the way JavaScript strings do, so text after an emoji lines up"""
+        self.client.force_login(self.user)
+        self.post.body = '😀 the quick fox'
+        self.post.save()
+
+        response = self.patch({'base': self.base(), 'ops': [{'start': 7, 'end': 12, 'text': 'slow'}]})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('😀 the slow fox', Post.objects.get(pk=self.post.pk).body)
+
+        response = self.patch({'base': self.base(), 'ops': [{'start': 1, 'end': 1, 'text': '!'}]})
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('😀 the slow fox', Post.objects.get(pk=self.post.pk).body)
+
+    def test_stale_delta_is_rejected(self):
+        """Edits against an old version fail without touching the post"""
+        self.client.force_login(self.user)
+        base = self.base()
+        self.post.body = 'edited elsewhere'
+        self.post.save()
+
+        response = self.patch({'base': base, 'ops': [{'start': 0, 'end': 3, 'text': 'a'}]})
+        self.assertEqual(409, response.status_code)
+        self.assertEqual('stale-version', response.json()['type'])
+        self.assertEqual(self.base(), response.json()['errors'][0]['current'])
+        self.assertEqual('edited elsewhere', Post.objects.get(pk=self.post.pk).body)
+
+    def test_invalid_ops_are_rejected(self):
+        """Ops out of range or out of order fail"""
+        self.client.force_login(self.user)
+
+        for ops in [[{'start': 5, 'end': 100}], [{'start': 5, 'end': 6}, {'start': 0, 'end': 1}]]:
+            response = self.patch({'base': self.base(), 'ops': ops})
+            self.assertEqual(400, response.status_code)
+
+    def test_unchanged_delta_skips_update(self):
+        """An autosave that changes nothing writes nothing"""
+        self.client.force_login(self.user)
+        base = self.base()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch({'base': base, 'ops': []})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(base, response.json()['last_modified'])
+        self.assertFalse([query for query in queries if query['sql'].startswith('UPDATE')])
+
+    def test_unchanged_put_skips_update(self):
+        """Resending the stored post in full doesn't count as an edit either"""
+        self.client.force_login(self.user)
+        base = self.base()
+
+        payload = {'title': 'title', 'body': 'the quick brown fox'}
+        response = self.client.put(f'/posts/{self.post.pk}/', data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(base, response.json()['last_modified'])
+
+    def test_delta_on_compressed_body(self):
+        """Compressed bodies can be spliced too"""
+        self.client.force_login(self.user)
+        with self.settings(POST_BODY_COMPRESSION_THRESHOLD=10):
+            self.post.body = 'a long body ' * 10
+            self.post.save()
+
+            self.patch({'base': self.base(), 'ops': [{'start': 0, 'end': 1, 'text': 'A'}], 'title': 'new'})
+
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertTrue(post.body_compressed)
+        self.assertEqual('A long body ' + 'a long body ' * 9, post.body)
+        self.assertEqual('new', post.title)
+
+
+class CalendarViewTest(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.author = get_user_model().objects.create_user(username='author', email='author@example.com')
+        self.reader = get_user_model().objects.create_user(username='reader', email='reader@example.com')
+        Follow.objects.create(follower=self.author, followee=self.reader)
+
+        self.year = timezone.localdate().year
+        for visibility_type in ['public', 'all_friends', 'private']:
+            Post.objects.create(author=self.author, title='t', body='b', visibility_type=visibility_type)
+        old = Post.objects.create(author=self.author, title='t', body='b', visibility_type='public')
+        old.created_at = old.created_at.replace(year=self.year - 3, month=2, day=1)
+        old.save()
+
+    def test_author_sees_all_posts(self):
+        self.client.force_login(self.author)
+        response = self.client.get('/users/author/calendar/')
+        body = response.json()
+
+        self.assertEqual(200, response.status_code)
+        today = timezone.localdate()
+        self.assertEqual(self.year, body['year'])
+        self.assertEqual([self.year - 3, self.year], body['years'])
+        self.assertEqual(3, body['total'])
+        self.assertEqual(3, body['months'][today.month - 1])
+        self.assertEqual({today.isoformat(): 3}, body['days'])
+
+    def test_others_see_public_posts(self):
+        self.client.force_login(self.reader)
+        body = self.client.get('/users/author/calendar/', {'year': self.year - 3}).json()
+
+        self.assertEqual(1, body['total'])
+        self.assertEqual({f'{self.year - 3}-02-01': 1}, body['days'])
+        self.assertEqual(1, self.client.get('/users/author/calendar/').json()['total'])
+
+    def test_cost_does_not_grow_with_posts(self):
+        self.client.force_login(self.author)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/users/author/calendar/')
+        Post.objects.bulk_create_posts([Post(author=self.author, title='t', body='b') for _ in range(50)])
+        with CaptureQueriesContext(connection) as many:
+            body = self.client.get('/users/author/calendar/').json()
+
+        self.assertEqual(53, body['total'])
+        self.assertEqual(len(few), len(many))
+
+    def test_unchanged_calendar_is_not_modified(self):
+        self.client.force_login(self.author)
+        first = self.client.get('/users/author/calendar/')
+        second = self.client.get('/users/author/calendar/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(304, second.status_code)
+
+        Post.objects.create(author=self.author, title='t', body='b')
+        third = self.client.get('/users/author/calendar/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(200, third.status_code)
+
+    def test_invalid_year(self):
+        self.client.force_login(self.author)
+        self.assertEqual(400, self.client.get('/users/author/calendar/', {'year': 'soon'}).status_code)
+
+    def test_unknown_user(self):
+        self.client.force_login(self.author)
+        self.assertEqual(404, self.client.get('/users/nobody/calendar/').status_code)
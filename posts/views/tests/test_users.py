@@ -1,9 +1,12 @@
 import json
+from datetime import timedelta
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from posts.tests.utils import AuthTestCase
-from posts.models import Follow, FriendGroup
+from posts.models import Follow, FriendGroup, UserProfile
 
 
 class CurrentUserViewTestCase(AuthTestCase):
@@ -26,7 +29,7 @@ class CurrentUserViewTestCase(AuthTestCase):
 
         self.assertEqual(200, response.status_code)
         self.assertEqual({'username': 'me', 'id': self.user.id, 'email': 'me@example.com', 'profile': {
-            'bio': None
+            'bio': None, 'follower_count': 0, 'following_count': 0
         }, 'groups': [
             {
                 'name': group.name,
@@ -68,6 +71,33 @@ class UserViewTestCase(AuthTestCase):
         self.assertEqual(body['following'], [{'username': 'other'}, {'username': 'me'}])
         self.assertEqual(body['followers'], [{'username': 'me'}])
 
+    def test_expanded_follows_are_oldest_first(self):
+        """Expanded follows come back in the order they were made, whatever order the rows are stored in"""
+        self.client.force_login(self.user)
+        later = Follow.objects.create(follower=self.user, followee=self.user)
+        earlier = Follow.objects.create(follower=self.user, followee=self.other)
+        Follow.objects.filter(pk=earlier.pk).update(created_at=later.created_at - timedelta(days=1))
+
+        body = self.client.get(f'/users/{self.user.username}/', {'expand': 'following'}).json()
+        self.assertEqual([{'username': 'other'}, {'username': 'me'}], body['following'])
+
+        # Follows listed with their followees expanded are prefetched rather than queried one by one
+        body = self.client.get(f'/users/{self.user.username}/follows/', {'expand': 'following'}).json()
+        me = next(user for user in body if user['username'] == 'me')
+        self.assertEqual([{'username': 'other'}, {'username': 'me'}], me['following'])
+
+    def test_user_not_modified_until_followed(self):
+        """A user's ETag covers the follows that can be expanded onto them"""
+        self.client.force_login(self.user)
+
+        etag = self.client.get(f'/users/{self.other.username}/')['ETag']
+        response = self.client.get(f'/users/{self.other.username}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(304, response.status_code)
+
+        Follow.objects.create(follower=self.user, followee=self.other)
+        response = self.client.get(f'/users/{self.other.username}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+
     def test_update_profile(self):
         """We should just be able to update a user's profile"""
         self.client.force_login(self.user)
@@ -129,6 +159,55 @@ class FollowViewTestCase(AuthTestCase):
         self.assertEqual(len(body), 1)
         self.assertEqual(body[0]['id'], self.other.id)
 
+    def follow_many(self, count: int):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'followee{index}', email=f'followee{index}@example.com')
+            for index in range(count)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in users)
+        Follow.objects.bulk_create(Follow(follower=self.user, followee=user) for user in users)
+        Follow.objects.bulk_create(Follow(follower=user, followee=self.other) for user in users)
+
+    def test_get_query_count_does_not_grow_with_follows(self):
+        """A page of follows costs the same number of queries however many there are, expanded or not"""
+        self.client.force_login(self.user)
+        Follow.objects.create(follower=self.user, followee=self.other)
+        Follow.objects.create(follower=self.other, followee=self.user)
+
+        for query in [{}, {'expand': 'profile,followers,following'}]:
+            with CaptureQueriesContext(connection) as one:
+                self.client.get(f'/users/{self.user.username}/follows/', query)
+            self.assertGreater(len(one), 0)
+
+            self.follow_many(1000)
+            with self.assertNumQueries(len(one)):
+                response = self.client.get(f'/users/{self.user.username}/follows/', {**query, 'page_size': 200})
+            self.assertEqual(200, len(response.json()))
+            get_user_model().objects.filter(username__startswith='followee').delete()
+
+    def test_get_paginates_newest_first(self):
+        """Follows are paged through with a cursor in the Link header"""
+        self.client.force_login(self.user)
+        self.follow_many(3)
+
+        response = self.client.get(f'/users/{self.user.username}/follows/', {'page_size': 2})
+        self.assertEqual(['followee2', 'followee1'], [user['username'] for user in response.json()])
+
+        next_url = response['Link'].split(';')[0].strip('<>')
+        response = self.client.get(next_url)
+        self.assertEqual(['followee0'], [user['username'] for user in response.json()])
+        self.assertFalse(response.has_header('Link'))
+
+    def test_get_expands_followees(self):
+        """Followees can be expanded like any other user"""
+        self.client.force_login(self.user)
+        Follow.objects.create(follower=self.user, followee=self.other)
+
+        response = self.client.get(f'/users/{self.user.username}/follows/', {'expand': 'profile,followers'})
+        body = response.json()
+        self.assertEqual({'bio': None, 'follower_count': 1, 'following_count': 0}, body[0]['profile'])
+        self.assertEqual([{'username': self.user.username}], body[0]['followers'])
+
     def test_get_returns_individual_follow(self):
         """Can filter to an individual follow"""
         self.client.force_login(self.user)
@@ -264,6 +343,23 @@ class FollowViewTestCase(AuthTestCase):
         count = Follow.objects.filter(follower=self.user, followee=self.other).count()
         self.assertEqual(0, count)
 
+    def test_follow_counts_track_put_and_delete(self):
+        """Following and unfollowing updates both users' counts"""
+        self.client.force_login(self.user)
+        url = f'/users/{self.user.username}/follows/'
+        data = json.dumps({'username': self.other.username})
+
+        self.client.put(url, data=data, content_type='application/json')
+        self.client.put(url, data=data, content_type='application/json')
+        other = self.client.get(f'/users/{self.other.username}/', {'expand': 'profile'}).json()
+        me = self.client.get(f'/users/{self.user.username}/', {'expand': 'profile'}).json()
+        self.assertEqual(1, other['profile']['follower_count'])
+        self.assertEqual(1, me['profile']['following_count'])
+
+        self.client.delete(url, data=data, content_type='application/json')
+        other = self.client.get(f'/users/{self.other.username}/', {'expand': 'profile'}).json()
+        self.assertEqual(0, other['profile']['follower_count'])
+
     def test_delete_invalid_username_fails(self):
         """Deleting an invalid username path fails"""
         self.client.force_login(self.user)
@@ -338,3 +434,103 @@ class FollowViewTestCase(AuthTestCase):
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn(self.user.username, str(mail.outbox[0].message().get_payload(0)))
         self.assertIn(self.user.username, str(mail.outbox[0].message().get_payload(1)))
+        self.assertEqual([self.other.email], mail.outbox[0].to)
+
+    def test_repeated_add_sends_one_email(self):
+        self.client.force_login(self.user)
+        for _ in range(3):
+            response = self.client.put(
+                f'/users/{self.user.username}/follows/',
+                data=json.dumps({'username': self.other.username}),
+                content_type='application/json'
+            )
+            self.assertEqual(200, response.status_code)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(1, Follow.objects.filter(follower=self.user, followee=self.other).count())
+
+
+class FollowBatchViewTestCase(AuthTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(username='me', email='me@example.com')
+        self.writers = [
+            get_user_model().objects.create_user(username=f'writer{index}', email=f'writer{index}@example.com')
+            for index in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def batch(self, method, usernames, username='me'):
+        return getattr(self.client, method)(
+            f'/users/{username}/follows/batch/',
+            data=json.dumps({'usernames': usernames}),
+            content_type='application/json'
+        )
+
+    def test_follow_many(self):
+        Follow.objects.create(follower=self.user, followee=self.writers[0])
+
+        response = self.batch('put', ['writer0', 'writer1', 'nobody', 'writer2', 'writer1'])
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([
+            {'username': 'writer0', 'result': 'already-following'},
+            {'username': 'writer1', 'result': 'followed'},
+            {'username': 'nobody', 'result': 'unknown-username'},
+            {'username': 'writer2', 'result': 'followed'},
+        ], response.json())
+        self.assertEqual(3, Follow.objects.filter(follower=self.user).count())
+        self.assertEqual(3, UserProfile.objects.get(user=self.user).following_count)
+
+    def test_follow_many_emails_each_new_followee_once(self):
+        Follow.objects.create(follower=self.user, followee=self.writers[0])
+
+        self.batch('put', ['writer0', 'writer1', 'writer2'])
+        self.batch('put', ['writer1', 'writer2'])
+
+        self.assertEqual(
+            ['writer1@example.com', 'writer2@example.com'],
+            sorted(message.to[0] for message in mail.outbox)
+        )
+
+    def test_follow_many_costs_the_same_for_more_users(self):
+        with CaptureQueriesContext(connection) as one:
+            self.batch('put', ['writer0'])
+        Follow.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as many:
+            self.batch('put', ['writer0', 'writer1', 'writer2', 'nobody'])
+
+        # Resolving users and inserting follows stay single queries. Only the per-follow receivers grow.
+        def count(queries, prefix):
+            return len([query for query in queries if query['sql'].startswith(prefix)])
+
+        user_lookup = 'SELECT "auth_user"'
+        self.assertEqual(count(one.captured_queries, user_lookup), count(many.captured_queries, user_lookup))
+        self.assertEqual(1, count(many.captured_queries, 'INSERT INTO "posts_follow"'))
+
+    def test_unfollow_many(self):
+        Follow.objects.create(follower=self.user, followee=self.writers[0])
+        Follow.objects.create(follower=self.user, followee=self.writers[1])
+
+        response = self.batch('delete', ['writer0', 'writer1', 'writer2', 'nobody'])
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([
+            {'username': 'writer0', 'result': 'unfollowed'},
+            {'username': 'writer1', 'result': 'unfollowed'},
+            {'username': 'writer2', 'result': 'not-following'},
+            {'username': 'nobody', 'result': 'unknown-username'},
+        ], response.json())
+        self.assertFalse(Follow.objects.filter(follower=self.user).exists())
+        self.assertEqual(0, UserProfile.objects.get(user=self.user).following_count)
+
+    def test_cannot_batch_for_other_user(self):
+        self.assertEqual(403, self.batch('put', ['writer0'], username='writer1').status_code)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_invalid_batches_fail(self):
+        self.assertEqual(400, self.batch('put', []).status_code)
+        self.assertEqual(400, self.batch('put', 'writer0').status_code)
+        self.assertEqual(400, self.batch('put', [f'user{index}' for index in range(201)]).status_code)
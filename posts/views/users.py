@@ -1,4 +1,12 @@
+from functools import partial
+from typing import Dict, List, Tuple
+
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
 from rest_framework import generics
 from rest_framework import mixins
 from rest_framework import viewsets
@@ -6,15 +14,17 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from posts import fastpath
 from posts import filters
 from posts import models
+from posts import pagination
 from posts import permissions
 from posts import serializers
 from posts import tasks
-from posts.views.mixins import UsernameScopedMixin
+from posts.views.mixins import ConditionalGetMixin, UsernameScopedMixin
 
 
-class CurrentUserView(generics.GenericAPIView):
+class CurrentUserView(ConditionalGetMixin, generics.GenericAPIView):
     """
     Lists information related to the current user.
     """
@@ -22,11 +32,15 @@ class CurrentUserView(generics.GenericAPIView):
     permission_classes = (IsAuthenticated, )
 
     def get(self, request: Request, *args, **kwargs):
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        probes = [
+            (models.UserProfile.objects.filter(user=request.user), 'last_modified'),
+            (models.FriendGroup.objects.filter(owner=request.user), 'last_modified'),
+        ]
+        return self.conditional_response(request, probes, lambda: Response(self.get_serializer(request.user).data))
 
 
 class UserViewSet(
+    ConditionalGetMixin,
     mixins.UpdateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -40,15 +54,96 @@ class UserViewSet(
     serializer_class = serializers.UserSerializer
     lookup_field = 'username'
 
+    def use_fast_path(self) -> bool:
+        # Plans can't expand fields, so expanded responses go through the serializer
+        return 'expand' not in self.request.query_params
+
+    def expanded(self) -> set:
+        return set(self.request.query_params.get('expand', '').split(','))
+
+    def list(self, request: Request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        probes = [(queryset, 'profile__last_modified')]
+        if 'stats' in self.expanded():
+            probes.append((queryset, 'stats__last_modified'))
+        if self.use_fast_path():
+            respond = partial(self.fast_list, queryset)
+        else:
+            respond = partial(super().list, request, *args, **kwargs)
+        return self.conditional_response(request, probes, respond)
+
+    def retrieve(self, request: Request, *args, **kwargs):
+        username = kwargs['username']
+        queryset = self.get_queryset().filter(username=username)
+        probes = [
+            (queryset, 'profile__last_modified'),
+            (models.Follow.objects.filter(Q(follower__username=username) | Q(followee__username=username)),
+             'last_modified'),
+        ]
+        if 'stats' in self.expanded():
+            probes.append((queryset, 'stats__last_modified'))
+        # Expanded follows are listed by username, and renames show up on profiles
+        if 'followers' in self.expanded():
+            probes.append(
+                (models.Follow.objects.filter(followee__username=username), 'follower__profile__last_modified')
+            )
+        if 'following' in self.expanded():
+            probes.append(
+                (models.Follow.objects.filter(follower__username=username), 'followee__profile__last_modified')
+            )
+        if self.use_fast_path():
+            respond = partial(self.fast_retrieve, queryset)
+        else:
+            respond = partial(super().retrieve, request, *args, **kwargs)
+        return self.conditional_response(request, probes, respond)
+
+    def fast_list(self, queryset):
+        return Response(fastpath.plan_for(self.get_serializer_class()).serialize(queryset))
+
+    def fast_retrieve(self, queryset):
+        rows = fastpath.plan_for(self.get_serializer_class()).serialize(queryset)
+        if not rows:
+            raise Http404
+        return Response(rows[0])
+
+    def perform_update(self, serializer):
+        user = serializer.save()
+        # Users have no modification time of their own, so their profile's stands in for it
+        models.UserProfile.objects.filter(user=user).update(last_modified=timezone.now())
+
 
 class FollowView(generics.GenericAPIView, UsernameScopedMixin):
     permission_classes = (IsAuthenticated, permissions.IsUserOrReadOnly)
+    serializer_class = serializers.UserSerializer
+    pagination_class = pagination.KeysetPagination
+    cursor_ordering = ('created_at', 'id')
+
+    # What each expandable field of the followee reads, so a page of them loads in a fixed number of queries
+    EXPAND_SELECT = {
+        'profile': 'followee__profile',
+        'stats': 'followee__stats',
+    }
+    EXPAND_PREFETCH = {
+        'followers': 'followee__followers__follower',
+        'following': 'followee__following__followee',
+    }
 
     def get(self, request: Request, username: str, *args, **kwargs):
         user = self.get_user_or_404(username)
 
+        expand = [field for field in request.query_params.get('expand', '').split(',') if field]
+        related = [self.EXPAND_SELECT[field] for field in expand if field in self.EXPAND_SELECT]
+        prefetch = [self.EXPAND_PREFETCH[field] for field in expand if field in self.EXPAND_PREFETCH]
+
         following = filters.FollowersFilterSet(request.GET, queryset=user.following).qs
-        return Response([serializers.UserSerializer(follow.followee).data for follow in following])
+        following = following.select_related('followee', *related).prefetch_related(*prefetch)
+
+        followees = [follow.followee for follow in self.paginate_queryset(following)]
+        if expand:
+            data = self.get_serializer(followees, many=True).data
+        else:
+            data = fastpath.plan_for(self.get_serializer_class()).build_objects(followees)
+        return self.get_paginated_response(data)
 
     def put(self, request: Request, username: str, *args, **kwargs):
         source_user = self.get_user_or_404(username)
@@ -56,10 +151,9 @@ class FollowView(generics.GenericAPIView, UsernameScopedMixin):
         target_username = request.data.get('username', None)
         target_user = self.get_user_or_404(target_username, check=False)
 
-        follow = models.Follow.objects.filter(follower=source_user, followee=target_user).first()
-        if not follow:
-            follow = models.Follow.objects.create(follower=source_user, followee=target_user)
-            tasks.send_follow_email(follow, self.request.user)
+        follow, created = models.Follow.objects.follow(source_user, target_user)
+        if created:
+            tasks.send_follow_email(follow, target_user)
 
         return Response([serializers.RelatedUserSerializer(target_user).data], status=200)
 
@@ -73,3 +167,48 @@ class FollowView(generics.GenericAPIView, UsernameScopedMixin):
         follows.delete()
 
         return Response('', status=204)
+
+
+class FollowBatchView(generics.GenericAPIView, UsernameScopedMixin):
+    """
+    Follows or unfollows many users at once. Each named user gets a result,
+    and usernames that don't exist are reported rather than failing the batch.
+    """
+    permission_classes = (IsAuthenticated, permissions.IsUser)
+
+    def resolve(self, request: Request) -> Tuple[List[str], Dict[str, User]]:
+        batch = serializers.FollowBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        usernames = list(dict.fromkeys(batch.validated_data['usernames']))
+        users = get_user_model().objects.filter(username__in=usernames)
+        return usernames, {user.username: user for user in users}
+
+    def put(self, request: Request, username: str, *args, **kwargs):
+        source_user = self.get_user_or_404(username)
+        usernames, users = self.resolve(request)
+
+        with transaction.atomic():
+            created = models.Follow.objects.follow_many(source_user, list(users.values()))
+        tasks.send_follow_emails(created)
+
+        followed = {follow.followee.username for follow in created}
+        return Response([
+            {'username': name, 'result': 'followed' if name in followed else 'already-following'}
+            if name in users else {'username': name, 'result': 'unknown-username'}
+            for name in usernames
+        ])
+
+    def delete(self, request: Request, username: str, *args, **kwargs):
+        source_user = self.get_user_or_404(username)
+        usernames, users = self.resolve(request)
+
+        follows = models.Follow.objects.filter(follower=source_user, followee__in=list(users.values()))
+        with transaction.atomic():
+            following = set(follows.values_list('followee__username', flat=True))
+            follows.delete()
+
+        return Response([
+            {'username': name, 'result': 'unfollowed' if name in following else 'not-following'}
+            if name in users else {'username': name, 'result': 'unknown-username'}
+            for name in usernames
+        ])